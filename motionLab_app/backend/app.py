@@ -1,5 +1,7 @@
+import gzip
+import io
 import os
-from flask import Flask, send_from_directory, abort, jsonify
+from flask import Flask, send_from_directory, send_file, abort, jsonify, request
 
 from pathlib import Path
 from flask_cors import CORS
@@ -8,6 +10,7 @@ from extensions import mail
 from database import SQLALCHEMY_CONFIG, init_db, db
 from routes import auth_bp, pose_bp, project_bp, admin_bp, avatar_bp  # Import the Blueprints
 from services.retarget_avatar_service import RetargetedAvatarService
+from services.job_queue_service import JobQueueService
 
 def create_app():
     app = Flask(__name__)
@@ -40,6 +43,9 @@ def create_app():
     # Initialize RetargetedAvatarService with the app instance
     RetargetedAvatarService.init_app(app)
     
+    # Initialize JobQueueService so finished workers can record failures
+    JobQueueService.init_app(app)
+    
     return app
 
 app = create_app()
@@ -56,10 +62,28 @@ def serve_bvh_file(filename):
         if not file_path.is_file():
             abort(404, description="File not found")
 
+        if filename.endswith('.gz'):
+            return serve_compressed_bvh_file(file_path)
+
         # Send the file from the BVHs directory
         return send_from_directory(BVH_DIRECTORY, filename, as_attachment=True)
     except Exception as e:
         return {"error": str(e)}, 500
+
+def serve_compressed_bvh_file(file_path):
+    """
+    Sends a '.bvh.gz' file as-is with Content-Encoding: gzip, so the browser inflates
+    it transparently. Clients that do not accept gzip get the decompressed text.
+    """
+    download_name = file_path.name[:-len('.gz')]
+    if 'gzip' in request.accept_encodings:
+        response = send_file(file_path, mimetype='text/plain', as_attachment=True, download_name=download_name)
+        response.headers['Content-Encoding'] = 'gzip'
+        response.headers['Vary'] = 'Accept-Encoding'
+        return response
+
+    with gzip.open(file_path, 'rb') as f:
+        return send_file(io.BytesIO(f.read()), mimetype='text/plain', as_attachment=True, download_name=download_name)
     
 @app.route('/avatars/<path:filename>', methods=['GET'])
 def serve_avatar_file(filename):
@@ -1,8 +1,12 @@
 from flask import jsonify
 from models.user_model import User
 from models.project_model import Project
+from models.processing_job_model import ProcessingJob
 from services.admin_service import AdminService
 from services.bvh_service import BVHService
+from services.job_queue_service import JobQueueService
+from utils.model_registry import ModelRegistry
+from utils.video_utils import FrameReader
 from database import db
 
 import datetime
@@ -73,45 +77,33 @@ class AdminController:
     @staticmethod
     def get_processing_queue(limit=3):
         try:
-            # Get only processing projects
-            projects = Project.query.filter_by(
-                is_processing=True).limit(limit).all()
+            jobs = ProcessingJob.get_active(limit)
 
             queue_list = []
-            for idx, project in enumerate(projects):
-                # Calculate a fake progress percentage based on creation time
-                now = datetime.datetime.utcnow()
-                time_diff = (now - project.created_at).total_seconds()
-                progress = min(95, int(time_diff / 60 * 10)
-                               )  # 10% per minute, max 95%
-
-                # Calculate ETA
-                remaining = 100 - progress
-                minutes_left = int(remaining / 10)  # 10% per minute
+            now = datetime.datetime.utcnow()
+            for job in jobs:
+                project = Project.get_project_by_id(job.project_id)
+                progress = int(job.progress or 0)
+
+                # Extrapolate the remaining time from the progress made since the job started
+                eta = "Unknown"
+                if job.status == "processing" and job.started_at and progress > 0:
+                    elapsed = (now - job.started_at).total_seconds()
+                    minutes_left = int(elapsed * (100 - progress) / progress / 60)
+                    eta = f"{minutes_left} min" if minutes_left > 0 else "< 1 min"
 
                 queue_item = {
-                    "id": project.id,
-                    "name": project.name,
-                    "status": "Processing",
+                    "id": job.project_id,
+                    "jobId": job.id,
+                    "name": project.name if project else "Unknown",
+                    "status": "Processing" if job.status == "processing" else "Queued",
+                    "stage": job.stage,
                     "progress": progress,
-                    "eta": f"{minutes_left} min" if minutes_left > 0 else "< 1 min"
+                    "queuePosition": job.get_queue_position(),
+                    "eta": eta
                 }
                 queue_list.append(queue_item)
 
-            # If we don't have enough processing projects, add some queued ones
-            if len(queue_list) < limit:
-                # Create some mock queued projects
-                remaining = limit - len(queue_list)
-                for i in range(remaining):
-                    queue_item = {
-                        "id": 1000 + i,
-                        "name": f"Queued Project {i+1}",
-                        "status": "Queued",
-                        "progress": 0,
-                        "eta": f"{(i+1) * 5 + 10} min"
-                    }
-                    queue_list.append(queue_item)
-
             return jsonify({"success": True, "data": queue_list}), 200
         except Exception as e:
             return jsonify({"success": False, "message": str(e)}), 500
@@ -253,6 +245,19 @@ class AdminController:
         except Exception as e:
             return jsonify({"success": False, "message": str(e)}), 500
 
+    @staticmethod
+    def get_model_metrics():
+        try:
+            server_metrics = ModelRegistry.get_metrics()
+            server_metrics["video_decode"] = FrameReader.get_totals()
+            metrics = {
+                "server": server_metrics,
+                "workers": JobQueueService.get_worker_metrics(),
+            }
+            return jsonify({"success": True, "data": metrics}), 200
+        except Exception as e:
+            return jsonify({"success": False, "message": str(e)}), 500
+
     @staticmethod
     def get_logs(log_type, log_level, limit):
         try:
@@ -1,13 +1,30 @@
 import os
 import logging
+import datetime
 from flask import jsonify
 
-from services import PoseProcessingService, SegmentationService, VideoService, UserService, ProjectService, BVHService
+from services import PoseProcessingService, SegmentationService, VideoService, UserService, ProjectService, BVHService, JobQueueService, ErrorHandlingService
+from services.job_queue_service import JobProgressReporter
+from models.processing_job_model import ProcessingJob
+from models.project_model import Project
+from utils import VideoUtils, PoseUtils
 
 class PoseController:
-    def __init__(self):
+    def __init__(self, pipeline_mode=None):
+        """
+        :param pipeline_mode: "streaming" extracts keypoints for every tracked person in a single
+                              decode of the upload, "segmented" writes one video per person first.
+                              Defaults to the POSE_PIPELINE_MODE environment variable.
+        """
         self.pose_processing_service = PoseProcessingService()
         self.segmentation_service = SegmentationService()
+        self.error_handling_service = ErrorHandlingService()
+        self.pipeline_mode = pipeline_mode or os.getenv("POSE_PIPELINE_MODE", "streaming")
+
+    def warm_up(self):
+        """Loads every model the pipeline uses so the first job does not pay the cold start."""
+        self.segmentation_service.warm_up()
+        self.pose_processing_service.warm_up()
 
     def convert_video_to_bvh(self, temp_video_path, x_sensitivity, y_sensitivity):
         """
@@ -30,21 +47,27 @@ class PoseController:
             if temp_video_path and os.path.exists(temp_video_path):
                 os.remove(temp_video_path)  # Ensure file cleanup
 
-    def segment_people_into_separate_videos(self, video_path, x_sensitivity, y_sensitivity):
+    def segment_people_into_separate_videos(self, video_path, x_sensitivity, y_sensitivity, progress_callback=None):
         """
         Handles segmentation and passes segmented videos for further processing.
         :param video_path: Path to the video file
+        :param progress_callback: Optional callable receiving (stage, progress percentage)
         :return: List of BVH filenames if successful, None otherwise
         """
         try:
-            output_video_paths = self.segmentation_service.segment_video(video_path)
+            output_video_paths = self.segmentation_service.segment_video(
+                video_path, PoseController._scaled_progress(progress_callback, "segmentation", 0, 50)
+            )
             if not output_video_paths:
                 print("No segmented videos found")
                 return None, "Error in segmentation"
 
             # Process segmented videos
             print("Processing segmented videos...")
-            bvh_filenames = self.process_segmented_videos(output_video_paths, video_path, x_sensitivity, y_sensitivity)
+            bvh_filenames = self.process_segmented_videos(
+                output_video_paths, video_path, x_sensitivity, y_sensitivity,
+                PoseController._scaled_progress(progress_callback, "conversion", 50, 100)
+            )
 
             return bvh_filenames, None
 
@@ -53,15 +76,19 @@ class PoseController:
             logging.error(f"Error in multiple_human_segmentation: {e}")
             return None, "Error in segmentation"
 
-    def process_segmented_videos(self, output_video_paths, original_video_path, x_sensitivity, y_sensitivity):
+    def process_segmented_videos(self, output_video_paths, original_video_path, x_sensitivity, y_sensitivity, progress_callback=None):
         """
         Processes each segmented video and converts it to BVH if it meets the frame count criteria.
         :param output_video_paths: List of paths to segmented videos
+        :param progress_callback: Optional callable receiving (videos_done, total_videos)
         """
         bvh_filenames = []
         total_frames = VideoService.get_video_frame_count(original_video_path)
 
-        for segmented_video_path in output_video_paths:
+        for i, segmented_video_path in enumerate(output_video_paths):
+            if progress_callback:
+                progress_callback(i, len(output_video_paths))
+
             frames_num = VideoService.get_video_frame_count(segmented_video_path)
 
             if frames_num < 0.4 * total_frames:
@@ -76,6 +103,199 @@ class PoseController:
 
         return bvh_filenames
 
+    def stream_people_into_bvhs(self, video_path, x_sensitivity, y_sensitivity, progress_callback=None, quality_callback=None):
+        """
+        Tracks people and extracts their keypoints in one pass over the video, screens every
+        person for occlusion, then converts every person that is visible long enough to BVH.
+        :param video_path: Path to the video file
+        :param progress_callback: Optional callable receiving (stage, progress percentage)
+        :param quality_callback: Optional callable receiving the occlusion report of every person
+        :return: List of BVH filenames if successful, None otherwise
+        """
+        try:
+            people, video_info = self.segmentation_service.extract_people_keypoints(
+                video_path, PoseController._scaled_progress(progress_callback, "tracking", 0, 60)
+            )
+            if not people:
+                print("No people found")
+                return None, "Error in segmentation"
+
+            quality_report = self.screen_occlusion(people, video_info["fps"])
+            if quality_callback:
+                quality_callback(quality_report)
+
+            lifting_progress = PoseController._scaled_progress(progress_callback, "lifting", 60, 100)
+            bvh_filenames = []
+            for i, (person_id, track) in enumerate(people.items()):
+                if lifting_progress:
+                    lifting_progress(i, len(people))
+
+                if len(track) < 0.4 * video_info["frame_count"]:
+                    continue
+
+                print("Converting person to BVH:", person_id)
+                try:
+                    bvh_filename = self.pose_processing_service.convert_keypoints_to_bvh(
+                        track, video_info["fps"],
+                        video_info["width"], video_info["height"], x_sensitivity, y_sensitivity
+                    )
+                except Exception as e:
+                    logging.error(f"Error converting person {person_id} to BVH: {e}")
+                    continue
+
+                if bvh_filename:  # Ensure only valid BVH files are added
+                    bvh_filenames.append(bvh_filename)
+
+            return bvh_filenames, None
+
+        except Exception as e:
+            print(f"Error in stream_people_into_bvhs: {e}")
+            logging.error(f"Error in stream_people_into_bvhs: {e}")
+            return None, "Error in segmentation"
+
+        finally:
+            VideoUtils.delete_video(video_path)
+
+    def screen_occlusion(self, people, fps):
+        """
+        Checks the keypoints of every tracked person for occlusion before any 3D lifting.
+        :param people: Dictionary mapping person IDs to KeypointTracks
+        :param fps: Frames per second of the video
+        :return: Dictionary mapping person IDs to their occlusion report
+        """
+        # The YOLO backend only detects the MediaPipe landmarks that have a COCO keypoint
+        landmark_indices = PoseUtils.coco_to_mediapipe if self.segmentation_service.pose_2d_backend == "yolo" else None
+        quality_report = {}
+        for person_id, track in people.items():
+            report = self.error_handling_service.quality_report(
+                track.landmarks, track.valid, frame_indices=track.frame_indices, fps=fps,
+                landmark_indices=landmark_indices
+            )
+            if report["intervals"]:
+                print(f"Person {person_id}: {report['occluded_percentage']}% of frames occluded "
+                      f"in {len(report['intervals'])} intervals")
+            quality_report[str(person_id)] = report
+        return quality_report
+
+    def process_video(self, video_path, x_sensitivity, y_sensitivity, progress_callback=None, quality_callback=None):
+        """
+        Runs the configured pipeline mode on an uploaded video.
+        :param progress_callback: Optional callable receiving (stage, progress percentage)
+        :param quality_callback: Optional callable receiving the occlusion report of every person;
+                                 only the streaming mode produces one
+        :return: Tuple (bvh_filenames, error_message)
+        """
+        if self.pipeline_mode == "segmented":
+            return self.segment_people_into_separate_videos(video_path, x_sensitivity, y_sensitivity, progress_callback)
+        return self.stream_people_into_bvhs(video_path, x_sensitivity, y_sensitivity, progress_callback, quality_callback)
+
+    @staticmethod
+    def _scaled_progress(progress_callback, stage, start, end):
+        """
+        Wraps a (stage, percentage) callback into a (done, total) callback that maps
+        onto the [start, end] slice of the overall progress.
+        """
+        if progress_callback is None:
+            return None
+
+        def report(done, total):
+            fraction = min(1.0, done / total) if total else 0.0
+            progress_callback(stage, start + (end - start) * fraction)
+
+        return report
+
+    def save_results(self, project_id, project_name, user_id, bvh_filenames):
+        """
+        Stores the generated BVH files on the project and marks it as processed.
+        :return: True if the BVH files were saved, False otherwise
+        """
+        for i, bvh_filename in enumerate(bvh_filenames):
+            print(f"BVH file {i + 1}/{len(bvh_filenames)}: {bvh_filename}")
+
+        if BVHService.create_bvhs(bvh_filenames, project_id):
+            print("BVH files saved successfully.")
+            ProjectService.update_project_status(project_name, user_id, False)
+            return True
+
+        return False
+
+    def process_job(self, job_id):
+        """
+        Runs a queued processing job. Called inside a job queue worker.
+        :param job_id: ID of the ProcessingJob to run
+        :return: True if the job completed, False otherwise
+        """
+        job = ProcessingJob.get_by_id(job_id)
+        if not job:
+            print(f"Job {job_id} not found")
+            return False
+
+        project = Project.get_project_by_id(job.project_id)
+        if not project:
+            VideoUtils.delete_video(job.video_path)
+            job.update(status="failed", stage="failed", message="Project not found", finished_at=datetime.datetime.utcnow())
+            return False
+
+        job.update(status="processing", stage="starting", started_at=datetime.datetime.utcnow())
+
+        try:
+            bvh_filenames, message = self.process_video(
+                job.video_path, job.x_sensitivity, job.y_sensitivity, JobProgressReporter(job),
+                lambda quality_report: job.update(quality_report=quality_report)
+            )
+
+            if bvh_filenames and self.save_results(project.id, project.name, job.user_id, bvh_filenames):
+                job.update(status="completed", stage="completed", progress=100, finished_at=datetime.datetime.utcnow())
+                return True
+
+            message = message or "Error processing video"
+
+        except Exception as e:
+            print(f"Error in process_job: {e}")
+            message = str(e)
+
+        finally:
+            VideoUtils.delete_video(job.video_path)
+
+        print("Job failed. Deleting project...")
+        ProjectService.delete_project(project.id, str(job.user_id))
+        job.update(status="failed", stage="failed", message=message, finished_at=datetime.datetime.utcnow())
+        return False
+
+    def get_job_status(self, job_id):
+        """
+        Returns the status, stage, progress and queue position of a processing job.
+        :return: JSON response
+        """
+        try:
+            job = JobQueueService.get_job(job_id)
+            if not job:
+                return jsonify({"success": False, "message": "Job not found"}), 404
+
+            if job["status"] == "completed":
+                bvhs = BVHService.get_bvhs_by_project_id(job["projectId"]) or []
+                job["bvh_filenames"] = [bvh["path"] for bvh in bvhs]
+
+            return jsonify({"success": True, "data": job}), 200
+        except Exception as e:
+            print(f"Error in get_job_status: {e}")
+            return jsonify({"success": False, "message": str(e)}), 500
+
+    def get_user_jobs(self, request):
+        """
+        Returns all processing jobs of a user, most recent first.
+        :return: JSON response
+        """
+        user_id = request.args.get("userId")
+        if not user_id:
+            return jsonify({"success": False, "message": "Missing userId parameter"}), 400
+
+        try:
+            return jsonify({"success": True, "data": JobQueueService.get_jobs_by_user_id(user_id)}), 200
+        except Exception as e:
+            print(f"Error in get_user_jobs: {e}")
+            return jsonify({"success": False, "message": str(e)}), 500
+
     def process_request(self, request):
         """
         Handles API requests (assuming request contains a video path).
@@ -134,10 +354,25 @@ class PoseController:
             if not project:
                 return jsonify({"success": False, "message": "Error creating project"}), 500
             
+            if JobQueueService.is_enabled():
+                job = JobQueueService.enqueue(project["id"], user_id, temp_video_path, x_sensitivity, y_sensitivity)
+                if not job:
+                    VideoUtils.delete_video(temp_video_path)
+                    ProjectService.delete_project(project["id"], user_id)
+                    return jsonify({"success": False, "message": "Error queueing video for processing"}), 500
+
+                print(f"Video queued for processing as job {job['id']}.")
+                return jsonify({"success": True, "data": {
+                    "jobId": job["id"],
+                    "projectId": project["id"],
+                    "status": job["status"],
+                    "queuePosition": job["queuePosition"],
+                }}), 202
+
             print("Project created successfully. Segmenting video...")
 
             # Segmenting and Processing Video
-            bvh_filenames, message = self.segment_people_into_separate_videos(temp_video_path, x_sensitivity, y_sensitivity)
+            bvh_filenames, message = self.process_video(temp_video_path, x_sensitivity, y_sensitivity)
             
             print("Video segmented successfully. Converting to BVH...")
 
@@ -148,13 +383,9 @@ class PoseController:
                 return jsonify({"success": False, "message": message}), 500
             
             print("BVH files created successfully. Saving to database...")
-            for i, bvh_filename in enumerate(bvh_filenames):
-                print(f"BVH file {i + 1}/{len(bvh_filenames)}: {bvh_filename}")
             
             # Creating BVH Files
-            if BVHService.create_bvhs(bvh_filenames, project["id"]):
-                print("BVH files saved successfully.")
-                ProjectService.update_project_status(project_name, user_id, False)
+            if self.save_results(project["id"], project_name, user_id, bvh_filenames):
                 return jsonify({"success": True, "data": {"bvh_filenames": bvh_filenames, "projectId": project["id"]}}), 200
             
             print("Error saving BVH files. Deleting project...")
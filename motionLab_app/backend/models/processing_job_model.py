@@ -0,0 +1,114 @@
+from database import db
+
+class ProcessingJob(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    project_id = db.Column(db.Integer, db.ForeignKey("project.id"), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+    status = db.Column(db.String(20), default="queued")  # queued, processing, completed, failed
+    stage = db.Column(db.String(50), default="queued")
+    progress = db.Column(db.Float, default=0)
+    message = db.Column(db.String(255), nullable=True)
+    video_path = db.Column(db.String(255), nullable=False)
+    x_sensitivity = db.Column(db.Float, nullable=False)
+    y_sensitivity = db.Column(db.Float, nullable=False)
+    creation_date = db.Column(db.DateTime, server_default=db.func.now())
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    owner = db.Column(db.String(128), nullable=True)  # Server process whose worker pool runs the job
+    # Occlusion summary of every tracked person; scripts/add_processing_job_columns.py adds it to older databases
+    quality_report = db.Column(db.JSON, nullable=True)
+
+    @classmethod
+    def create(cls, project_id, user_id, video_path, x_sensitivity, y_sensitivity, owner=None):
+        try:
+            job = cls(
+                project_id=project_id, user_id=user_id, video_path=video_path,
+                x_sensitivity=x_sensitivity, y_sensitivity=y_sensitivity, owner=owner,
+                status="queued", stage="queued", progress=0, creation_date=db.func.now()
+            )
+            db.session.add(job)
+            db.session.commit()
+            return job
+        except Exception as e:
+            print("Error creating ProcessingJob in create / processing_job_model.py:", e)
+            db.session.rollback()
+            return None
+
+    @classmethod
+    def get_by_id(cls, job_id):
+        try:
+            return db.session.get(cls, job_id)
+        except Exception as e:
+            print("Error getting ProcessingJob by id in get_by_id / processing_job_model.py:", e)
+            return None
+
+    @classmethod
+    def get_latest_by_project_id(cls, project_id):
+        try:
+            return cls.query.filter_by(project_id=project_id).order_by(cls.id.desc()).first()
+        except Exception as e:
+            print("Error getting ProcessingJob by project id in get_latest_by_project_id / processing_job_model.py:", e)
+            return None
+
+    @classmethod
+    def get_by_user_id(cls, user_id):
+        try:
+            return cls.query.filter_by(user_id=user_id).order_by(cls.id.desc()).all()
+        except Exception as e:
+            print("Error getting ProcessingJobs by user id in get_by_user_id / processing_job_model.py:", e)
+            return []
+
+    @classmethod
+    def get_active(cls, limit=None):
+        try:
+            query = cls.query.filter(cls.status.in_(["queued", "processing"])).order_by(cls.id.asc())
+            if limit:
+                query = query.limit(limit)
+            return query.all()
+        except Exception as e:
+            print("Error getting active ProcessingJobs in get_active / processing_job_model.py:", e)
+            return []
+
+    def get_queue_position(self):
+        """Number of queued jobs ahead of this one; 0 once the job has started."""
+        try:
+            if self.status != "queued":
+                return 0
+            return ProcessingJob.query.filter(
+                ProcessingJob.status == "queued", ProcessingJob.id < self.id
+            ).count() + 1
+        except Exception as e:
+            print("Error getting queue position in get_queue_position / processing_job_model.py:", e)
+            return None
+
+    def update(self, **fields):
+        try:
+            for key, value in fields.items():
+                setattr(self, key, value)
+            db.session.add(self)
+            db.session.commit()
+            return self
+        except Exception as e:
+            print("Error updating ProcessingJob in update / processing_job_model.py:", e)
+            db.session.rollback()
+            return None
+
+    def to_dict(self):
+        try:
+            return {
+                "id": self.id,
+                "projectId": self.project_id,
+                "userId": self.user_id,
+                "status": self.status,
+                "stage": self.stage,
+                "progress": round(self.progress or 0, 1),
+                "message": self.message,
+                "queuePosition": self.get_queue_position(),
+                "creation_date": self.creation_date.isoformat() if self.creation_date else None,
+                "started_at": self.started_at.isoformat() if self.started_at else None,
+                "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+                "qualityReport": self.quality_report,
+            }
+        except Exception as e:
+            print("Error converting ProcessingJob to dict in to_dict / processing_job_model.py:", e)
+            return None
@@ -75,6 +75,12 @@ def system_metrics_route(user_id):
     return AdminController.get_system_metrics(time_range)
 
 
+@admin_bp.route("/model-metrics", methods=["GET"])
+@requires_admin
+def model_metrics_route(user_id):
+    return AdminController.get_model_metrics()
+
+
 @admin_bp.route("/logs", methods=["GET"])
 @requires_admin
 def logs_route(user_id):
@@ -8,3 +8,11 @@ pose_controller = PoseController()  # Create a single instance of PoseController
 @pose_bp.route("/process-video", methods=["POST"])
 def process_video_route():
     return pose_controller.process_request(request)
+
+@pose_bp.route("/jobs/<int:job_id>", methods=["GET"])
+def job_status_route(job_id):
+    return pose_controller.get_job_status(job_id)
+
+@pose_bp.route("/jobs", methods=["GET"])
+def user_jobs_route():
+    return pose_controller.get_user_jobs(request)
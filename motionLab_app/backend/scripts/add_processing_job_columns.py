@@ -0,0 +1,61 @@
+"""
+Script to add the columns that were added to ProcessingJob (e.g. quality_report) to an
+existing processing_job table, without touching any data. It builds its own minimal
+Flask app instead of importing app.py, so the server's startup, such as the recovery of
+interrupted jobs, does not run. Running it again does nothing.
+Run this from the backend directory with: 
+python scripts/add_processing_job_columns.py
+"""
+
+import sys
+import os
+
+# Add the parent directory to the path so we can import from the application
+sys.path.insert(0, os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask
+from sqlalchemy import inspect, text
+
+from database import SQLALCHEMY_CONFIG, db
+from models.processing_job_model import ProcessingJob
+
+
+def add_processing_job_columns():
+    """Add every nullable ProcessingJob column that the processing_job table is missing"""
+    app = Flask(__name__)
+    app.config.update(SQLALCHEMY_CONFIG)
+    db.init_app(app)
+
+    with app.app_context():
+        table = ProcessingJob.__table__
+        inspector = inspect(db.engine)
+        if not inspector.has_table(table.name):
+            print(f"{table.name} does not exist yet; the app creates it with every column.")
+            return True
+
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        missing = [column for column in table.columns if column.name not in existing]
+        if not missing:
+            print(f"{table.name} is up to date.")
+            return True
+
+        for column in missing:
+            if not column.nullable:
+                print(f"Cannot add {table.name}.{column.name}: it is not nullable.")
+                return False
+
+        with db.engine.begin() as connection:
+            for column in missing:
+                print(f"Adding {table.name}.{column.name}...")
+                column_type = column.type.compile(dialect=db.engine.dialect)
+                connection.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+
+        print("Columns added successfully!")
+        return True
+
+
+if __name__ == '__main__':
+    if not add_processing_job_columns():
+        print("Failed to add the processing_job columns.")
+        sys.exit(1)
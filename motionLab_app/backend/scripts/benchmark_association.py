@@ -0,0 +1,115 @@
+"""
+Benchmark of the TrackingService association engines on crowds of synthetic people: every
+person walks across a 1920x1080 frame, bouncing off the edges so paths cross, with keypoint
+noise, hidden keypoints, missed detections, occlusions lasting several frames and the
+detections shuffled every frame.
+Reports the tracking time per frame and the ID switches of the greedy centroid matcher, the
+Hungarian IoU/OKS/centroid matcher on the last detections, and the Hungarian matcher on the
+Kalman prediction of every track.
+Run this from the backend directory with:
+python scripts/benchmark_association.py [--people 50 100 200] [--frames 300] [--occlusion 0.01]
+"""
+
+import sys
+import os
+import argparse
+import time
+
+import numpy as np
+
+# Add the parent directory to the path so we can import from the application
+sys.path.insert(0, os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '..')))
+
+from services.tracking_service import TrackingService
+from utils import GreedyCentroidAssociation, HungarianAssociation
+
+FRAME_WIDTH, FRAME_HEIGHT = 1920, 1080
+
+# Standing pose of the 33 MediaPipe landmarks as (x, y) offsets from the mid-hip, in body heights
+SKELETON = np.array([
+    [0.0, -0.45], [-0.02, -0.47], [-0.03, -0.47], [-0.04, -0.47], [0.02, -0.47], [0.03, -0.47],
+    [0.04, -0.47], [-0.06, -0.46], [0.06, -0.46], [-0.02, -0.43], [0.02, -0.43],
+    [-0.1, -0.35], [0.1, -0.35], [-0.13, -0.18], [0.13, -0.18], [-0.14, -0.02], [0.14, -0.02],
+    [-0.15, 0.01], [0.15, 0.01], [-0.14, 0.02], [0.14, 0.02], [-0.13, 0.0], [0.13, 0.0],
+    [-0.06, 0.0], [0.06, 0.0], [-0.07, 0.25], [0.07, 0.25], [-0.07, 0.5], [0.07, 0.5],
+    [-0.08, 0.52], [0.08, 0.52], [-0.05, 0.54], [0.05, 0.54],
+])
+
+
+def simulate(n_people, n_frames, occlusion=0.01, seed=0):
+    """Per frame, the shuffled detections as (person, (33, 4) normalized landmarks) pairs"""
+    rng = np.random.default_rng(seed)
+    heights = rng.uniform(80, 160, n_people)
+    positions = np.column_stack([rng.uniform(0, FRAME_WIDTH, n_people), rng.uniform(0, FRAME_HEIGHT, n_people)])
+    velocities = rng.normal(scale=4.0, size=(n_people, 2))
+    size = np.array([FRAME_WIDTH, FRAME_HEIGHT])
+    hidden_until = np.zeros(n_people, dtype=int)
+
+    frames = []
+    for frame_index in range(n_frames):
+        positions += velocities
+        bounced = (positions < 0) | (positions > size)
+        velocities[bounced] *= -1
+        positions = np.clip(positions, 0, size)
+
+        points = positions[:, None] + SKELETON[None] * heights[:, None, None]
+        points += rng.normal(scale=0.01, size=points.shape) * heights[:, None, None]
+        landmarks = np.zeros((n_people, 33, 4))
+        landmarks[:, :, :2] = points / size
+        landmarks[:, :, 3] = np.where(rng.random((n_people, 33)) < 0.15, 0.1, 0.9)
+
+        # Every frame some people walk behind something for 5 to 25 frames
+        occluded = (hidden_until <= frame_index) & (rng.random(n_people) < occlusion)
+        hidden_until[occluded] = frame_index + rng.integers(5, 26, occluded.sum())
+        detected = np.flatnonzero((rng.random(n_people) > 0.05) & (hidden_until <= frame_index))
+        rng.shuffle(detected)
+        frames.append([(int(person), landmarks[person].astype(np.float32)) for person in detected])
+    return frames
+
+
+def run(tracking_service, frames):
+    """Tracking seconds per frame and ID switches over the clip"""
+    frame = np.empty((FRAME_HEIGHT, FRAME_WIDTH, 3), dtype=np.uint8)
+    last_ids, switches, seconds = {}, 0, 0.0
+
+    for detections in frames:
+        detections = [{'keypoints': landmarks, 'has_pose': True, 'person': person} for person, landmarks in detections]
+        start = time.perf_counter()
+        tracked = tracking_service.update(detections, frame)
+        seconds += time.perf_counter() - start
+
+        for tracked_person in tracked:
+            if tracked_person['disappeared_count'] > 0:
+                continue
+            person = tracked_person['keypoints']['person']
+            if person in last_ids and last_ids[person] != tracked_person['id']:
+                switches += 1
+            last_ids[person] = tracked_person['id']
+    return seconds / len(frames), switches
+
+
+def run_benchmark(people_counts, n_frames, occlusion):
+    print(f"\n=== Association, {n_frames} frames of {FRAME_WIDTH}x{FRAME_HEIGHT}, occlusion rate {occlusion} ===")
+    print(f"{'people':>7} {'matcher':>10} {'ms/frame':>9} {'ID switches':>12}")
+    for n_people in people_counts:
+        frames = simulate(n_people, n_frames, occlusion)
+        trackers = [
+            ("greedy", TrackingService(GreedyCentroidAssociation(), predict_motion=False)),
+            ("hungarian", TrackingService(HungarianAssociation(), predict_motion=False)),
+            ("kalman", TrackingService(HungarianAssociation(), predict_motion=True)),
+        ]
+        for name, tracking_service in trackers:
+            seconds, switches = run(tracking_service, frames)
+            print(f"{n_people:>7} {name:>10} {seconds * 1000:9.2f} {switches:>12}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--people', type=int, nargs='+', default=[50, 100, 200], help='Crowd sizes to compare')
+    parser.add_argument('--frames', type=int, default=300, help='Length of the simulated clip')
+    parser.add_argument('--occlusion', type=float, default=0.01,
+                        help='Chance per frame that a visible person starts an occlusion')
+    args = parser.parse_args()
+
+    run_benchmark(args.people, args.frames, args.occlusion)
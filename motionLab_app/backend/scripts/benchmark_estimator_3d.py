@@ -0,0 +1,105 @@
+"""
+Benchmark of the Estimator3D throughput tiers: test-time flip on/off and
+float32 / bfloat16 / int8 inference. Reports latency, frames per second and the
+MPJPE drift of every mode against the float32 + flip baseline.
+Run this from the backend directory with:
+python scripts/benchmark_estimator_3d.py [--frames N] [--threads N] [--poses poses_2d.npy]
+"""
+
+import sys
+import os
+import argparse
+import time
+
+import numpy as np
+import torch
+import yaml
+from easydict import EasyDict
+
+# Add the parent directory to the path so we can import from the application
+sys.path.insert(0, os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.pose_estimator_3d.estimator_3d import Estimator3D
+from utils.pose_estimator_3d.model.video_pose import VideoPose
+
+UTILS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'utils'))
+CONFIG_FILE = os.path.join(UTILS_DIR, 'video_pose.yaml')
+CHECKPOINT_FILE = os.path.join(UTILS_DIR, 'best_58.58.pth')
+
+
+def load_estimator(num_threads):
+    """Loads the real checkpoint, or a randomly initialised model when it is missing"""
+    if os.path.exists(CHECKPOINT_FILE):
+        return Estimator3D(CONFIG_FILE, CHECKPOINT_FILE, test_flip=True, precision='float32',
+                           num_threads=num_threads), True
+
+    print(f"Checkpoint not found at {CHECKPOINT_FILE}, using random weights. "
+          "Latency is representative, MPJPE drift is not.")
+    with open(CONFIG_FILE) as f:
+        cfg = EasyDict(yaml.load(f, Loader=yaml.Loader))
+    torch.manual_seed(0)
+    model = VideoPose(
+        in_joint=cfg.DATASET.IN_JOINT,
+        in_channel=cfg.DATASET.IN_CHANNEL,
+        out_joint=cfg.DATASET.OUT_JOINT,
+        out_channel=cfg.DATASET.OUT_CHANNEL,
+        filter_widths=cfg.MODEL.FILTER_WIDTHS,
+        hidden_size=cfg.MODEL.HIDDEN_SIZE,
+        dropout=cfg.MODEL.DROPOUT,
+        dsc=cfg.MODEL.DSC
+    )
+    model.eval().fuse_bn()  # As create_model does for the checkpoint
+    return Estimator3D.from_model(cfg, model, test_flip=True, precision='float32',
+                                  num_threads=num_threads), False
+
+
+def load_poses(path, n_frames, image_width, image_height):
+    """2D OpenPose keypoints (n_frames, 25, 2) from a .npy file, or a synthetic random walk"""
+    if path:
+        return np.load(path)[..., :2]
+
+    rng = np.random.default_rng(0)
+    base = rng.uniform([image_width * 0.3, image_height * 0.1],
+                       [image_width * 0.7, image_height * 0.9], size=(25, 2))
+    return base[None] + np.cumsum(rng.normal(scale=2.0, size=(n_frames, 25, 2)), axis=0)
+
+
+def mpjpe(poses, reference):
+    """Mean per-joint position error in mm"""
+    return float(np.linalg.norm(poses - reference, axis=-1).mean())
+
+
+def run_benchmark(n_frames, num_threads, poses_path, image_width=1280, image_height=720):
+    estimator, pretrained = load_estimator(num_threads)
+    poses_2d = load_poses(poses_path, n_frames, image_width, image_height)
+    n_frames = len(poses_2d)
+
+    modes = [(precision, test_flip) for precision in Estimator3D.PRECISIONS for test_flip in (True, False)]
+    results = {}
+    for precision, test_flip in modes:
+        estimator.get_model(precision)  # Build the bfloat16/int8 copy outside the timing
+        estimator.estimate_sequence(poses_2d[:300], image_width, image_height,
+                                    test_flip=test_flip, precision=precision)  # Warm-up
+        start = time.perf_counter()
+        poses_3d = estimator.estimate_sequence(poses_2d, image_width, image_height,
+                                               test_flip=test_flip, precision=precision)
+        results[(precision, test_flip)] = (time.perf_counter() - start, poses_3d)
+
+    baseline = results[('float32', True)][1]
+    print(f"\n=== Estimator3D benchmark, {n_frames} frames, {torch.get_num_threads()} threads, "
+          f"{'pretrained' if pretrained else 'random'} weights ===")
+    print(f"{'precision':<10} {'flip':<6} {'seconds':>9} {'frames/s':>10} {'MPJPE drift (mm)':>18}")
+    for (precision, test_flip), (seconds, poses_3d) in results.items():
+        print(f"{precision:<10} {str(test_flip):<6} {seconds:9.3f} {n_frames / seconds:10.0f} "
+              f"{mpjpe(poses_3d, baseline):18.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--frames', type=int, default=1800, help='Length of the synthetic sequence')
+    parser.add_argument('--threads', type=int, default=None, help='torch.set_num_threads value')
+    parser.add_argument('--poses', default=None, help='Optional .npy of (n_frames, 25, 2+) 2D keypoints')
+    args = parser.parse_args()
+
+    run_benchmark(args.frames, args.threads, args.poses)
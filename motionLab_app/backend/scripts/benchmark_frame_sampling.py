@@ -0,0 +1,109 @@
+"""
+Benchmark of frame-stride sampling in the single-person pipeline: runs MediaPipe Pose on
+every k-th frame, interpolates the keypoints back to the full frame rate and lifts them to
+3D as PoseProcessingService.convert_video_to_bvh does. Reports the 2D error and the 3D
+MPJPE against k=1, and the speedup of the 2D and 3D stages.
+Run this from the backend directory with:
+python scripts/benchmark_frame_sampling.py [--video clip.mp4] [--strides 1 2 3 4] [--motion-threshold T]
+"""
+
+import sys
+import os
+import argparse
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+# Add the parent directory to the path so we can import from the application
+sys.path.insert(0, os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '..')))
+
+from utils import PoseUtils, ModelRegistry
+from benchmark_estimator_3d import load_estimator, mpjpe
+
+IMAGE_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'tests', 'visualizations', 'TC_06.jpg'))
+
+
+def write_synthetic_clip(path, n_frames, fps=60, width=640, height=360):
+    """A person photo swaying across a blank canvas, standing in for a 60 fps phone clip"""
+    person = cv2.imread(IMAGE_PATH)
+    if person is None:
+        raise FileNotFoundError(f"Test image not found at: {IMAGE_PATH}; pass --video instead")
+    person = person[:, person.shape[1] // 4:person.shape[1] * 3 // 4]
+    person = cv2.resize(person, (height * person.shape[1] // person.shape[0], height))
+
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), fps, (width, height))
+    for i in range(n_frames):
+        canvas = np.full((height, width, 3), 40, dtype=np.uint8)
+        x = int((width - person.shape[1]) / 2 * (1 + np.sin(2 * np.pi * i / (2 * fps))))
+        canvas[:, x:x + person.shape[1]] = person
+        writer.write(canvas)
+    writer.release()
+
+
+def extract(video_path, stride, motion_threshold):
+    """2D keypoints at the full frame rate and the seconds spent on detection"""
+    cap = cv2.VideoCapture(video_path)
+    img_width, img_height = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    pose_model = ModelRegistry.acquire_pose_model()
+    try:
+        start = time.perf_counter()
+        track = PoseUtils.get_keypoints_list(cap, pose_model, img_width, img_height, stride, motion_threshold)
+        seconds = time.perf_counter() - start
+    finally:
+        ModelRegistry.release_pose_model(pose_model)
+        cap.release()
+
+    detected = len(track)
+    track = track.interpolate(np.arange(track.frame_indices[-1] + 1))
+    return track, detected, seconds, img_width, img_height
+
+
+def run_benchmark(video_path, strides, motion_threshold):
+    estimator, pretrained = load_estimator(None)
+
+    modes = [(stride, None) for stride in strides]
+    if motion_threshold is not None:
+        modes += [(stride, motion_threshold) for stride in strides if stride > 1]
+
+    results = {}
+    for stride, threshold in modes:
+        track, detected, seconds_2d, img_width, img_height = extract(video_path, stride, threshold)
+        start = time.perf_counter()
+        poses_3d = PoseUtils.estimate_3d_from_2d(track.keypoints, estimator, img_width, img_height)
+        results[(stride, threshold)] = (track, detected, seconds_2d, time.perf_counter() - start, poses_3d)
+
+    reference_track, _, reference_2d, reference_3d, reference_poses = results[(1, None)]
+    n_frames = len(reference_track)
+    both_valid = reference_track.valid.copy()
+    print(f"\n=== Frame sampling, {n_frames} frames, {reference_track.valid.mean():.0%} detected at k=1, "
+          f"{'pretrained' if pretrained else 'random'} 3D weights ===")
+    print(f"{'k':>3} {'motion':>7} {'detected':>9} {'2D s':>7} {'3D s':>6} {'speedup':>8} "
+          f"{'2D error (px)':>14} {'MPJPE (mm)':>11}")
+    for (stride, threshold), (track, detected, seconds_2d, seconds_3d, poses_3d) in results.items():
+        valid = both_valid & track.valid
+        error_2d = np.linalg.norm(track.keypoints[valid, :, :2] - reference_track.keypoints[valid, :, :2], axis=-1).mean()
+        speedup = (reference_2d + reference_3d) / (seconds_2d + seconds_3d)
+        print(f"{stride:>3} {'-' if threshold is None else threshold:>7} {detected:>9} {seconds_2d:7.2f} "
+              f"{seconds_3d:6.2f} {speedup:7.2f}x {error_2d:14.2f} {mpjpe(poses_3d[valid], reference_poses[valid]):11.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--video', default=None, help='Clip to process; defaults to a synthetic 60 fps clip')
+    parser.add_argument('--frames', type=int, default=240, help='Length of the synthetic clip')
+    parser.add_argument('--strides', type=int, nargs='+', default=[1, 2, 3, 4], help='Strides to compare')
+    parser.add_argument('--motion-threshold', type=float, default=None,
+                        help='Also run motion-triggered sampling with this threshold and each stride > 1')
+    args = parser.parse_args()
+
+    strides = sorted(set(args.strides) | {1})
+    if args.video:
+        run_benchmark(args.video, strides, args.motion_threshold)
+    else:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            clip_path = os.path.join(tmp_dir, 'clip.avi')
+            write_synthetic_clip(clip_path, args.frames)
+            run_benchmark(clip_path, strides, args.motion_threshold)
@@ -0,0 +1,113 @@
+"""
+Per-frame microbenchmark of the MediaPipe landmark conversion: the attribute-by-attribute
+loops that PoseUtils.process_frame and PoseService used before, against
+PoseUtils.landmarks_to_array + landmarks_to_openpose. Also checks the outputs are identical.
+Run this from the backend directory with:
+python scripts/benchmark_landmark_conversion.py [--frames N]
+"""
+
+import sys
+import os
+import argparse
+import timeit
+
+import numpy as np
+from mediapipe.framework.formats import landmark_pb2
+
+# Add the parent directory to the path so we can import from the application
+sys.path.insert(0, os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.pose_utils import PoseUtils
+
+
+def make_landmarks(rng, landmark_type):
+    """A landmark list message like MediaPipe Pose returns, with visibility and presence set"""
+    landmark_list = landmark_type()
+    for x, y, z, visibility, presence in rng.random((33, 5)):
+        landmark_list.landmark.add(x=x, y=y, z=z, visibility=visibility, presence=presence)
+    return landmark_list
+
+
+def legacy_openpose(landmark_list, world_landmark_list, img_width, img_height):
+    """The per-joint loop process_frame used to run"""
+    landmarks, world_landmarks = landmark_list.landmark, world_landmark_list.landmark
+    keypoints = np.zeros((25, 3))
+    pose_world_keypoints = np.zeros((25, 3))
+    for mp_idx, openpose_idx in PoseUtils.mediapipe_to_openpose.items():
+        landmark = landmarks[mp_idx]
+        world_landmark = world_landmarks[mp_idx]
+        keypoints[openpose_idx] = [landmark.x * img_width, landmark.y * img_height, 1.0]
+        pose_world_keypoints[openpose_idx] = [world_landmark.x, world_landmark.y, world_landmark.z]
+
+    for openpose_idx, (first, second) in ((1, (11, 12)), (8, (23, 24))):
+        joint = PoseUtils.interpolate_joint(landmarks[first], landmarks[second])
+        keypoints[openpose_idx] = [joint[0] * img_width, joint[1] * img_height, 1.0]
+        pose_world_keypoints[openpose_idx] = PoseUtils.interpolate_joint(world_landmarks[first], world_landmarks[second])
+
+    keypoints[21], keypoints[24] = keypoints[14], keypoints[11]
+    pose_world_keypoints[21], pose_world_keypoints[24] = pose_world_keypoints[14], pose_world_keypoints[11]
+    return keypoints, pose_world_keypoints
+
+
+def vectorized_openpose(landmarks, world_landmarks, img_width, img_height):
+    """What process_frame does now"""
+    keypoints = np.zeros((25, 3))
+    openpose = PoseUtils.landmarks_to_openpose(PoseUtils.landmarks_to_array(landmarks))
+    keypoints[:, :2] = openpose[:, :2] * (img_width, img_height)
+    keypoints[:, 2] = 1.0
+    pose_world_keypoints = PoseUtils.landmarks_to_openpose(PoseUtils.landmarks_to_array(world_landmarks))[:, :3]
+    return keypoints, pose_world_keypoints
+
+
+def legacy_array(landmark_list):
+    """The per-attribute copy PoseService used to run"""
+    keypoints = np.zeros((33, 4), dtype=np.float32)
+    for idx, landmark in enumerate(landmark_list.landmark):
+        keypoints[idx, 0] = landmark.x
+        keypoints[idx, 1] = landmark.y
+        keypoints[idx, 2] = landmark.z
+        keypoints[idx, 3] = landmark.visibility
+    return keypoints
+
+
+def vectorized_array(landmarks):
+    return PoseUtils.landmarks_to_array(landmarks).astype(np.float32)
+
+
+def run_benchmark(n_frames, img_width=1280, img_height=720):
+    rng = np.random.default_rng(0)
+    frames = [
+        (make_landmarks(rng, landmark_pb2.NormalizedLandmarkList), make_landmarks(rng, landmark_pb2.LandmarkList))
+        for _ in range(n_frames)
+    ]
+
+    for landmarks, world_landmarks in frames:
+        for expected, result in zip(legacy_openpose(landmarks, world_landmarks, img_width, img_height),
+                                    vectorized_openpose(landmarks, world_landmarks, img_width, img_height)):
+            assert np.array_equal(expected, result), "OpenPose conversion differs"
+        assert np.array_equal(legacy_array(landmarks), vectorized_array(landmarks)), "(33, 4) conversion differs"
+
+    cases = [
+        ("process_frame -> OpenPose 25", legacy_openpose, vectorized_openpose, True),
+        ("PoseService -> (33, 4)", legacy_array, vectorized_array, False),
+    ]
+    print(f"\n=== Landmark conversion, {n_frames} frames, outputs identical ===")
+    print(f"{'conversion':<30} {'legacy us/frame':>16} {'vectorized us/frame':>20} {'speedup':>8}")
+    for name, legacy, vectorized, openpose in cases:
+        timings = []
+        for convert in (legacy, vectorized):
+            if openpose:
+                run = lambda: [convert(lm, world, img_width, img_height) for lm, world in frames]
+            else:
+                run = lambda: [convert(lm) for lm, _ in frames]
+            timings.append(min(timeit.repeat(run, number=1, repeat=5)) / n_frames * 1e6)
+        print(f"{name:<30} {timings[0]:16.1f} {timings[1]:20.1f} {timings[0] / timings[1]:7.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--frames', type=int, default=2000, help='Number of synthetic frames')
+    args = parser.parse_args()
+
+    run_benchmark(args.frames)
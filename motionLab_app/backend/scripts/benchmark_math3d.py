@@ -0,0 +1,86 @@
+"""
+Micro-benchmark of the batched math3d primitives against the scalar ones.
+Run this from the backend directory with:
+python scripts/benchmark_math3d.py [n_frames]
+"""
+
+import sys
+import os
+import time
+
+import numpy as np
+
+# Add the parent directory to the path so we can import from the application
+sys.path.insert(0, os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.bvh_skeleton import math3d, cmu_skeleton, h36m_skeleton
+
+
+def time_call(func, repeat=3):
+    """Best wall time of func over a few runs, in seconds"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def report(name, scalar_seconds, batched_seconds):
+    speedup = scalar_seconds / batched_seconds if batched_seconds else float('inf')
+    print(f"{name:<28} scalar {scalar_seconds * 1000:10.2f} ms   "
+          f"batched {batched_seconds * 1000:8.2f} ms   x{speedup:.0f}")
+
+
+def run_benchmark(n_frames):
+    rng = np.random.default_rng(0)
+    x_dirs = rng.normal(size=(n_frames, 3))
+    z_dirs = rng.normal(size=(n_frames, 3))
+    dcms = math3d.dcm_from_axis_batch(x_dirs, None, z_dirs, 'zyx')
+    quats = math3d.dcm2quat_batch(dcms)
+    parents = quats[::-1].copy()
+
+    print(f"=== math3d benchmark, {n_frames} frames ===")
+    report(
+        "dcm_from_axis",
+        time_call(lambda: [math3d.dcm_from_axis(x, None, z, 'zyx') for x, z in zip(x_dirs, z_dirs)]),
+        time_call(lambda: math3d.dcm_from_axis_batch(x_dirs, None, z_dirs, 'zyx')),
+    )
+    report(
+        "dcm2quat",
+        time_call(lambda: [math3d.dcm2quat(dcm) for dcm in dcms]),
+        time_call(lambda: math3d.dcm2quat_batch(dcms)),
+    )
+    report(
+        "quat_divide",
+        time_call(lambda: [math3d.quat_divide(q, r) for q, r in zip(quats, parents)]),
+        time_call(lambda: math3d.quat_divide(quats, parents)),
+    )
+    for order in ['zyx', 'zxy', 'xzy']:
+        report(
+            f"quat2euler ({order})",
+            time_call(lambda: [math3d.quat2euler(q, order) for q in quats]),
+            time_call(lambda: math3d.quat2euler(quats, order)),
+        )
+
+    for skeleton_class in [cmu_skeleton.CMUSkeleton, h36m_skeleton.H36mSkeleton]:
+        poses_3d = rng.normal(size=(n_frames, 17, 3))
+        skeleton = skeleton_class()
+        skeleton.root_positions = rng.uniform(size=(n_frames, 3)).tolist()
+        skeleton.x_sensitivity = skeleton.y_sensitivity = 1
+        header = skeleton.get_bvh_header(poses_3d)
+
+        def scalar():
+            skeleton.counter = -1
+            return [skeleton.pose2euler(pose, header) for pose in poses_3d]
+
+        def batched():
+            skeleton.counter = -1
+            return skeleton.poses2euler(poses_3d, header)
+
+        report(f"{skeleton_class.__name__}", time_call(scalar, repeat=1), time_call(batched))
+
+
+if __name__ == "__main__":
+    run_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 3600)
@@ -0,0 +1,60 @@
+"""
+Benchmark of the occlusion check over a whole clip: check_occlusion called on every frame,
+against one ErrorHandlingService.analyze_sequence call and the quality report built from it.
+Run this from the backend directory with:
+python scripts/benchmark_occlusion.py [--frames 300 1800 9000]
+"""
+
+import sys
+import os
+import argparse
+import time
+
+import numpy as np
+
+# Add the parent directory to the path so we can import from the application
+sys.path.insert(0, os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '..')))
+
+from services.error_handling_service import ErrorHandlingService
+
+
+def make_clip(n_frames, seed=0):
+    """Landmarks, detection mask and confidence of a clip with visibility around the threshold"""
+    rng = np.random.default_rng(seed)
+    landmarks = rng.uniform(0, 1, (n_frames, 33, 4)).astype(np.float32)
+    landmarks[..., 3] = rng.uniform(0.2, 1.0, (n_frames, 33)) ** rng.uniform(0.3, 2.0, (n_frames, 1))
+    return landmarks, rng.random(n_frames) > 0.05, rng.uniform(0.3, 1.0, n_frames)
+
+
+def run_benchmark(frame_counts):
+    error_service = ErrorHandlingService()
+    print(f"{'frames':>7} {'per-frame ms':>13} {'batched ms':>11} {'report ms':>10} {'speedup':>8}")
+    for n_frames in frame_counts:
+        landmarks, valid, confidence = make_clip(n_frames)
+
+        start = time.perf_counter()
+        for frame in range(n_frames):
+            error_service.check_occlusion({
+                'has_pose': bool(valid[frame]), 'keypoints': landmarks[frame], 'confidence': confidence[frame]
+            })
+        per_frame = time.perf_counter() - start
+
+        start = time.perf_counter()
+        error_service.analyze_sequence(landmarks, valid, confidence)
+        batched = time.perf_counter() - start
+
+        start = time.perf_counter()
+        error_service.quality_report(landmarks, valid, confidence)
+        report = time.perf_counter() - start
+
+        print(f"{n_frames:>7} {per_frame * 1000:13.1f} {batched * 1000:11.2f} {report * 1000:10.2f} "
+              f"{per_frame / batched:7.0f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--frames', type=int, nargs='+', default=[300, 1800, 9000], help='Clip lengths to compare')
+    args = parser.parse_args()
+
+    run_benchmark(args.frames)
@@ -0,0 +1,122 @@
+"""
+Script to export the VideoPose3D model to a frozen TorchScript module or an ONNX graph,
+together with a .json sidecar holding the config values inference needs.
+The artifact is loaded by ExportedEstimator3D (POSE_3D_BACKEND=torchscript|onnx).
+ONNX export and inference additionally need the onnx and onnxruntime packages.
+Run this from the backend directory with:
+python scripts/export_pose_model.py [--format torchscript|onnx] [--output utils/video_pose.pt]
+"""
+
+import sys
+import os
+import argparse
+import json
+
+import torch
+import yaml
+from easydict import EasyDict
+
+# Add the parent directory to the path so we can import from the application
+sys.path.insert(0, os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.pose_estimator_3d.model.factory import create_model
+
+UTILS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'utils'))
+
+
+class SequenceModel(torch.nn.Module):
+    """Exposes TemporalModel.forward_sequence as forward, which is what gets exported"""
+
+    def __init__(self, temporal_model):
+        super().__init__()
+        self.temporal_model = temporal_model
+
+    def forward(self, input_pose):
+        return self.temporal_model.forward_sequence(input_pose)
+
+
+def load_config(config_file):
+    with open(config_file) as f:
+        return EasyDict(yaml.load(f, Loader=yaml.Loader))
+
+
+def build_metadata(cfg, model, checkpoint_file):
+    """Config values Estimator3D reads at inference time"""
+    return {
+        'DATASET': {
+            key: cfg.DATASET[key] for key in (
+                'SEQ_LEN', 'IN_JOINT', 'IN_CHANNEL', 'OUT_JOINT', 'OUT_CHANNEL', 'TEST_FLIP',
+                'INPUT_LEFT_JOINTS', 'INPUT_RIGHT_JOINTS', 'OUTPUT_LEFT_JOINTS', 'OUTPUT_RIGHT_JOINTS',
+            )
+        },
+        'TRAIN': {'BATCH_SIZE': cfg.TRAIN.BATCH_SIZE},
+        'MODEL': {
+            'NAME': cfg.MODEL.NAME,
+            'RECEPTIVE_FIELD': model.receptive_field(),
+            'CHECKPOINT': os.path.basename(checkpoint_file),
+        },
+    }
+
+
+def export_model(config_file, checkpoint_file, output_file, export_format):
+    cfg = load_config(config_file)
+    if cfg.MODEL.NAME != 'video_pose':
+        raise ValueError(f'Only video_pose models can be exported, got "{cfg.MODEL.NAME}".')
+
+    temporal_model = create_model(cfg, checkpoint_file).eval_model.eval()
+    model = SequenceModel(temporal_model).eval()
+
+    # Two receptive fields of input, so the traced graph sees a multi-frame output
+    example = torch.randn(1, 2 * temporal_model.receptive_field(), cfg.DATASET.IN_JOINT, cfg.DATASET.IN_CHANNEL)
+
+    with torch.no_grad():
+        if export_format == 'torchscript':
+            traced = torch.jit.trace(model, example)
+            # Freezing inlines the weights; create_model has already folded the batch norms
+            frozen = torch.jit.freeze(traced)
+            torch.jit.save(frozen, output_file)
+        else:
+            try:
+                import onnx  # noqa: F401
+            except ImportError:
+                raise RuntimeError("ONNX export needs the onnx package (pip install onnx onnxruntime)")
+            torch.onnx.export(
+                model, (example,), output_file,
+                input_names=['input_pose'], output_names=['pose_3d'],
+                dynamic_axes={'input_pose': {0: 'batch', 1: 'seq_len'}, 'pose_3d': {0: 'frames'}},
+                opset_version=17, dynamo=False,
+            )
+
+        # Sanity check on a length the export was not traced with
+        check = torch.randn(1, temporal_model.receptive_field() + 17, cfg.DATASET.IN_JOINT, cfg.DATASET.IN_CHANNEL)
+        expected = model(check)
+        if export_format == 'torchscript':
+            exported = torch.jit.load(output_file)(check)
+        else:
+            import onnxruntime
+            session = onnxruntime.InferenceSession(output_file, providers=['CPUExecutionProvider'])
+            exported = torch.from_numpy(session.run(None, {'input_pose': check.numpy()})[0])
+        max_error = (exported - expected).abs().max().item()
+
+    metadata_file = os.path.splitext(output_file)[0] + '.json'
+    with open(metadata_file, 'w') as f:
+        json.dump(build_metadata(cfg, temporal_model, checkpoint_file), f, indent=2)
+
+    print(f"Exported {export_format} model to {output_file} (metadata: {metadata_file})")
+    print(f"Max difference against the PyTorch model: {max_error:.2e}")
+    return output_file
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--format', choices=['torchscript', 'onnx'], default='torchscript')
+    parser.add_argument('--config', default=os.path.join(UTILS_DIR, 'video_pose.yaml'))
+    parser.add_argument('--checkpoint', default=os.path.join(UTILS_DIR, 'best_58.58.pth'))
+    parser.add_argument('--output', default=None, help='Defaults to utils/video_pose.pt or utils/video_pose.onnx')
+    args = parser.parse_args()
+
+    output = args.output or os.path.join(
+        UTILS_DIR, 'video_pose.pt' if args.format == 'torchscript' else 'video_pose.onnx'
+    )
+    export_model(args.config, args.checkpoint, output, args.format)
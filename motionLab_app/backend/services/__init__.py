@@ -5,4 +5,7 @@ from services.user_service import UserService
 from services.project_service import ProjectService
 from services.bvh_service import BVHService
 from services.avatar_service import AvatarService
-from services.retarget_avatar_service import RetargetedAvatarService
\ No newline at end of file
+from services.retarget_avatar_service import RetargetedAvatarService
+from services.job_queue_service import JobQueueService
+from services.error_handling_service import ErrorHandlingService
+from services.track_stitching_service import TrackStitchingService
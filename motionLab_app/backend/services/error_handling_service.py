@@ -3,7 +3,9 @@ Error handling service for MotionLab application.
 Handles detection and reporting of tracking errors such as occlusions.
 """
 
+import math
 import numpy as np
+from utils import PoseUtils
 
 class ErrorHandlingService:
     """Service for detecting and handling errors in motion capture process"""
@@ -13,6 +15,8 @@ class ErrorHandlingService:
         # Config for occlusion detection
         self.min_visible_keypoints = 15  # Minimum number of visible keypoints required
         self.visibility_threshold = 0.5  # Minimum visibility value for a keypoint to be considered visible
+        self.max_missing_essential = 3  # Maximum number of essential keypoints that may be hidden
+        self.min_confidence = 0.4  # Minimum pose detection confidence
         
         # Essential keypoint indices (using MediaPipe Pose landmark indices)
         # These are the most important keypoints that should be visible
@@ -42,130 +46,228 @@ class ErrorHandlingService:
         Returns:
             Dictionary with occlusion status and details
         """
-        result = {
-            'occlusion_detected': False,
-            'message': None,
-            'severity': 'info',
-            'details': {}
-        }
-        
         # If no keypoints detected at all, that's a severe occlusion
         if keypoints_data is None:
-            result['occlusion_detected'] = True
-            result['message'] = "No pose detected in frame"
-            result['severity'] = 'high'
-            result['details'] = {'reason': 'no_detection'}
-            return result
+            return self._occlusion_result("No pose detected in frame", 'high', {'reason': 'no_detection'})
+        
+        confidence = None
         
         # Using our standardized format
         if isinstance(keypoints_data, dict):
             # If pose wasn't detected, that's an occlusion
             if not keypoints_data.get('has_pose', False):
-                result['occlusion_detected'] = True
-                result['message'] = "No pose detected in frame"
-                result['severity'] = 'high'
-                result['details'] = {'reason': 'no_detection'}
-                return result
+                return self._occlusion_result("No pose detected in frame", 'high', {'reason': 'no_detection'})
                 
             # Get keypoints array
-            keypoints_array = keypoints_data.get('keypoints', np.array([]))
+            keypoints_array = np.asarray(keypoints_data.get('keypoints', np.array([])))
             
             # If no keypoints, that's an occlusion
             if len(keypoints_array) == 0:
-                result['occlusion_detected'] = True
-                result['message'] = "No keypoints detected in frame"
-                result['severity'] = 'high'
-                result['details'] = {'reason': 'no_keypoints'}
-                return result
-            
-            # Count visible keypoints (using visibility in 4th column)
-            visible_keypoints = 0
-            missing_essential = []
-            
-            for i, keypoint in enumerate(keypoints_array):
-                if keypoint[3] > self.visibility_threshold:
-                    visible_keypoints += 1
-                elif i in self.essential_keypoints:
-                    missing_essential.append(i)
-            
-            # Calculate percentage of visible keypoints
-            visibility_percentage = visible_keypoints / len(keypoints_array) * 100
-            
-            # Check if we have enough visible keypoints
-            if visible_keypoints < self.min_visible_keypoints:
-                result['occlusion_detected'] = True
-                result['message'] = f"Person partially occluded ({visibility_percentage:.1f}% visible)"
-                result['severity'] = 'medium'
-                result['details'] = {
-                    'visible_keypoints': visible_keypoints,
-                    'total_keypoints': len(keypoints_array),
-                    'visibility_percentage': visibility_percentage
-                }
-                return result
+                return self._occlusion_result("No keypoints detected in frame", 'high', {'reason': 'no_keypoints'})
             
-            # Even if we have enough total keypoints, check if essential ones are missing
-            if len(missing_essential) > 3:
-                result['occlusion_detected'] = True
-                result['message'] = f"Essential body parts occluded ({len(missing_essential)} missing)"
-                result['severity'] = 'medium'
-                result['details'] = {
-                    'missing_essential': missing_essential,
-                    'visible_keypoints': visible_keypoints,
-                    'total_keypoints': len(keypoints_array)
-                }
-                return result
-                
-            # If using our standardized format and confidence is too low
-            if keypoints_data.get('confidence', 1.0) < 0.4:
-                result['occlusion_detected'] = True
-                result['message'] = f"Low confidence in pose detection ({keypoints_data['confidence']:.2f})"
-                result['severity'] = 'medium'
-                result['details'] = {'reason': 'low_confidence'}
-                return result
+            confidence = keypoints_data.get('confidence', 1.0)
             
         # If we're still using the MediaPipe format (for backward compatibility)
         elif hasattr(keypoints_data, 'pose_landmarks') and keypoints_data.pose_landmarks:
-            landmarks = keypoints_data.pose_landmarks.landmark
+            keypoints_array = PoseUtils.landmarks_to_array(keypoints_data.pose_landmarks)
             
-            # Count visible keypoints
-            visible_keypoints = 0
-            missing_essential = []
+        else:
+            return self._occlusion_result()
+        
+        analysis = self.analyze_sequence(
+            keypoints_array[None], confidence=None if confidence is None else np.array([confidence])
+        )
+        return self._frame_result(analysis, 0)
+    
+    def analyze_sequence(self, landmarks, valid=None, confidence=None, landmark_indices=None):
+        """
+        Check a whole clip for occlusion at once, with the same rules as check_occlusion
+        
+        Args:
+            landmarks: (T, K, 4) MediaPipe landmarks with visibility in the last column,
+                e.g. KeypointTrack.landmarks
+            valid: Optional (T,) mask of the frames where a pose was detected
+            confidence: Optional (T,) pose detection confidence of every frame
+            landmark_indices: Optional landmark slots the 2D backend detects, e.g.
+                PoseUtils.coco_to_mediapipe for YOLO; the other slots are ignored and the
+                minimum of visible keypoints is scaled from the 33 MediaPipe landmarks to
+                their count
+            
+        Returns:
+            Dictionary of per-frame arrays: the (T, K) visible mask, visible keypoint counts out
+            of total_keypoints, visibility percentages, missing counts of the checked essential
+            keypoints, the reason of every occlusion ('' when there is none), severity labels
+            and the occluded mask
+        """
+        landmarks = np.asarray(landmarks)
+        n_frames, n_keypoints = landmarks.shape[:2]
+        valid = np.ones(n_frames, dtype=bool) if valid is None else np.asarray(valid, dtype=bool)
+        detected = np.ones(n_keypoints, dtype=bool)
+        min_visible_keypoints = self.min_visible_keypoints
+        if landmark_indices is not None:
+            detected[:] = False
+            detected[landmark_indices] = True
+            min_visible_keypoints = math.ceil(self.min_visible_keypoints * detected.sum() / 33)
+        total_keypoints = int(detected.sum())
+        
+        # Nothing is visible in a frame where no pose was detected
+        visible = (landmarks[..., 3] > self.visibility_threshold) & valid[:, None] & detected
+        visible_keypoints = visible.sum(axis=1)
+        visibility_percentage = visible_keypoints / max(total_keypoints, 1) * 100
+        essential = [index for index in self.essential_keypoints if index < n_keypoints and detected[index]]
+        missing_essential = (~visible[:, essential]).sum(axis=1)
+        low_confidence = (np.zeros(n_frames, dtype=bool) if confidence is None
+                          else np.asarray(confidence) < self.min_confidence)
+        
+        # The first rule a frame breaks is its reason, in the order check_occlusion tests them
+        reason = np.select(
+            [~valid, visible_keypoints < min_visible_keypoints,
+             missing_essential > self.max_missing_essential, low_confidence],
+            ['no_detection', 'partial_occlusion', 'essential_occluded', 'low_confidence'],
+            default=''
+        )
+        severity = np.select([reason == 'no_detection', reason != ''], ['high', 'medium'], default='info')
+        
+        return {
+            'visible': visible,
+            'total_keypoints': total_keypoints,
+            'essential': essential,
+            'visible_keypoints': visible_keypoints,
+            'visibility_percentage': visibility_percentage,
+            'missing_essential': missing_essential,
+            'confidence': None if confidence is None else np.asarray(confidence),
+            'reason': reason,
+            'severity': severity,
+            'occluded': reason != '',
+        }
+    
+    def occlusion_intervals(self, analysis, frame_indices=None, fps=30):
+        """
+        Summarize the runs of consecutive occluded frames of an analyzed clip
+        
+        Args:
+            analysis: Result of analyze_sequence
+            frame_indices: Optional (T,) index of every analyzed frame in the source video
+            fps: Frames per second of the video
             
-            for i, landmark in enumerate(landmarks):
-                if landmark.visibility > self.visibility_threshold:
-                    visible_keypoints += 1
-                elif i in self.essential_keypoints:
-                    missing_essential.append(i)
+        Returns:
+            List of intervals with their first and last frame, start time and duration in
+            seconds, highest severity, reasons and lowest visibility percentage
+        """
+        occluded = analysis['occluded']
+        frame_indices = np.arange(len(occluded)) if frame_indices is None else np.asarray(frame_indices)
+        edges = np.diff(occluded.astype(np.int8), prepend=0, append=0)
+        starts = np.flatnonzero(edges == 1)
+        ends = np.flatnonzero(edges == -1)
+        if not len(starts):
+            return []
+        
+        # Each reduction runs from the start of an interval to the next one; frames in
+        # between are not occluded and are masked out
+        high = np.add.reduceat(analysis['severity'] == 'high', starts) > 0
+        min_visibility = np.minimum.reduceat(np.where(occluded, analysis['visibility_percentage'], np.inf), starts)
+        
+        intervals = []
+        for start, end, is_high, visibility in zip(starts, ends, high, min_visibility):
+            first_frame, last_frame = int(frame_indices[start]), int(frame_indices[end - 1])
+            intervals.append({
+                'start_frame': first_frame,
+                'end_frame': last_frame,
+                'start_time': round(first_frame / fps, 3),
+                'duration': round((last_frame - first_frame + 1) / fps, 3),
+                'severity': 'high' if is_high else 'medium',
+                'reasons': sorted(set(analysis['reason'][start:end].tolist())),
+                'min_visibility_percentage': round(float(visibility), 1),
+            })
+        return intervals
+    
+    def quality_report(self, landmarks, valid=None, confidence=None, frame_indices=None, fps=30,
+                       landmark_indices=None):
+        """
+        Occlusion summary of a clip that can be stored with its processing job
+        
+        Args:
+            landmarks: (T, K, 4) MediaPipe landmarks, e.g. KeypointTrack.landmarks
+            valid: Optional (T,) mask of the frames where a pose was detected
+            confidence: Optional (T,) pose detection confidence of every frame
+            frame_indices: Optional (T,) index of every frame in the source video
+            fps: Frames per second of the video
+            landmark_indices: Optional landmark slots the 2D backend detects, see analyze_sequence
             
-            # Calculate percentage of visible keypoints
-            visibility_percentage = visible_keypoints / len(landmarks) * 100
+        Returns:
+            JSON-serializable dictionary with frame counts, visibility and occlusion intervals
+        """
+        analysis = self.analyze_sequence(landmarks, valid, confidence, landmark_indices)
+        n_frames = len(analysis['occluded'])
+        occluded_frames = int(analysis['occluded'].sum())
+        detected = ~(analysis['reason'] == 'no_detection')
+        
+        return {
+            'frames': n_frames,
+            'occluded_frames': occluded_frames,
+            'occluded_percentage': round(occluded_frames / n_frames * 100, 1) if n_frames else 0.0,
+            'mean_visibility_percentage': round(float(analysis['visibility_percentage'][detected].mean()), 1)
+                if detected.any() else 0.0,
+            'intervals': self.occlusion_intervals(analysis, frame_indices, fps),
+        }
+    
+    def _frame_result(self, analysis, frame):
+        """
+        Build the check_occlusion result of one frame of an analyzed clip
+        
+        Args:
+            analysis: Result of analyze_sequence
+            frame: Index of the frame in the analysis
             
-            # Check if we have enough visible keypoints
-            if visible_keypoints < self.min_visible_keypoints:
-                result['occlusion_detected'] = True
-                result['message'] = f"Person partially occluded ({visibility_percentage:.1f}% visible)"
-                result['severity'] = 'medium'
-                result['details'] = {
+        Returns:
+            Dictionary with occlusion status and details
+        """
+        reason = analysis['reason'][frame]
+        visible_keypoints = int(analysis['visible_keypoints'][frame])
+        total_keypoints = analysis['total_keypoints']
+        
+        if reason == 'no_detection':
+            return self._occlusion_result("No pose detected in frame", 'high', {'reason': 'no_detection'})
+        
+        if reason == 'partial_occlusion':
+            visibility_percentage = float(analysis['visibility_percentage'][frame])
+            return self._occlusion_result(
+                f"Person partially occluded ({visibility_percentage:.1f}% visible)", 'medium', {
                     'visible_keypoints': visible_keypoints,
-                    'total_keypoints': len(landmarks),
+                    'total_keypoints': total_keypoints,
                     'visibility_percentage': visibility_percentage
                 }
-                return result
-            
-            # Even if we have enough total keypoints, check if essential ones are missing
-            if len(missing_essential) > 3:
-                result['occlusion_detected'] = True
-                result['message'] = f"Essential body parts occluded ({len(missing_essential)} missing)"
-                result['severity'] = 'medium'
-                result['details'] = {
+            )
+        
+        if reason == 'essential_occluded':
+            missing_essential = [
+                index for index in analysis['essential'] if not analysis['visible'][frame, index]
+            ]
+            return self._occlusion_result(
+                f"Essential body parts occluded ({len(missing_essential)} missing)", 'medium', {
                     'missing_essential': missing_essential,
                     'visible_keypoints': visible_keypoints,
-                    'total_keypoints': len(landmarks)
+                    'total_keypoints': total_keypoints
                 }
-                return result
+            )
+        
+        if reason == 'low_confidence':
+            return self._occlusion_result(
+                f"Low confidence in pose detection ({analysis['confidence'][frame]:.2f})", 'medium',
+                {'reason': 'low_confidence'}
+            )
         
         # If no occlusion was detected
-        return result
+        return self._occlusion_result()
+    
+    @staticmethod
+    def _occlusion_result(message=None, severity='info', details=None):
+        return {
+            'occlusion_detected': message is not None,
+            'message': message,
+            'severity': severity,
+            'details': details or {}
+        }
     
     def report_error(self, error_type, details=None):
         """
@@ -0,0 +1,245 @@
+"""
+Job queue service for MotionLab
+
+Runs the video processing pipeline outside the Flask request thread. Jobs are
+persisted in the database (the same SQLite file the app uses), so their
+status survives worker restarts, and are executed by a pool of worker
+processes. Each worker builds its own PoseController once, warms the models up
+through the ModelRegistry and reuses them for every job it picks up.
+"""
+
+import datetime
+import multiprocessing
+import os
+import socket
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import psutil
+
+from models.processing_job_model import ProcessingJob
+from utils import VideoUtils, ModelRegistry, FrameReader
+
+# Per-process state of the pipeline workers
+_worker_app = None
+_worker_controller = None
+
+
+def _init_worker():
+    """Creates a minimal Flask app so the worker can reach the database, then loads the models."""
+    global _worker_app
+    from flask import Flask
+    from database import SQLALCHEMY_CONFIG, db
+
+    # Register every table the pipeline touches with the worker's metadata
+    import models.user_model  # noqa: F401
+    import models.project_model  # noqa: F401
+    import models.bvh_model  # noqa: F401
+
+    app = Flask(__name__)
+    app.config.update(SQLALCHEMY_CONFIG)
+    db.init_app(app)
+    _worker_app = app
+
+    if os.getenv("MODEL_WARMUP", "1") != "0":
+        try:
+            _get_worker_controller().warm_up()
+        except Exception as e:
+            # The first job retries the load and records the error on the job itself
+            print(f"Error in _init_worker: {e}")
+
+
+def _get_worker_controller():
+    global _worker_controller
+    if _worker_controller is None:
+        from controllers.pose_controller import PoseController
+        _worker_controller = PoseController()
+    return _worker_controller
+
+
+def _run_job(job_id):
+    """
+    Entry point executed inside a worker process.
+
+    Returns:
+        Tuple of the job outcome and the worker's model load and video decode metrics
+    """
+    with _worker_app.app_context():
+        completed = _get_worker_controller().process_job(job_id)
+    metrics = ModelRegistry.get_metrics()
+    metrics["video_decode"] = FrameReader.get_totals()
+    return completed, metrics
+
+
+class JobProgressReporter:
+    """Callable that records pipeline progress on a job without writing on every frame."""
+
+    def __init__(self, job, min_interval=1.0, min_step=1.0):
+        self.job = job
+        self.min_interval = min_interval
+        self.min_step = min_step
+        self._last_time = 0.0
+        self._last_progress = -1.0
+        self._last_stage = None
+
+    def __call__(self, stage, progress):
+        now = time.monotonic()
+        progress = max(0.0, min(100.0, float(progress)))
+        if (
+            stage == self._last_stage
+            and progress - self._last_progress < self.min_step
+            and now - self._last_time < self.min_interval
+        ):
+            return
+
+        self._last_time = now
+        self._last_progress = progress
+        self._last_stage = stage
+        self.job.update(stage=stage, progress=progress)
+
+
+class JobQueueService:
+    _app = None
+    _executor = None
+    _lock = threading.Lock()
+    _worker_metrics = {}
+
+    @classmethod
+    def init_app(cls, app):
+        """Initialize the service with the Flask app instance."""
+        cls._app = app
+
+        # Spawned workers re-import the main module; only the server process owns the queue
+        if multiprocessing.parent_process() is not None:
+            return
+
+        # Jobs whose server process has stopped will never finish. Jobs of live processes,
+        # e.g. the other workers of a multi-process server, are left alone.
+        with app.app_context():
+            for job in ProcessingJob.get_active():
+                if not cls.is_owner_alive(job.owner):
+                    job.update(
+                        status="failed", stage="failed", message="Server restarted before the job finished",
+                        finished_at=datetime.datetime.utcnow()
+                    )
+
+    @staticmethod
+    def get_process_owner(pid=None):
+        """
+        Identifies a server process as host:pid:start time, so a reused pid is not mistaken
+        for the process that queued a job.
+        """
+        process = psutil.Process(pid)
+        return f"{socket.gethostname()}:{process.pid}:{process.create_time():.3f}"
+
+    @classmethod
+    def is_owner_alive(cls, owner):
+        """
+        Whether the server process that queued a job is still running. Jobs without an owner
+        are treated as orphaned; processes on another host cannot be checked and count as alive.
+        """
+        if not owner:
+            return False
+
+        host, pid, _ = owner.rsplit(":", 2)
+        if host != socket.gethostname():
+            return True
+        try:
+            return cls.get_process_owner(int(pid)) == owner
+        except (psutil.NoSuchProcess, ValueError):
+            return False
+        except psutil.AccessDenied:
+            return True
+
+    @staticmethod
+    def get_worker_count():
+        """Number of pipeline worker processes; 0 runs the pipeline inside the request."""
+        try:
+            return max(0, int(os.getenv("PIPELINE_WORKERS", 1)))
+        except ValueError:
+            return 1
+
+    @classmethod
+    def is_enabled(cls):
+        return cls.get_worker_count() > 0
+
+    @classmethod
+    def _get_executor(cls):
+        with cls._lock:
+            if cls._executor is None:
+                cls._executor = ProcessPoolExecutor(
+                    max_workers=cls.get_worker_count(),
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                )
+            return cls._executor
+
+    @classmethod
+    def enqueue(cls, project_id, user_id, video_path, x_sensitivity, y_sensitivity):
+        """
+        Persists a job and hands it to the worker pool.
+
+        Returns:
+            The job as a dictionary, or None if it could not be created
+        """
+        job = ProcessingJob.create(
+            project_id, user_id, video_path, x_sensitivity, y_sensitivity, owner=cls.get_process_owner()
+        )
+        if not job:
+            return None
+
+        job_id = job.id
+        try:
+            future = cls._get_executor().submit(_run_job, job_id)
+        except BrokenProcessPool:
+            cls._executor = None
+            future = cls._get_executor().submit(_run_job, job_id)
+        future.add_done_callback(lambda f: cls._on_job_done(job_id, f))
+
+        return job.to_dict()
+
+    @classmethod
+    def _on_job_done(cls, job_id, future):
+        """
+        Keeps the worker's model metrics, and marks the job failed if its worker died
+        before it could record the outcome itself.
+        """
+        error = future.exception()
+        if error is None:
+            _, metrics = future.result()
+            cls._worker_metrics[metrics["pid"]] = metrics
+            return
+
+        print(f"Error in job {job_id}: {error}")
+        message = str(error)
+        if isinstance(error, BrokenProcessPool):
+            cls._executor = None
+            cls._worker_metrics = {}
+            message = "Worker stopped unexpectedly"
+
+        if cls._app is None:
+            return
+        with cls._app.app_context():
+            job = ProcessingJob.get_by_id(job_id)
+            if job and job.status in ("queued", "processing"):
+                VideoUtils.delete_video(job.video_path)
+                job.update(
+                    status="failed", stage="failed", message=message[:255],
+                    finished_at=datetime.datetime.utcnow()
+                )
+
+    @classmethod
+    def get_worker_metrics(cls):
+        """Model load metrics reported by each worker process after its latest job."""
+        return list(cls._worker_metrics.values())
+
+    @staticmethod
+    def get_job(job_id):
+        job = ProcessingJob.get_by_id(job_id)
+        return job.to_dict() if job else None
+
+    @staticmethod
+    def get_jobs_by_user_id(user_id):
+        return [job.to_dict() for job in ProcessingJob.get_by_user_id(user_id)]
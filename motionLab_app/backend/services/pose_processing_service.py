@@ -1,15 +1,52 @@
 import os
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import numpy as np
 from flask import jsonify
-from utils import VideoUtils, PoseUtils, BVHUtils
-import mediapipe as mp 
+from utils import VideoUtils, PoseUtils, BVHUtils, ModelRegistry, KeypointTrack
+
+
+def _init_pose_2d_worker():
+    """Builds the MediaPipe Pose graph of a 2D worker process before its first chunk."""
+    ModelRegistry.release_pose_model(ModelRegistry.acquire_pose_model())
+
 
 class PoseProcessingService:
-    def __init__(self, config_file=None, checkpoint_file=None):
-        """Initializes the service with the pose model and estimator."""
-        
-        # 2D Pose detector initialization
-        self.mp_pose = mp.solutions.pose
-        self.mp_pose_model = self.mp_pose.Pose()
+    # Shared by every instance in the process; each 2D worker keeps its own MediaPipe graph warm
+    _pose_2d_executor = None
+    _pose_2d_executor_workers = 0
+    _pose_2d_lock = threading.Lock()
+
+    # Clips shorter than this many frames per worker are not worth splitting
+    MIN_FRAMES_PER_CHUNK = 60
+
+    # Smoothing weight of a joint filled from its neighbours, next to the confidence of detected ones
+    FILLED_JOINT_WEIGHT = 0.05
+
+    def __init__(self, config_file=None, checkpoint_file=None, backend=None, artifact_file=None):
+        """
+        Resolves the estimator files. The models themselves come from the ModelRegistry,
+        which loads them on first use and keeps them warm for the process.
+
+        :param backend: "pytorch" (default), or "torchscript" / "onnx" to run an artifact written
+                        by scripts/export_pose_model.py. Defaults to POSE_3D_BACKEND.
+        :param artifact_file: Exported model path; defaults to POSE_3D_ARTIFACT, then to
+                              utils/video_pose.pt or utils/video_pose.onnx
+        """
+        self.backend = backend or os.getenv("POSE_3D_BACKEND", "pytorch")
+        if self.backend != "pytorch":
+            if artifact_file is None:
+                current_dir = os.path.dirname(os.path.abspath(__file__))
+                extension = '.onnx' if self.backend == 'onnx' else '.pt'
+                artifact_file = os.getenv(
+                    "POSE_3D_ARTIFACT", os.path.join(current_dir, '..', 'utils', 'video_pose' + extension)
+                )
+            if not os.path.exists(artifact_file):
+                raise FileNotFoundError(f"Exported model not found at: {artifact_file}")
+            self.artifact_file = artifact_file
+            return
         
         # Set default paths relative to the current file location
         if config_file is None:
@@ -25,30 +62,209 @@ class PoseProcessingService:
             raise FileNotFoundError(f"Config file not found at: {config_file}")
         if not os.path.exists(checkpoint_file):
             raise FileNotFoundError(f"Checkpoint file not found at: {checkpoint_file}")
-            
-        self.estimator_3d = PoseUtils.initialize_3D_pose_estimator(config_file, checkpoint_file)
 
-    def convert_video_to_bvh(self, temp_video_path, x_sensitivity, y_sensitivity):        
+        self.config_file = config_file
+        self.checkpoint_file = checkpoint_file
+
+    @property
+    def estimator_3d(self):
+        if self.backend != "pytorch":
+            return ModelRegistry.get_exported_estimator_3d(self.artifact_file, self.backend)
+        return ModelRegistry.get_estimator_3d(self.config_file, self.checkpoint_file)
+
+    def warm_up(self):
+        """
+        Loads the 3D estimator and a MediaPipe Pose graph ahead of the first request, and
+        starts the 2D worker processes when POSE_2D_WORKERS > 1.
+        """
+        ModelRegistry.release_pose_model(ModelRegistry.acquire_pose_model())
+
+        workers = self.get_pose_2d_workers()
+        if workers > 1:
+            executor = self._get_pose_2d_executor(workers)
+            for future in [executor.submit(os.getpid) for _ in range(workers)]:
+                future.result()
+
+        return self.estimator_3d
+
+    @staticmethod
+    def get_pose_2d_workers():
+        """Number of processes that run 2D pose extraction on one clip; 1 keeps it in this process."""
+        try:
+            return max(1, int(os.getenv("POSE_2D_WORKERS", 1)))
+        except ValueError:
+            return 1
+
+    @staticmethod
+    def get_frame_sampling():
+        """
+        2D detection sampling from POSE_FRAME_STRIDE (longest gap between processed frames,
+        default 1) and POSE_MOTION_THRESHOLD (unset, or the motion that triggers detection
+        within the stride; see PoseUtils.sample_frames).
+
+        :return: Tuple (stride, motion_threshold)
+        """
+        try:
+            stride = max(1, int(os.getenv("POSE_FRAME_STRIDE", 1)))
+        except ValueError:
+            stride = 1
+        motion_threshold = None
+        if os.getenv("POSE_MOTION_THRESHOLD"):
+            try:
+                motion_threshold = float(os.getenv("POSE_MOTION_THRESHOLD"))
+            except ValueError:
+                pass
+        return stride, motion_threshold
+
+    @staticmethod
+    def get_keypoint_cleanup():
+        """
+        2D keypoint cleanup before lifting, from POSE_GAP_FILL ("linear" by default, "spline",
+        or "none" to lift the keypoints as detected) and POSE_KEYPOINT_SMOOTHING (standard
+        deviation in seconds of the confidence-weighted smoothing, default 0 for none).
+
+        :return: Tuple (gap_fill, smoothing_seconds); gap_fill is None when disabled
+        """
+        gap_fill = os.getenv("POSE_GAP_FILL", "linear").lower()
+        if gap_fill not in ("linear", "spline"):
+            gap_fill = None
+        try:
+            smoothing_seconds = max(0.0, float(os.getenv("POSE_KEYPOINT_SMOOTHING", 0)))
+        except ValueError:
+            smoothing_seconds = 0.0
+        return gap_fill, smoothing_seconds
+
+    @classmethod
+    def _get_pose_2d_executor(cls, workers):
+        with cls._pose_2d_lock:
+            if cls._pose_2d_executor is None or cls._pose_2d_executor_workers != workers:
+                if cls._pose_2d_executor is not None:
+                    cls._pose_2d_executor.shutdown(wait=False)
+                cls._pose_2d_executor = ProcessPoolExecutor(
+                    max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_pose_2d_worker,
+                )
+                cls._pose_2d_executor_workers = workers
+            return cls._pose_2d_executor
+
+    def extract_keypoints_parallel(self, video_path, frame_count, img_width, img_height, workers,
+                                   stride=1, motion_threshold=None):
+        """
+        Splits a clip into one chunk per worker, runs MediaPipe Pose on the chunks in parallel
+        processes and stitches the results back together in frame order. Every chunk but the
+        first re-reads POSE_2D_WARMUP_FRAMES frames before its start so the Pose graph's
+        tracking state has converged by its first frame.
+
+        :param frame_count: Frame count reported by the video; the last chunk reads to the end
+        :param stride: See PoseUtils.sample_frames
+        :param motion_threshold: See PoseUtils.sample_frames
+        :return: KeypointTrack of the whole clip
+        """
+        warmup_frames = int(os.getenv("POSE_2D_WARMUP_FRAMES", 15))
+        chunks = PoseUtils.split_frame_range(frame_count, workers)
+        executor = self._get_pose_2d_executor(workers)
+        try:
+            futures = [
+                executor.submit(
+                    PoseUtils.get_keypoint_chunk, video_path, start,
+                    end if i < len(chunks) - 1 else None, img_width, img_height, warmup_frames,
+                    stride, motion_threshold
+                )
+                for i, (start, end) in enumerate(chunks)
+            ]
+            return KeypointTrack.concatenate([future.result() for future in futures])
+        except BrokenProcessPool:
+            PoseProcessingService._pose_2d_executor = None
+            raise
+
+    def convert_video_to_bvh(self, temp_video_path, x_sensitivity, y_sensitivity, stride=None, motion_threshold=None):
+        """
+        Extracts 2D keypoints from a video, lifts them to 3D and writes a BVH file.
+
+        :param stride: Run 2D detection on every stride-th frame; defaults to POSE_FRAME_STRIDE
+        :param motion_threshold: Only run it on frames that moved by more than this, with stride as
+                                 the longest gap; defaults to POSE_MOTION_THRESHOLD
+        :return: BVH filename, or None on error
+        """
+        pose_model = None
         try:
             cap = VideoUtils.open_video(temp_video_path)
             fps = VideoUtils.get_video_fps(cap)
             img_width, img_height = VideoUtils.get_video_dimensions(cap)
-            
-            keypoints, pose_world_keypoints, landmarks_list = PoseUtils.get_keypoints_list(cap, self.mp_pose_model, img_width, img_height)
-                        
-            root_keypoints = PoseUtils.get_root_keypoints(landmarks_list)
-                        
-            points_3d = PoseUtils.estimate_3d_from_2d(keypoints, self.estimator_3d, img_width, img_height)
-
-            corrected_3d_points = PoseUtils.align_and_scale_3d_pose(points_3d)
-                        
-            bvh_filename = BVHUtils.convert_3d_to_bvh(corrected_3d_points, root_keypoints, fps, x_sensitivity, y_sensitivity)
+            frame_count = VideoUtils.get_capture_frame_count(cap)
+            workers = self.get_pose_2d_workers()
+            default_stride, default_motion_threshold = self.get_frame_sampling()
+            stride = stride or default_stride
+            motion_threshold = motion_threshold if motion_threshold is not None else default_motion_threshold
+
+            if workers > 1 and frame_count >= workers * self.MIN_FRAMES_PER_CHUNK:
+                cap.release()
+                track = self.extract_keypoints_parallel(
+                    temp_video_path, frame_count, img_width, img_height, workers, stride, motion_threshold
+                )
+            else:
+                pose_model = ModelRegistry.acquire_pose_model()
+                track = PoseUtils.get_keypoints_list(cap, pose_model, img_width, img_height, stride, motion_threshold)
             
             cap.release()
+
+            # Interpolate the frames detection skipped, so the BVH keeps the source frame rate
+            if len(track) and len(track) <= track.frame_indices[-1]:
+                track = track.interpolate(np.arange(track.frame_indices[-1] + 1))
             
-            return bvh_filename
+            return self.convert_keypoints_to_bvh(track, fps, img_width, img_height, x_sensitivity, y_sensitivity)
         except Exception as e:
             print(f"Error in convert_video_to_bvh: {e}")
             return None
         finally:
+            if pose_model is not None:
+                ModelRegistry.release_pose_model(pose_model)
             VideoUtils.delete_video(temp_video_path)
+
+    def convert_keypoints_to_bvh(self, track, fps, img_width, img_height, x_sensitivity, y_sensitivity):
+        """
+        Lifts a sequence of 2D keypoints to 3D and writes it as a BVH file.
+
+        :param track: KeypointTrack of one person; its landmarks give the root trajectory
+        :param fps: Frames per second of the source video
+        :return: BVH filename
+        """
+        root_keypoints = PoseUtils.get_root_keypoints(
+            track.landmarks, track.valid, smoothing=os.getenv("ROOT_SMOOTHING") or None, fps=fps
+        )
+
+        keypoints = self.clean_keypoints(track, fps)
+                    
+        points_3d = PoseUtils.estimate_3d_from_2d(keypoints, self.estimator_3d, img_width, img_height)
+
+        corrected_3d_points = PoseUtils.align_and_scale_3d_pose(points_3d)
+                    
+        return BVHUtils.convert_3d_to_bvh(corrected_3d_points, root_keypoints, fps, x_sensitivity, y_sensitivity)
+
+    def clean_keypoints(self, track, fps):
+        """
+        Fills the joints a clip is missing and smooths it by confidence, as configured by
+        get_keypoint_cleanup(), so missed frames do not become spikes at the origin in 3D.
+
+        :param track: KeypointTrack of one person
+        :param fps: Frames per second of the source video
+        :return: (T, 25, 3) keypoints to lift; the confidence column is left as detected
+        """
+        gap_fill, smoothing_seconds = self.get_keypoint_cleanup()
+        if gap_fill is None or len(track) == 0:
+            return track.keypoints
+
+        confidence = PoseUtils.keypoint_confidence(track.landmarks, track.valid)
+        points, known, metrics = PoseUtils.fill_keypoint_gaps(track.keypoints, confidence, method=gap_fill)
+        if smoothing_seconds > 0:
+            weights = np.where(known, confidence, self.FILLED_JOINT_WEIGHT)
+            points = PoseUtils.smooth_keypoints(points, weights, fps, smoothing_seconds)
+        print(
+            f"Keypoint gaps: filled {metrics['filled_joints']} joints in {metrics['filled_frames']} of "
+            f"{metrics['frames']} frames ({metrics['missing_frames']} without a pose, "
+            f"longest gap {metrics['longest_gap']} frames)"
+        )
+
+        keypoints = track.keypoints.copy()
+        keypoints[:, :, :2] = points
+        return keypoints
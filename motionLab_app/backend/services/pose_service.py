@@ -10,6 +10,8 @@ import mediapipe as mp
 import numpy as np
 import os
 
+from utils import PoseUtils, VideoUtils
+
 class PoseService:
     """Service for pose estimation and keypoint extraction"""
     
@@ -64,18 +66,8 @@ class PoseService:
         has_pose = mp_results.pose_landmarks is not None
         
         if has_pose:
-            # Extract landmarks
-            landmarks = mp_results.pose_landmarks.landmark
-            
-            # Create a numpy array for keypoints (x, y, z, visibility)
-            keypoints = np.zeros((33, 4), dtype=np.float32)
-            
-            # Convert landmarks to numpy array
-            for idx, landmark in enumerate(landmarks):
-                keypoints[idx, 0] = landmark.x  # Normalized x
-                keypoints[idx, 1] = landmark.y  # Normalized y
-                keypoints[idx, 2] = landmark.z  # Relative z
-                keypoints[idx, 3] = landmark.visibility  # Visibility
+            # Normalized x, y, relative z and visibility of every landmark
+            keypoints = PoseUtils.landmarks_to_array(mp_results.pose_landmarks).astype(np.float32)
                 
             # Calculate overall confidence score
             confidence = self._calculate_confidence(keypoints)
@@ -122,8 +114,10 @@ class PoseService:
         Returns:
             Standardized keypoints data
         """
-        # Ensure frame is RGB for MediaPipe
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        # Ensure frame is RGB for MediaPipe; the landmarks are normalized, so a
+        # downsampled copy gives the same coordinates
+        inference_frame, _ = VideoUtils.resize_for_inference(frame)
+        rgb_frame = cv2.cvtColor(inference_frame, cv2.COLOR_BGR2RGB)
         
         # Process the frame
         mp_results = self.pose.process(rgb_frame)
@@ -266,16 +260,9 @@ class PoseService:
         # Check if we have MediaPipe world landmarks
         mp_results = keypoints_data.get('mp_results')
         if mp_results and mp_results.pose_world_landmarks:
-            # Use MediaPipe's 3D world landmarks
-            world_landmarks = mp_results.pose_world_landmarks.landmark
-            
-            # Convert to numpy array
-            world_keypoints = np.zeros((33, 4), dtype=np.float32)
-            for idx, landmark in enumerate(world_landmarks):
-                world_keypoints[idx, 0] = landmark.x  # 3D x
-                world_keypoints[idx, 1] = landmark.y  # 3D y
-                world_keypoints[idx, 2] = landmark.z  # 3D z
-                world_keypoints[idx, 3] = keypoints_data['keypoints'][idx, 3]  # Use same visibility
+            # Use MediaPipe's 3D world landmarks: x, y, z, with the same visibility as the 2D keypoints
+            world_keypoints = PoseUtils.landmarks_to_array(mp_results.pose_world_landmarks).astype(np.float32)
+            world_keypoints[:, 3] = keypoints_data['keypoints'][:, 3]
                 
             return {
                 'keypoints_3d': world_keypoints,
@@ -1,4 +1,5 @@
 from models.project_model import Project
+from models.processing_job_model import ProcessingJob
 from services.bvh_service import BVHService
 from database import db
 
@@ -41,13 +42,24 @@ class ProjectService:
         try:
             projects = Project.get_projects_by_user_id(user_id)
             if projects:
-                return [project.to_dict() for project in projects]
+                return [ProjectService._with_job_progress(project) for project in projects]
             
             return None
         except Exception as e:
             print(f"Error in get_projects_by_user_id: {e}")
             return None
         
+    @staticmethod
+    def _with_job_progress(project):
+        """Adds the stage and progress of the project's processing job to its dictionary."""
+        project_dict = project.to_dict()
+        if project.is_processing:
+            job = ProcessingJob.get_latest_by_project_id(project.id)
+            if job:
+                project_dict["processing_stage"] = job.stage
+                project_dict["processing_progress"] = round(job.progress or 0, 1)
+        return project_dict
+        
     @staticmethod
     def get_project_by_name_and_user_id(project_name, user_id):
         try:
@@ -70,6 +82,9 @@ class ProjectService:
                     return None
                 
                 if str(project_dict["user_id"]) == str(user_id):
+                    job = ProcessingJob.get_latest_by_project_id(project.id)
+                    if job and job.quality_report:
+                        project_dict["quality_report"] = job.quality_report
                     return project_dict
             
             return None
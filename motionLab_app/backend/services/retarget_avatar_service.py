@@ -6,6 +6,7 @@ import time
 from flask import current_app
 
 from models.retargeted_avatar_model import RetargetedAvatar  # Import the model at the top
+from utils.bvh_utils import BVHUtils
 
 class RetargetedAvatarService:
     # Dictionary to store cleanup timers
@@ -19,7 +20,10 @@ class RetargetedAvatarService:
 
     @staticmethod
     def retarget_bvh_to_avatar(bvh_filename: str, avatar_filename: str, project_id: str):
-        full_bvh_path = os.path.abspath(os.path.join("BVHs", bvh_filename))
+        # Blender cannot import gzip-compressed BVH files
+        full_bvh_path, is_temporary_bvh = BVHUtils.get_plain_bvh_path(
+            os.path.abspath(os.path.join("BVHs", bvh_filename))
+        )
         full_avatar_path = os.path.abspath(os.path.join("avatars", avatar_filename))
 
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -38,7 +42,11 @@ class RetargetedAvatarService:
 
         print(f"▶️ Running Blender subprocess for retargeting:\n{' '.join(cmd)}")
 
-        result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        try:
+            result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        finally:
+            if is_temporary_bvh and os.path.exists(full_bvh_path):
+                os.remove(full_bvh_path)
 
         print("Blender Output:\n", result.stdout)
         if result.returncode != 0:
@@ -1,47 +1,128 @@
 import os
 import pathlib
 import cv2
-from utils import VideoUtils, ObjectDetectionUtils
-from ultralytics import YOLO
+from utils import VideoUtils, ObjectDetectionUtils, PoseUtils, ModelRegistry, KeypointTrack
+from services.track_stitching_service import TrackStitchingService
 
 class SegmentationService:
-    def __init__(self, yolo_model_path="yolo11s-pose.pt", output_folder="output_videos"):
-        """Initializes the segmentation service with a YOLO model and output folder."""
+    # Initial KeypointTrack length per tracked person, in frames
+    TRACK_INITIAL_CAPACITY = 256
+
+    # 2D keypoint sources for the streaming pipeline
+    POSE_2D_BACKENDS = ("mediapipe", "yolo")
+
+    def __init__(self, yolo_model_path="yolo11s-pose.pt", output_folder="output_videos", pose_2d_backend=None):
+        """
+        Initializes the segmentation service with a YOLO model and output folder.
+
+        :param pose_2d_backend: "mediapipe" runs MediaPipe Pose on every tracked person; "yolo" uses
+                                the COCO keypoints the YOLO pose model already predicts, so a frame
+                                takes one network pass. Defaults to POSE_2D_BACKEND.
+        """
         self.yolo_model_path = yolo_model_path
+        self.pose_2d_backend = pose_2d_backend or os.getenv("POSE_2D_BACKEND", "mediapipe")
+        if self.pose_2d_backend not in self.POSE_2D_BACKENDS:
+            raise ValueError(f'2D pose backend "{self.pose_2d_backend}" is invalid.')
         self.output_folder = output_folder
         pathlib.Path(self.output_folder).mkdir(parents=True, exist_ok=True)  # Ensure output folder exists
-        
+
         # Determine the path to the bytetrack.yaml file
         current_dir = os.path.dirname(os.path.abspath(__file__))
         self.bytetrack_path = os.path.join(current_dir, '..', 'utils', 'bytetrack.yaml')
-        
+
         # Check if the bytetrack file exists
         if not os.path.exists(self.bytetrack_path):
             print(f"Warning: ByteTrack config not found at {self.bytetrack_path}")
             # Fallback to relative path if needed
             self.bytetrack_path = "utils/bytetrack.yaml"
 
-    def segment_video(self, video_path):
-        """Segments multiple humans from a video and returns segmented video paths."""
-        self.yolo_model = YOLO(self.yolo_model_path)
+    def track_people(self, cap, img_width, img_height, with_keypoints=False):
+        """
+        Runs YOLO tracking over every frame of an opened video.
+        Yields (frame, people, inference_frame, scale) where people is a list of (person_id, box)
+        tuples in source pixels, or (person_id, box, keypoints) with_keypoints, and inference_frame
+        is the frame downsampled by scale that YOLO ran on, for the pose model to reuse.
+        The frame is decoded ahead on a background thread and is only valid until the next
+        one is requested. The YOLO model is borrowed from the ModelRegistry for the whole video
+        and reused across videos; its tracker is reset for each one.
+        With YOLO_BATCH_SIZE > 1, YOLO runs on batches of frames and their detections are fed to
+        a ByteTrack tracker frame by frame afterwards, which gives the same track ids.
+        """
+        yolo_model = ModelRegistry.acquire_yolo(self.yolo_model_path)
+        batch_size = self.get_yolo_batch_size()
+
+        try:
+            with VideoUtils.open_frame_reader(cap) as frames:
+                if batch_size == 1:
+                    for frame in frames:
+                        inference_frame, scale = VideoUtils.resize_for_inference(frame)
+                        people = ObjectDetectionUtils.detect_people(
+                            yolo_model, inference_frame, self.bytetrack_path, img_width, img_height, scale,
+                            with_keypoints
+                        )
+                        yield frame, people, inference_frame, scale
+                    return
+
+                tracker = ObjectDetectionUtils.create_tracker(self.bytetrack_path)
+                batch = []
+                for frame in frames:
+                    # The reader reuses its buffers, so frames waiting for the batch are copied
+                    frame = frame.copy()
+                    inference_frame, scale = VideoUtils.resize_for_inference(frame)
+                    batch.append((frame, inference_frame))
+                    if len(batch) == batch_size:
+                        yield from self._track_batch(
+                            yolo_model, batch, tracker, img_width, img_height, scale, with_keypoints
+                        )
+                        batch = []
+                if batch:
+                    yield from self._track_batch(yolo_model, batch, tracker, img_width, img_height, scale, with_keypoints)
+        finally:
+            ModelRegistry.release_yolo(yolo_model)
+
+    def _track_batch(self, yolo_model, batch, tracker, img_width, img_height, scale, with_keypoints):
+        batch_people = ObjectDetectionUtils.detect_people_batch(
+            yolo_model, [inference_frame for _, inference_frame in batch], tracker,
+            img_width, img_height, scale, with_keypoints
+        )
+        for (frame, inference_frame), people in zip(batch, batch_people):
+            yield frame, people, inference_frame, scale
+
+    @staticmethod
+    def get_yolo_batch_size():
+        """Number of frames YOLO runs on per call, from YOLO_BATCH_SIZE (default 1, frame by frame)."""
+        try:
+            return max(1, int(os.getenv("YOLO_BATCH_SIZE", 1)))
+        except ValueError:
+            return 1
+
+    def segment_video(self, video_path, progress_callback=None):
+        """
+        Segments multiple humans from a video and returns segmented video paths.
+        progress_callback, if given, is called with (frames_done, total_frames).
+        """
         pathlib.Path(self.output_folder).mkdir(parents=True, exist_ok=True)  # Ensure output folder exists
 
         try:
             writers = {}
             output_video_paths = []
-            
+
             cap = VideoUtils.open_video(video_path)
             fps = VideoUtils.get_video_fps(cap)
             img_width, img_height = VideoUtils.get_video_dimensions(cap)
-            
-            while True:
-                ret, frame = cap.read()
-                if not ret:
-                    break
-                
-                cropped_people = ObjectDetectionUtils.detect_and_crop_people(
-                    self.yolo_model, frame, self.bytetrack_path, img_width, img_height
-                )
+            total_frames = VideoUtils.get_capture_frame_count(cap)
+            stitcher = TrackStitchingService(fps) if TrackStitchingService.is_enabled() else None
+
+            for frame_index, (frame, people, _, _) in enumerate(self.track_people(cap, img_width, img_height)):
+                if progress_callback:
+                    progress_callback(frame_index + 1, total_frames)
+                if stitcher:
+                    for person_id, box in people:
+                        if person_id is not None:
+                            stitcher.observe(frame_index, person_id, frame, box)
+                cropped_people = [
+                    (person_id, ObjectDetectionUtils.mask_person(frame, box)) for person_id, box in people
+                ]
                 VideoUtils.write_cropped_people(
                     writers, cropped_people, self.output_folder, fps, (img_width, img_height), output_video_paths
                 )
@@ -51,9 +132,106 @@ class SegmentationService:
                 writer.release()
 
             cv2.destroyAllWindows()
-            
+
+            # Writers and paths are created together, so they share the order of the person IDs
+            if stitcher:
+                output_video_paths = stitcher.merge_videos(
+                    dict(zip(writers, output_video_paths)), self.output_folder, fps, (img_width, img_height)
+                )
+
             return output_video_paths
-        
+
         except Exception as e:
             print(f"Error in segment_video: {e}")
             return None
+
+    def warm_up(self):
+        """Loads the YOLO model ahead of the first request and leaves it in the registry's pool."""
+        ModelRegistry.release_yolo(ModelRegistry.acquire_yolo(self.yolo_model_path))
+
+    def extract_people_keypoints(self, video_path, progress_callback=None):
+        """
+        Streams a video through YOLO tracking and per-person keypoint extraction in a
+        single decode, without writing intermediate videos. The keypoints come from
+        MediaPipe or from the YOLO pose model itself, depending on pose_2d_backend.
+
+        :param video_path: Path to the video file
+        :param progress_callback: Optional callable receiving (frames_done, total_frames)
+        :return: Tuple (people, video_info) where people maps each person id to a KeypointTrack
+                 of the frames it was tracked in, with the tracklets TrackStitchingService
+                 joins merged under their first id, and video_info holds
+                 'fps', 'width', 'height' and 'frame_count'
+        """
+        people = {}
+        pose_models = {}
+        cap = None
+
+        try:
+            cap = VideoUtils.open_video(video_path)
+            fps = VideoUtils.get_video_fps(cap)
+            img_width, img_height = VideoUtils.get_video_dimensions(cap)
+
+            if img_width == 0 or img_height == 0:
+                raise ValueError("Invalid frame dimensions: height or width is 0.")
+
+            total_frames = VideoUtils.get_capture_frame_count(cap)
+            use_yolo_keypoints = self.pose_2d_backend == "yolo"
+            stitcher = TrackStitchingService(fps) if TrackStitchingService.is_enabled() else None
+            frame_count = 0
+            for frame, detections, inference_frame, scale in self.track_people(
+                cap, img_width, img_height, with_keypoints=True
+            ):
+                frame_count += 1
+                if progress_callback:
+                    progress_callback(frame_count, total_frames)
+
+                for person_id, box, coco_keypoints in detections:
+                    if person_id is None:
+                        continue  # Skip if no ID assigned
+
+                    if stitcher:
+                        stitcher.observe(frame_count - 1, person_id, frame, box)
+
+                    if person_id not in people:
+                        # Most people are only on screen for part of the clip, so their
+                        # tracks start small and grow instead of taking the full length
+                        people[person_id] = KeypointTrack(min(total_frames, self.TRACK_INITIAL_CAPACITY))
+
+                    if use_yolo_keypoints:
+                        if coco_keypoints is None:
+                            raise ValueError(f"{self.yolo_model_path} does not predict keypoints.")
+                        people[person_id].append(
+                            PoseUtils.coco_to_openpose(coco_keypoints), None,
+                            PoseUtils.coco_to_landmarks(coco_keypoints, img_width, img_height), frame_count - 1
+                        )
+                        continue
+
+                    # Each person keeps its own Pose graph so landmark smoothing
+                    # never mixes two people, as it did with one video per person.
+                    if person_id not in pose_models:
+                        pose_models[person_id] = ModelRegistry.acquire_pose_model()
+
+                    # MediaPipe only sees a padded crop around the person, resized to POSE_CROP_SIZE
+                    keypoints, world_keypoints, landmarks = PoseUtils.process_frame(
+                        inference_frame, pose_models[person_id], img_width, img_height,
+                        box=ObjectDetectionUtils.scale_box(box, scale)
+                    )
+                    people[person_id].append(keypoints, world_keypoints, landmarks, frame_count - 1)
+
+            # Tracklets of one person that the tracker split are merged into their full timeline
+            if stitcher:
+                people = stitcher.merge_keypoint_tracks(people)
+
+            video_info = {
+                "fps": fps,
+                "width": img_width,
+                "height": img_height,
+                "frame_count": frame_count,
+            }
+            return people, video_info
+
+        finally:
+            if cap is not None:
+                cap.release()
+            for pose_model in pose_models.values():
+                ModelRegistry.release_pose_model(pose_model)
@@ -0,0 +1,234 @@
+"""
+Track stitching service for MotionLab application.
+Merges the tracklets of one person that the tracker split under several IDs.
+"""
+
+import os
+import cv2
+import numpy as np
+from datetime import datetime
+from utils import VideoUtils, KeypointTrack
+from utils.association_utils import AssociationUtils
+
+
+class TrackStitchingService:
+    """
+    Offline re-identification of fragmented tracks. While a video is tracked, every track
+    keeps a small appearance cache: the running sum of colour histograms of its upper and
+    lower body, sampled every few frames, plus its first and last frame and box. After the
+    pass, each track's end is linked to the start of a later track by an optimal assignment
+    on appearance, gated by the time gap and by how far the person could have moved.
+    """
+
+    # Hue, saturation and value bins of each body-part histogram
+    HISTOGRAM_BINS = [16, 8, 4]
+
+    # Vertical bands of the box, as fractions of its height, for the upper and lower body
+    BODY_BANDS = [(0.15, 0.5), (0.5, 0.9)]
+
+    def __init__(self, fps=30, sample_interval=5, max_gap_seconds=5.0, max_appearance_distance=0.4,
+                 max_speed=0.5):
+        """
+        Initialize the track stitching service
+
+        Args:
+            fps: Frames per second of the tracked video
+            sample_interval: Frames between two appearance samples of a track
+            max_gap_seconds: Longest time a person can be lost between two tracklets
+            max_appearance_distance: Largest Bhattacharyya distance between the colour
+                histograms of two tracklets of the same person
+            max_speed: Fastest plausible movement while lost, in frame diagonals per second
+        """
+        self.fps = fps or 30
+        self.sample_interval = sample_interval
+        self.max_gap_seconds = max_gap_seconds
+        self.max_appearance_distance = max_appearance_distance
+        self.max_speed = max_speed
+        self.tracklets = {}  # Appearance cache and extent of every track by ID
+        self.frame_diagonal = None
+
+    @staticmethod
+    def is_enabled():
+        """Track stitching runs unless TRACK_STITCHING is set to 0."""
+        return os.getenv("TRACK_STITCHING", "1") != "0"
+
+    def observe(self, frame_index, person_id, frame, box):
+        """
+        Record that a person was tracked in a frame, and sample their appearance when due
+
+        Args:
+            frame_index: Index of the frame in the video
+            person_id: Tracker ID of the person
+            frame: BGR frame at the resolution of the box
+            box: (x1, y1, x2, y2) of the person in the frame
+        """
+        if self.frame_diagonal is None:
+            self.frame_diagonal = float(np.hypot(frame.shape[1], frame.shape[0]))
+
+        tracklet = self.tracklets.get(person_id)
+        if tracklet is None:
+            tracklet = self.tracklets[person_id] = {
+                'first_frame': frame_index,
+                'first_box': box,
+                'histogram': np.zeros(self.histogram_size(), dtype=np.float64),
+                'samples': 0,
+                'next_sample': frame_index,
+            }
+        tracklet['last_frame'] = frame_index
+        tracklet['last_box'] = box
+
+        if frame_index >= tracklet['next_sample']:
+            histogram = self.appearance_histogram(frame, box)
+            if histogram is not None:
+                tracklet['histogram'] += histogram
+                tracklet['samples'] += 1
+                tracklet['next_sample'] = frame_index + self.sample_interval
+
+    def histogram_size(self):
+        return len(self.BODY_BANDS) * int(np.prod(self.HISTOGRAM_BINS))
+
+    def appearance_histogram(self, frame, box):
+        """
+        Colour histograms of the upper and lower body of a person
+
+        Args:
+            frame: BGR frame
+            box: (x1, y1, x2, y2) of the person in the frame
+
+        Returns:
+            Concatenated HSV histograms, normalized to sum to 1, or None when the box is
+            too small to sample
+        """
+        x1, y1, x2, y2 = box
+        width, height = x2 - x1, y2 - y1
+        # The middle of the box holds the clothes; its sides are mostly background
+        left = int(max(0, x1 + 0.2 * width))
+        right = int(min(frame.shape[1], x2 - 0.2 * width))
+
+        histograms = []
+        for top, bottom in self.BODY_BANDS:
+            crop = frame[int(max(0, y1 + top * height)):int(min(frame.shape[0], y1 + bottom * height)), left:right]
+            if crop.shape[0] < 2 or crop.shape[1] < 2:
+                return None
+            hsv = cv2.cvtColor(crop, cv2.COLOR_BGR2HSV)
+            histogram = cv2.calcHist([hsv], [0, 1, 2], None, self.HISTOGRAM_BINS, [0, 180, 0, 256, 0, 256]).ravel()
+            histograms.append(histogram / max(histogram.sum(), 1.0))
+        return np.concatenate(histograms) / len(histograms)
+
+    def stitch(self):
+        """
+        Link tracklets that belong to the same person
+
+        Returns:
+            List of groups of track IDs in time order, one group per person, including
+            the tracks that were not merged
+        """
+        ids = [person_id for person_id, tracklet in self.tracklets.items() if tracklet['samples']]
+        following = {}
+
+        if len(ids) > 1:
+            tracklets = [self.tracklets[person_id] for person_id in ids]
+            first = np.array([tracklet['first_frame'] for tracklet in tracklets])
+            last = np.array([tracklet['last_frame'] for tracklet in tracklets])
+            histograms = np.stack([tracklet['histogram'] / tracklet['samples'] for tracklet in tracklets])
+            first_centres = np.array([self._centre(tracklet['first_box']) for tracklet in tracklets])
+            last_centres = np.array([self._centre(tracklet['last_box']) for tracklet in tracklets])
+
+            # Row a, column b: the end of tracklet a followed by the start of tracklet b
+            gaps = first[None, :] - last[:, None]
+            similarity = np.sqrt(histograms) @ np.sqrt(histograms).T
+            appearance = np.sqrt(np.clip(1.0 - similarity, 0.0, None))
+            jumps = np.linalg.norm(first_centres[None, :] - last_centres[:, None], axis=2) / self.frame_diagonal
+            reach = self.max_speed * gaps / self.fps + 0.1
+
+            feasible = ((gaps > 0) & (gaps <= self.max_gap_seconds * self.fps)
+                        & (appearance <= self.max_appearance_distance) & (jumps <= reach))
+            cost = appearance + 0.1 * gaps / (self.max_gap_seconds * self.fps)
+            for row, col in AssociationUtils.solve_assignment(cost, feasible, self.max_appearance_distance + 0.1):
+                following[ids[row]] = ids[col]
+
+        # Chains start at the tracks that do not follow any other one
+        followers = set(following.values())
+        groups = []
+        for person_id in sorted(self.tracklets, key=lambda person_id: self.tracklets[person_id]['first_frame']):
+            if person_id in followers:
+                continue
+            group = [person_id]
+            while group[-1] in following:
+                group.append(following[group[-1]])
+            groups.append(group)
+
+        if len(groups) < len(self.tracklets):
+            print(f"Stitched {len(self.tracklets)} tracks into {len(groups)} people")
+        return groups
+
+    @staticmethod
+    def _centre(box):
+        x1, y1, x2, y2 = box
+        return (x1 + x2) / 2, (y1 + y2) / 2
+
+    def merge_keypoint_tracks(self, people):
+        """
+        Merge the KeypointTracks of every stitched person into one covering their whole
+        timeline; frames between tracklets, where the person was lost, are interpolated
+
+        Args:
+            people: Dictionary mapping track IDs to KeypointTracks
+
+        Returns:
+            Dictionary mapping the first track ID of every person to their KeypointTrack
+        """
+        merged = {}
+        groups = self.stitch()
+        for group in groups:
+            group = [person_id for person_id in group if person_id in people and len(people[person_id])]
+            if not group:
+                continue
+            track = KeypointTrack.concatenate([people[person_id] for person_id in group])
+            frame_indices = track.frame_indices
+            if len(track) <= frame_indices[-1] - frame_indices[0]:
+                track = track.interpolate(np.arange(frame_indices[0], frame_indices[-1] + 1))
+            merged[group[0]] = track
+
+        # Tracks the stitcher never observed are kept as they are
+        stitched = {person_id for group in groups for person_id in group}
+        merged.update((person_id, track) for person_id, track in people.items() if person_id not in stitched)
+        return merged
+
+    def merge_videos(self, video_paths, output_folder, fps, frame_size):
+        """
+        Join the per-person videos of every stitched person into one, with black frames
+        for the time they were lost
+
+        Args:
+            video_paths: Dictionary mapping track IDs to their segmented video paths
+            output_folder: Folder where joined videos are written
+            fps: Frames per second of the videos
+            frame_size: Tuple (width, height) of the video frame
+
+        Returns:
+            List of video paths, one per person; joined fragments are deleted
+        """
+        merged_paths = []
+        groups = self.stitch()
+        for group in groups:
+            group = [person_id for person_id in group if person_id in video_paths]
+            if len(group) == 1:
+                merged_paths.append(video_paths[group[0]])
+            elif group:
+                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+                output_video_path = os.path.join(output_folder, f'person_{group[0]}_merged_{timestamp}.mp4')
+                gaps = [0] + [
+                    self.tracklets[current]['first_frame'] - self.tracklets[previous]['last_frame'] - 1
+                    for previous, current in zip(group, group[1:])
+                ]
+                VideoUtils.concatenate_videos(
+                    [video_paths[person_id] for person_id in group], output_video_path, fps, frame_size, gaps
+                )
+                for person_id in group:
+                    VideoUtils.delete_video(video_paths[person_id])
+                merged_paths.append(output_video_path)
+
+        stitched = {person_id for group in groups for person_id in group}
+        merged_paths.extend(path for person_id, path in video_paths.items() if person_id not in stitched)
+        return merged_paths
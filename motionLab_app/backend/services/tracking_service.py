@@ -3,25 +3,45 @@ Tracking service for MotionLab application.
 Handles tracking of multiple people across video frames.
 """
 
-import cv2
 import numpy as np
-import uuid
+from utils.association_utils import HungarianAssociation
+from utils.kalman_filter import KeypointKalmanFilter
+from utils.pose_utils import PoseUtils
 
 class TrackingService:
     """Service for tracking multiple people in video sequences"""
     
-    def __init__(self):
-        """Initialize the tracking service"""
+    # Frame size assumed when update() is called without a frame
+    DEFAULT_FRAME_SIZE = (1280, 720)
+    
+    def __init__(self, association=None, predict_motion=True, max_disappeared=30):
+        """
+        Initialize the tracking service
+        
+        Args:
+            association: Matcher of tracks to detections with an
+                associate(track_keypoints, detection_keypoints, frame_width, frame_height)
+                method, such as the classes of utils.association_utils.
+                Defaults to HungarianAssociation.
+            predict_motion: Match detections against the Kalman prediction of every
+                track instead of its last detection, and report hidden people at
+                their predicted position
+            max_disappeared: Number of frames a person can be missing before being removed
+        """
+        self.association = association or HungarianAssociation()
+        self.predict_motion = predict_motion
         self.tracked_people = {}  # Dictionary to store tracked people by ID
         self.next_id = 1  # Counter for generating unique tracking IDs
-        self.max_disappeared = 10  # Maximum number of frames a person can disappear before being removed
+        self.max_disappeared = max_disappeared  # Maximum number of frames a person can disappear before being removed
         self.disappeared_counters = {}  # Track how many frames each person has been missing
+        self.motion_filter = KeypointKalmanFilter()  # Position and velocity of every tracked person
     
     def reset_tracking(self):
         """Reset all tracking state"""
         self.tracked_people = {}
         self.next_id = 1
         self.disappeared_counters = {}
+        self.motion_filter = KeypointKalmanFilter()
     
     def update(self, detections, frame):
         """
@@ -42,6 +62,11 @@ class TrackingService:
             if self.disappeared_counters[obj_id] > self.max_disappeared:
                 self.tracked_people.pop(obj_id, None)
                 self.disappeared_counters.pop(obj_id, None)
+                self.motion_filter.remove([obj_id])
+        
+        # Move every remaining person to where they should be in this frame
+        if self.predict_motion:
+            self.motion_filter.predict()
         
         # If we have no detections, return the updated tracked people
         if not detections:
@@ -72,6 +97,8 @@ class TrackingService:
         # Store the detection with its ID
         self.tracked_people[obj_id] = detection
         self.disappeared_counters[obj_id] = 0
+        if self.predict_motion:
+            self.motion_filter.add([obj_id], [self._get_landmarks(detection)])
     
     def _match_and_update(self, detections, frame):
         """
@@ -79,130 +106,65 @@ class TrackingService:
         
         Args:
             detections: List of new pose detection results
-            frame: Current video frame
+            frame: Current video frame, whose size converts normalized keypoints to pixels
         """
-        # In a real implementation, this would use a more sophisticated matching algorithm
-        # such as IoU (Intersection over Union) or feature matching
-        
-        # For the demo, we'll use a simple approach:
-        # 1. Create centroids for existing tracked people
-        # 2. Create centroids for new detections
-        # 3. Match based on closest centroid
+        if frame is not None:
+            frame_height, frame_width = frame.shape[:2]
+        else:
+            frame_width, frame_height = self.DEFAULT_FRAME_SIZE
         
-        # Get centroids for existing tracked people
-        tracked_centroids = {}
-        for obj_id, detection in self.tracked_people.items():
-            centroid = self._get_centroid(detection)
-            tracked_centroids[obj_id] = centroid
+        obj_ids = list(self.tracked_people.keys())
+        if self.predict_motion:
+            tracked_landmarks = self.motion_filter.landmarks(obj_ids)
+        else:
+            tracked_landmarks = np.stack([self._get_landmarks(self.tracked_people[obj_id]) for obj_id in obj_ids])
+        detection_landmarks = np.stack([self._get_landmarks(detection) for detection in detections])
         
-        # Get centroids for new detections
-        detection_centroids = []
-        for detection in detections:
-            centroid = self._get_centroid(detection)
-            detection_centroids.append((centroid, detection))
+        matches = self.association.associate(tracked_landmarks, detection_landmarks, frame_width, frame_height)
         
-        # Match detections to tracked people
         used_detections = set()
-        
-        # For each tracked person, find the closest detection
-        for obj_id, tracked_centroid in tracked_centroids.items():
-            min_dist = float('inf')
-            closest_detection_idx = None
-            
-            for i, (detection_centroid, _) in enumerate(detection_centroids):
-                if i in used_detections:
-                    continue
-                    
-                # Calculate Euclidean distance between centroids
-                dist = np.sqrt((tracked_centroid[0] - detection_centroid[0])**2 + 
-                               (tracked_centroid[1] - detection_centroid[1])**2)
-                
-                if dist < min_dist:
-                    min_dist = dist
-                    closest_detection_idx = i
-            
-            # If we found a match within a reasonable distance threshold
-            if closest_detection_idx is not None and min_dist < 100:  # Threshold in pixels
-                _, detection = detection_centroids[closest_detection_idx]
-                self.tracked_people[obj_id] = detection
-                self.disappeared_counters[obj_id] = 0
-                used_detections.add(closest_detection_idx)
+        for track_idx, detection_idx in matches:
+            obj_id = obj_ids[track_idx]
+            self.tracked_people[obj_id] = detections[detection_idx]
+            self.disappeared_counters[obj_id] = 0
+            used_detections.add(detection_idx)
+        
+        # Correct the predictions of every matched person in one batch
+        if self.predict_motion and matches:
+            self.motion_filter.update(
+                [obj_ids[track_idx] for track_idx, _ in matches],
+                detection_landmarks[[detection_idx for _, detection_idx in matches]]
+            )
         
         # Register any unmatched detections as new people
-        for i, (_, detection) in enumerate(detection_centroids):
+        for i, detection in enumerate(detections):
             if i not in used_detections:
                 self._register(detection)
     
-    def _get_centroid(self, detection):
+    def _get_landmarks(self, detection):
         """
-        Calculate the centroid (center point) of a person detection
+        Get the normalized landmarks of a person detection
         
         Args:
-            detection: Standardized pose detection result
+            detection: Standardized pose detection result or MediaPipe results
             
         Returns:
-            Tuple (x, y) representing the centroid coordinates
+            (33, 4) array of normalized x, y, z and visibility. A detection without
+            landmarks is placed at the centre of the frame with no visible keypoint.
         """
-        # Frame size - used for converting normalized coordinates
-        frame_width, frame_height = 1280, 720  # Default size
+        landmarks = None
         
         # If using our standardized format
         if isinstance(detection, dict) and 'keypoints' in detection:
-            keypoints = detection['keypoints']
-            
-            if len(keypoints) > 0:
-                # Find hip landmarks (indices 23-24 in MediaPipe)
-                hip_indices = [23, 24]  # Left hip, Right hip
-                
-                # If we have enough keypoints
-                if len(keypoints) > max(hip_indices):
-                    # Calculate average hip position
-                    left_hip = keypoints[hip_indices[0]]
-                    right_hip = keypoints[hip_indices[1]]
-                    
-                    # Calculate midpoint
-                    hip_x = (left_hip[0] + right_hip[0]) / 2
-                    hip_y = (left_hip[1] + right_hip[1]) / 2
-                    
-                    # Convert normalized coordinates to pixel coordinates
-                    return (int(hip_x * frame_width), int(hip_y * frame_height))
-                
-                # Fallback: use average of all keypoints
-                x_sum = sum(kp[0] for kp in keypoints)
-                y_sum = sum(kp[1] for kp in keypoints)
-                avg_x = x_sum / len(keypoints)
-                avg_y = y_sum / len(keypoints)
-                
-                return (int(avg_x * frame_width), int(avg_y * frame_height))
-                
+            landmarks = np.asarray(detection['keypoints'], dtype=np.float64)
         # For compatibility with MediaPipe format
         elif hasattr(detection, 'pose_landmarks') and detection.pose_landmarks:
-            landmarks = detection.pose_landmarks.landmark
-            
-            # Use the midpoint between left and right hip as the centroid
-            # Left hip is index 23, right hip is index 24 in MediaPipe pose landmarks
-            if len(landmarks) >= 25:  # Ensure we have enough landmarks
-                # These are normalized coordinates (0-1)
-                left_hip = landmarks[23]
-                right_hip = landmarks[24]
-                
-                # Calculate midpoint in normalized coordinates
-                x = (left_hip.x + right_hip.x) / 2
-                y = (left_hip.y + right_hip.y) / 2
-                
-                # Convert to pixel coordinates
-                return (int(x * frame_width), int(y * frame_height))
-            
-            # Fallback: use average of all landmarks
-            x_sum = sum(landmark.x for landmark in landmarks)
-            y_sum = sum(landmark.y for landmark in landmarks)
-            avg_x = x_sum / len(landmarks)
-            avg_y = y_sum / len(landmarks)
-            
-            return (int(avg_x * frame_width), int(avg_y * frame_height))
+            landmarks = PoseUtils.landmarks_to_array(detection.pose_landmarks)
         
-        # Default centroid if we can't calculate from landmarks
-        return (frame_width // 2, frame_height // 2)  # Center of frame
+        if landmarks is None or landmarks.shape != (33, 4):
+            landmarks = np.zeros((33, 4))
+            landmarks[:, :2] = 0.5
+        return landmarks
     
     def _get_tracked_people_list(self):
         """
@@ -214,6 +176,10 @@ class TrackingService:
         result = []
         
         for obj_id, detection in self.tracked_people.items():
+            # A hidden person is reported at the predicted position rather than where they were last seen
+            if self.predict_motion and self.disappeared_counters.get(obj_id, 0) > 0 and isinstance(detection, dict):
+                detection = dict(detection, keypoints=self.motion_filter.landmarks([obj_id])[0], predicted=True)
+            
             # Create a dictionary representation of the tracked person
             person_data = {
                 'id': obj_id,
@@ -0,0 +1,85 @@
+"""
+Test Scenario 3: Multi-Person Motion Capture
+Test Case TC15: Verify tracks are matched to detections by the optimal IoU, OKS and centroid assignment
+"""
+
+import unittest
+import os
+import sys
+import numpy as np
+
+# Add the parent directory to the path so we can import from services
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.tracking_service import TrackingService
+from utils.pose_utils import PoseUtils
+from utils.association_utils import AssociationUtils, HungarianAssociation, GreedyCentroidAssociation
+
+
+class AssociationTest(unittest.TestCase):
+    """Test case for the association engines of TrackingService"""
+
+    def setUp(self):
+        # One body shape of 33 landmarks, about 100 by 200 pixels in a 1280x720 frame
+        self.shape = np.random.default_rng(0).uniform(-0.5, 0.5, (33, 2)) * (100, 200)
+        self.frame = np.zeros((720, 1280, 3), dtype=np.uint8)
+
+    def person(self, x, y, width=1280, height=720):
+        landmarks = np.ones((33, 4), dtype=np.float32)
+        landmarks[:, :2] = (self.shape + (x, y)) / (width, height)
+        return landmarks
+
+    def test_similarity_matrices(self):
+        """Identical poses score 1, disjoint ones 0, for both IoU and OKS"""
+        points, visible = AssociationUtils.keypoints_to_pixels(
+            np.stack([self.person(300, 300), self.person(900, 300)]), 1280, 720
+        )
+        boxes = AssociationUtils.boxes_from_points(points, visible)
+        np.testing.assert_allclose(AssociationUtils.box_iou(boxes, boxes), np.eye(2), atol=1e-9)
+
+        areas = (boxes[:, 2:] - boxes[:, :2]).prod(axis=1)
+        oks = AssociationUtils.keypoint_oks(points[:, None], visible[:, None], points[None], visible[None], areas[None])
+        np.testing.assert_allclose(oks, np.eye(2), atol=1e-9)
+
+        # Keypoints hidden in either pose are left out, and no shared keypoint gives 0
+        visible[0, PoseUtils.coco_to_mediapipe] = False
+        self.assertEqual(AssociationUtils.keypoint_oks(points[0], visible[0], points[0], visible[0], areas[0]), 0.0)
+
+    def test_hungarian_beats_greedy(self):
+        """A track grabbing its nearest detection first must not push the other one to a worse match"""
+        tracks = np.stack([self.person(600, 360), self.person(640, 360)])
+        detections = np.stack([self.person(630, 360), self.person(530, 360)])
+
+        # Greedily the first track takes the detection 30 pixels away, leaving the second one 110 away
+        self.assertEqual(GreedyCentroidAssociation().associate(tracks, detections, 1280, 720), [(0, 0)])
+        self.assertEqual(HungarianAssociation().associate(tracks, detections, 1280, 720), [(0, 1), (1, 0)])
+
+        # A track whose person was missed stays unmatched rather than pushing the others along
+        tracks = np.stack([self.person(300, 360), self.person(400, 360)])
+        detections = np.stack([self.person(405, 360), self.person(500, 360)])
+        self.assertEqual(HungarianAssociation().associate(tracks, detections, 1280, 720), [(1, 0)])
+
+        # Far beyond the gate nothing matches, and empty sides give no matches
+        far = np.stack([self.person(1000, 100)])
+        self.assertEqual(HungarianAssociation().associate(tracks[1:], far, 1280, 720), [])
+        self.assertEqual(HungarianAssociation().associate(tracks[:0], detections, 1280, 720), [])
+
+    def test_tracking_keeps_ids_of_shuffled_detections(self):
+        """Ids follow the people whatever the detection order, in the real frame size"""
+        tracking_service = TrackingService()
+        large_frame = np.zeros((2160, 3840, 3), dtype=np.uint8)
+        rng = np.random.default_rng(1)
+        ids = {}
+        for step in range(20):
+            people = {name: self.person(400 + 300 * i + 8 * step, 1000, 3840, 2160) for i, name in enumerate("abcd")}
+            order = rng.permutation(list(people))
+            tracked = tracking_service.update([{'keypoints': people[name], 'name': name} for name in order], large_frame)
+            for tracked_person in tracked:
+                ids.setdefault(tracked_person['keypoints']['name'], set()).add(tracked_person['id'])
+
+        self.assertEqual(ids, {"a": {1}, "b": {2}, "c": {3}, "d": {4}})
+        self.assertEqual(tracking_service.next_id, 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,157 @@
+"""
+Test Scenario 3: Multi-Person Motion Capture
+Test Case TC14: Verify batched YOLO inference gives the same tracks as frame-by-frame tracking
+"""
+
+import unittest
+import os
+import sys
+import tempfile
+from unittest import mock
+import cv2
+import numpy as np
+import torch
+from ultralytics.engine.results import Results
+
+# Add the parent directory to the path so we can import from services
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.segmentation_service import SegmentationService
+from utils.object_detection_utils import ObjectDetectionUtils
+
+
+class StubTrackingModel:
+    """
+    Stands in for a YOLO model with fixed detections per frame. The frame index is read from
+    the frame brightness. track() runs the on_predict_postprocess_end callback of the pinned
+    ultralytics release (8.3.71) on a tracker of its own, as YOLO.track(persist=True) does.
+    """
+
+    def __init__(self, detections, tracker_path):
+        self.detections = detections
+        self.tracker = ObjectDetectionUtils.create_tracker(tracker_path)
+        self.predicted_frames = 0
+
+    def result(self, frame):
+        boxes = self.detections[int(round(frame.mean() / 15))]
+        return Results(frame, path="clip.avi", names={0: "person"},
+                       boxes=torch.tensor(boxes, dtype=torch.float32).reshape(-1, 6))
+
+    def predict(self, frames, conf=0.25, verbose=True):
+        self.predicted_frames += len(frames)
+        return [self.result(frame) for frame in frames]
+
+    def track(self, frame, persist=False, tracker=None):
+        result = self.result(frame)
+        det = result.boxes.cpu().numpy()
+        if len(det) == 0:
+            return [result]
+        tracks = self.tracker.update(det, result.orig_img)
+        if len(tracks) == 0:
+            return [result]
+        idx = tracks[:, -1].astype(int)
+        result = result[idx]
+        result.update(boxes=torch.as_tensor(tracks[:, :-1]))
+        return [result]
+
+
+class StubBatchedTrackingTest(unittest.TestCase):
+    """Test case for SegmentationService.track_people with YOLO_BATCH_SIZE on a stub model"""
+
+    def setUp(self):
+        # Two people walking past each other as [x1, y1, x2, y2, conf, cls]; nobody is detected
+        # in frames 5 and 6, b is missed in frame 9 and comes back after, and only a new person c
+        # is seen in the last two frames, which are untracked until c's track is confirmed
+        self.detections = []
+        for t in range(14):
+            people = []
+            if t >= 12:
+                people.append([480, 150, 630, 350, 0.95, 0])
+            elif t not in (5, 6):
+                people.append([50 + 10 * t, 40, 250 + 10 * t, 320, 0.9, 0])
+                if t != 9:
+                    people.append([380 - 10 * t, 50, 580 - 10 * t, 330, 0.85, 0])
+            self.detections.append(people)
+
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.video_path = os.path.join(self.tmp_dir.name, 'clip.avi')
+        writer = cv2.VideoWriter(self.video_path, cv2.VideoWriter_fourcc(*'MJPG'), 30, (640, 360))
+        for t in range(14):
+            writer.write(np.full((360, 640, 3), 15 * t, dtype=np.uint8))
+        writer.release()
+
+        self.segmentation_service = SegmentationService(output_folder=self.tmp_dir.name)
+
+    def track(self, batch_size):
+        model = StubTrackingModel(self.detections, self.segmentation_service.bytetrack_path)
+        with mock.patch.dict(os.environ, {"YOLO_BATCH_SIZE": str(batch_size)}), \
+                mock.patch('services.segmentation_service.ModelRegistry.acquire_yolo', return_value=model):
+            cap = cv2.VideoCapture(self.video_path)
+            tracks = [people for _, people, _, _ in self.segmentation_service.track_people(cap, 640, 360)]
+            cap.release()
+        self.assertEqual(model.predicted_frames, 0 if batch_size == 1 else 14)
+        return tracks
+
+    def test_batches_follow_track_callback(self):
+        """Batched tracking gives the frame-by-frame ids, including frames without detections"""
+        expected = self.track(1)
+        self.assertEqual([[person_id for person_id, _ in people] for people in expected],
+                         [[1, 2]] * 5 + [[], []] + [[1, 2]] * 2 + [[1]] + [[1, 2]] * 2 + [[None], [3]])
+
+        for batch_size in (3, 4, 14):
+            tracks = self.track(batch_size)
+            self.assertEqual(len(tracks), 14)
+            for people, expected_people in zip(tracks, expected):
+                self.assertEqual([person_id for person_id, _ in people], [person_id for person_id, _ in expected_people])
+                for (_, box), (_, expected_box) in zip(people, expected_people):
+                    np.testing.assert_allclose(box, expected_box, atol=1)
+
+
+class BatchedTrackingTest(unittest.TestCase):
+    """Test case for SegmentationService.track_people with YOLO_BATCH_SIZE on the YOLO pose model"""
+
+    def setUp(self):
+        test_model_path = os.path.join(os.path.dirname(__file__), 'resources', 'yolo11s-pose.pt')
+        model_path = test_model_path if os.path.exists(test_model_path) else "yolo11s-pose.pt"
+        if not os.path.exists(model_path):
+            self.skipTest("YOLO model not found")
+
+        image = cv2.imread(os.path.join(os.path.dirname(__file__), 'visualizations', 'TC_08-1.jpg'))
+        if image is None:
+            self.skipTest("Test image not available")
+        image = cv2.resize(image, (640, 360))
+
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.video_path = os.path.join(self.tmp_dir.name, 'clip.avi')
+        writer = cv2.VideoWriter(self.video_path, cv2.VideoWriter_fourcc(*'MJPG'), 30, (640, 360))
+        for i in range(10):
+            writer.write(np.roll(image, 4 * i, axis=1))
+        writer.release()
+
+        self.segmentation_service = SegmentationService(yolo_model_path=model_path, output_folder=self.tmp_dir.name)
+
+    def track(self, batch_size):
+        with mock.patch.dict(os.environ, {"YOLO_BATCH_SIZE": str(batch_size)}):
+            cap = cv2.VideoCapture(self.video_path)
+            tracks = [people for _, people, _, _ in self.segmentation_service.track_people(cap, 640, 360)]
+            cap.release()
+        return tracks
+
+    def test_batches_keep_track_ids(self):
+        """Every frame should get the same people, ids and boxes whatever the batch size"""
+        expected = self.track(1)
+        self.assertEqual(len(expected), 10)
+
+        for batch_size in (3, 4):
+            tracks = self.track(batch_size)
+            self.assertEqual(len(tracks), len(expected))
+            for people, expected_people in zip(tracks, expected):
+                self.assertEqual([person_id for person_id, _ in people], [person_id for person_id, _ in expected_people])
+                for (_, box), (_, expected_box) in zip(people, expected_people):
+                    np.testing.assert_allclose(box, expected_box, atol=2)
+
+
+if __name__ == '__main__':
+    unittest.main()
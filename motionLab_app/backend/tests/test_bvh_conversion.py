@@ -0,0 +1,158 @@
+"""
+Test Scenario 1: Pose Estimation and 3D Conversion
+Test Case TC09: Verify batched BVH conversion matches the per-frame conversion
+"""
+
+import unittest
+import gzip
+import os
+import sys
+import numpy as np
+
+# Add the parent directory to the path so we can import from utils
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.bvh_skeleton import bvh_helper, cmu_skeleton, h36m_skeleton, openpose_skeleton, math3d
+from utils.bvh_utils import BVHUtils
+
+
+class BVHConversionTest(unittest.TestCase):
+    """Test case for the vectorized math3d layer and skeleton conversions"""
+
+    def setUp(self):
+        """Build a walking-like sequence of 17-joint poses with random root motion"""
+        rng = np.random.default_rng(0)
+        self.n_frames = 120
+
+        # Rough H36M-style rest pose (y up), scaled like align_and_scale_3d_pose output
+        rest_pose = np.array([
+            [0, 0, 0], [-1, 0, 0], [-1, -4, 0], [-1, -8, 0],
+            [1, 0, 0], [1, -4, 0], [1, -8, 0], [0, 2, 0],
+            [0, 4, 0], [0, 5, 0], [0, 6, 0], [2, 4, 0],
+            [4, 4, 0], [6, 4, 0], [-2, 4, 0], [-4, 4, 0], [-6, 4, 0],
+        ], dtype=float)
+        noise = rng.normal(scale=0.3, size=(self.n_frames, 17, 3))
+        phase = np.linspace(0, 4 * np.pi, self.n_frames)[:, None, None]
+        self.poses_3d = rest_pose[None] + noise + 0.5 * np.sin(phase)
+        self.root_keypoints = rng.uniform(size=(self.n_frames, 3)).tolist()
+
+    def test_batched_channels_match_per_frame(self):
+        """poses2euler should produce the same channels as pose2euler frame by frame"""
+        reference = cmu_skeleton.CMUSkeleton()
+        reference.root_positions = self.root_keypoints
+        reference.x_sensitivity = 0.7
+        reference.y_sensitivity = 1.3
+        header = reference.get_bvh_header(self.poses_3d)
+        expected = np.array([reference.pose2euler(pose, header) for pose in self.poses_3d])
+
+        batched = cmu_skeleton.CMUSkeleton()
+        batched.root_positions = self.root_keypoints
+        batched.x_sensitivity = 0.7
+        batched.y_sensitivity = 1.3
+        channels = batched.poses2euler(self.poses_3d, header)
+
+        self.assertEqual(channels.shape, expected.shape)
+        np.testing.assert_allclose(channels, expected, atol=1e-6)
+
+    def test_dcm2quat_batch_matches_all_branches(self):
+        """dcm2quat_batch should follow the same branch as dcm2quat for every matrix"""
+        rng = np.random.default_rng(1)
+        x_dirs = rng.normal(size=(500, 3))
+        z_dirs = rng.normal(size=(500, 3))
+        dcms = math3d.dcm_from_axis_batch(x_dirs, None, z_dirs, 'zyx')
+
+        expected = np.array([math3d.dcm2quat(dcm) for dcm in dcms])
+        np.testing.assert_allclose(math3d.dcm2quat_batch(dcms), expected, atol=1e-9)
+
+    def test_quat2euler_supports_every_rotation_order(self):
+        """quat2euler angles should rebuild the quaternion's rotation matrix for all six orders"""
+        rng = np.random.default_rng(2)
+        quats = rng.normal(size=(200, 4))
+        quats /= np.linalg.norm(quats, axis=1, keepdims=True)
+        matrices = math3d.quat2dcm_batch(quats)
+
+        def rotation(axis, angle):
+            c, s = np.cos(angle), np.sin(angle)
+            return {
+                'x': np.array([[1, 0, 0], [0, c, -s], [0, s, c]]),
+                'y': np.array([[c, 0, s], [0, 1, 0], [-s, 0, c]]),
+                'z': np.array([[c, -s, 0], [s, c, 0], [0, 0, 1]]),
+            }[axis]
+
+        for order in ['xyz', 'xzy', 'yxz', 'yzx', 'zxy', 'zyx']:
+            eulers = math3d.quat2euler(quats, order)
+            for angles, matrix in zip(eulers, matrices):
+                rebuilt = rotation(order[0], angles[0]) @ rotation(order[1], angles[1]) @ rotation(order[2], angles[2])
+                np.testing.assert_allclose(rebuilt, matrix, atol=1e-6, err_msg=order)
+
+    def test_h36m_and_openpose_batched_channels_match_per_frame(self):
+        """The other skeletons should batch their (non-zyx) conversions the same way"""
+        rng = np.random.default_rng(3)
+        for skeleton, n_joints in [(h36m_skeleton.H36mSkeleton(), 17), (openpose_skeleton.OpenPoseSkeleton(), 25)]:
+            poses_3d = rng.normal(size=(50, n_joints, 3))
+            header = skeleton.get_bvh_header(poses_3d)
+            expected = np.array([skeleton.pose2euler(pose, header) for pose in poses_3d])
+            channels = skeleton.poses2euler(poses_3d, header)
+
+            # Angles of exactly +-180 degrees may come out with either sign
+            difference = np.abs(channels - expected)
+            np.testing.assert_allclose(np.minimum(difference, np.abs(difference - 360)), 0, atol=1e-6)
+
+    def test_poses2bvh_writes_every_frame(self):
+        """poses2bvh should still write one motion line per frame"""
+        output_file = os.path.join(os.path.dirname(__file__), 'bvh_conversion_test.bvh')
+        try:
+            channels, _ = cmu_skeleton.CMUSkeleton().poses2bvh(
+                self.poses_3d, output_file=output_file, fps=60,
+                root_keypoints=self.root_keypoints, x_sensitivity=1, y_sensitivity=1
+            )
+            with open(output_file) as f:
+                lines = f.read().splitlines()
+
+            motion = lines.index('MOTION')
+            self.assertEqual(lines[motion + 1], f'Frames: {self.n_frames}')
+            self.assertEqual(len(lines) - motion - 3, self.n_frames)
+            self.assertEqual(len(lines[motion + 3].split()), channels.shape[1])
+        finally:
+            if os.path.exists(output_file):
+                os.remove(output_file)
+
+    def test_compressed_bvh_matches_plain_bvh(self):
+        """A '.bvh.gz' file should hold the same fixed-precision text as the plain file"""
+        skeleton = cmu_skeleton.CMUSkeleton()
+        skeleton.root_positions = self.root_keypoints
+        skeleton.x_sensitivity = skeleton.y_sensitivity = 1
+        header = skeleton.get_bvh_header(self.poses_3d)
+        channels = skeleton.poses2euler(self.poses_3d, header)
+
+        plain_file = os.path.join(os.path.dirname(__file__), 'bvh_writer_test.bvh')
+        compressed_file = plain_file + '.gz'
+        try:
+            bvh_helper.write_bvh(plain_file, header, channels, 60, precision=3)
+            bvh_helper.write_bvh(compressed_file, header, channels, 60, precision=3)
+            with open(plain_file) as f:
+                plain = f.read()
+            with gzip.open(compressed_file, 'rt') as f:
+                self.assertEqual(f.read(), plain)
+
+            last_frame = plain.splitlines()[-1].split()
+            self.assertTrue(all(len(value.split('.')[1]) == 3 for value in last_frame))
+            np.testing.assert_allclose(np.array(last_frame, dtype=float), channels[-1], atol=5e-4)
+
+            # Every reader of the compressed file gets its own plain copy to delete
+            copies = [BVHUtils.get_plain_bvh_path(compressed_file) for _ in range(2)]
+            self.assertNotEqual(copies[0][0], copies[1][0])
+            for copy_path, is_temporary in copies:
+                self.assertTrue(is_temporary)
+                with open(copy_path) as f:
+                    self.assertEqual(f.read(), plain)
+                os.remove(copy_path)
+            self.assertEqual(BVHUtils.get_plain_bvh_path(plain_file), (plain_file, False))
+        finally:
+            for path in (plain_file, compressed_file):
+                if os.path.exists(path):
+                    os.remove(path)
+
+
+if __name__ == '__main__':
+    unittest.main()
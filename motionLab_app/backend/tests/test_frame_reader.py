@@ -0,0 +1,111 @@
+"""
+Test Scenario 2: Video Processing
+Test Case TC13: Verify the prefetching frame reader returns every frame in order
+"""
+
+import unittest
+import os
+import sys
+import tempfile
+import cv2
+import numpy as np
+
+# Add the parent directory to the path so we can import from utils
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.video_utils import VideoUtils, FrameReader
+from utils.object_detection_utils import ObjectDetectionUtils
+
+
+class FrameReaderTest(unittest.TestCase):
+    """Test case for VideoUtils.open_frame_reader"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.video_path = os.path.join(self.tmp_dir.name, 'clip.avi')
+        self.n_frames = 30
+
+        # Each frame is filled with its own index so the order can be checked after decoding
+        writer = cv2.VideoWriter(self.video_path, cv2.VideoWriter_fourcc(*'MJPG'), 30, (64, 48))
+        for i in range(self.n_frames):
+            writer.write(np.full((48, 64, 3), i * 8, dtype=np.uint8))
+        writer.release()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def read_plain(self):
+        cap = cv2.VideoCapture(self.video_path)
+        frames = []
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frames.append(frame)
+        cap.release()
+        return frames
+
+    def test_frames_match_sequential_reads(self):
+        """Prefetched frames should equal the frames read directly, in the same order"""
+        expected = self.read_plain()
+        cap = cv2.VideoCapture(self.video_path)
+        with VideoUtils.open_frame_reader(cap, buffer_size=3) as frames:
+            frames_read = [frame.copy() for frame in frames]
+        cap.release()
+
+        self.assertEqual(len(frames_read), self.n_frames)
+        for frame, expected_frame in zip(frames_read, expected):
+            np.testing.assert_array_equal(frame, expected_frame)
+
+        metrics = frames.get_metrics()
+        self.assertEqual(metrics["frames"], self.n_frames)
+        self.assertGreater(metrics["decode_seconds"], 0)
+        self.assertEqual(frames.read(), (False, None))
+
+    def test_buffers_are_reused(self):
+        """The reader should cycle through its fixed set of buffers"""
+        cap = cv2.VideoCapture(self.video_path)
+        with VideoUtils.open_frame_reader(cap, buffer_size=2) as frames:
+            buffers = {id(frame) for frame in frames}
+        cap.release()
+        self.assertLessEqual(len(buffers), 2)
+
+    def test_stopping_early_ends_the_decoder(self):
+        """Leaving the loop early must stop the decoder thread and record the reader's totals"""
+        readers_before = FrameReader.get_totals()["readers"]
+        cap = cv2.VideoCapture(self.video_path)
+        with VideoUtils.open_frame_reader(cap, buffer_size=2) as frames:
+            for i, _ in enumerate(frames):
+                if i == 4:
+                    break
+        cap.release()
+
+        self.assertFalse(frames._thread.is_alive())
+        self.assertEqual(frames.get_metrics()["frames"], 5)
+        self.assertEqual(FrameReader.get_totals()["readers"], readers_before + 1)
+
+    def test_resize_for_inference(self):
+        """Large frames are downsampled once to the inference resolution and boxes map between the two"""
+        frame = np.zeros((2160, 3840, 3), dtype=np.uint8)
+        small, scale = VideoUtils.resize_for_inference(frame, max_side=1280)
+        self.assertEqual(small.shape, (720, 1280, 3))
+        self.assertAlmostEqual(scale, 1 / 3)
+        self.assertEqual(ObjectDetectionUtils.scale_box((300, 600, 900, 2100), scale), (100, 200, 300, 700))
+
+        small, scale = VideoUtils.resize_for_inference(small, max_side=1280)
+        self.assertEqual((small.shape, scale), ((720, 1280, 3), 1.0))
+        self.assertIs(VideoUtils.resize_for_inference(frame, max_side=0)[0], frame)
+
+    def test_crop_person(self):
+        """Person crops are padded views of the frame, clipped at its edges"""
+        frame = np.zeros((720, 1280, 3), dtype=np.uint8)
+        crop, offset = ObjectDetectionUtils.crop_person(frame, (100, 200, 300, 600), padding=0.1)
+        self.assertEqual((crop.shape[:2], offset), ((480, 240), (80, 160)))
+        self.assertTrue(np.shares_memory(crop, frame))
+
+        crop, offset = ObjectDetectionUtils.crop_person(frame, (0, 500, 200, 720), padding=0.25)
+        self.assertEqual((crop.shape[:2], offset), ((275, 250), (0, 445)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+"""
+Test Scenario 2: Video Processing
+Test Case TC19: Verify only the jobs of stopped server processes are failed at startup
+"""
+
+import unittest
+import os
+import sys
+import socket
+import subprocess
+import tempfile
+from flask import Flask
+
+# Add the parent directory to the path so we can import from services
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from database import db
+import models.user_model  # noqa: F401
+import models.project_model  # noqa: F401
+from models.processing_job_model import ProcessingJob
+from services.job_queue_service import JobQueueService
+
+
+class JobRecoveryTest(unittest.TestCase):
+    """Test case for the recovery of interrupted jobs in JobQueueService.init_app"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.app = Flask(__name__)
+        self.app.config.update(
+            SQLALCHEMY_DATABASE_URI=f"sqlite:///{os.path.join(self.tmp_dir.name, 'jobs.db')}",
+            SQLALCHEMY_TRACK_MODIFICATIONS=False,
+        )
+        db.init_app(self.app)
+        with self.app.app_context():
+            db.create_all()
+        self.addCleanup(self.dispose)
+
+    def dispose(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+
+    def test_fails_only_orphaned_jobs(self):
+        """Jobs of this process and of other hosts survive; jobs of stopped processes fail"""
+        stopped = subprocess.Popen([sys.executable, "-c", "import sys; sys.stdin.read()"], stdin=subprocess.PIPE)
+        stopped_owner = JobQueueService.get_process_owner(stopped.pid)
+        stopped.communicate()
+
+        owners = {
+            "running": JobQueueService.get_process_owner(),
+            "other_host": f"{socket.gethostname()}-elsewhere:1:0.000",
+            "stopped": stopped_owner,
+            "reused_pid": JobQueueService.get_process_owner().rsplit(":", 1)[0] + ":1.000",
+            "unowned": None,
+        }
+        with self.app.app_context():
+            job_ids = {
+                name: ProcessingJob.create(1, 1, f"{name}.mp4", 0.5, 0.5, owner=owner).id
+                for name, owner in owners.items()
+            }
+
+            JobQueueService.init_app(self.app)
+
+            statuses = {name: ProcessingJob.get_by_id(job_id).status for name, job_id in job_ids.items()}
+        self.assertEqual(statuses, {
+            "running": "queued", "other_host": "queued", "stopped": "failed", "reused_pid": "failed", "unowned": "failed",
+        })
+
+
+if __name__ == '__main__':
+    unittest.main()
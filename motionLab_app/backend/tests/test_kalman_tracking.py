@@ -0,0 +1,90 @@
+"""
+Test Scenario 3: Multi-Person Motion Capture
+Test Case TC16: Verify tracked people keep their ids through occlusion with Kalman prediction
+"""
+
+import unittest
+import os
+import sys
+import numpy as np
+
+# Add the parent directory to the path so we can import from services
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.tracking_service import TrackingService
+from utils.kalman_filter import KeypointKalmanFilter
+
+
+class KalmanTrackingTest(unittest.TestCase):
+    """Test case for KeypointKalmanFilter and its use in TrackingService"""
+
+    def setUp(self):
+        # One body shape of 33 landmarks, about 100 by 200 pixels in a 1280x720 frame
+        self.shape = np.random.default_rng(0).uniform(-0.5, 0.5, (33, 2)) * (100, 200)
+        self.frame = np.zeros((720, 1280, 3), dtype=np.uint8)
+
+    def person(self, x, y):
+        landmarks = np.ones((33, 4), dtype=np.float32)
+        landmarks[:, :2] = (self.shape + (x, y)) / (1280, 720)
+        return landmarks
+
+    def test_filter_predicts_constant_velocity(self):
+        """After a few detections every track coasts along its own velocity"""
+        kalman_filter = KeypointKalmanFilter()
+        velocities = {1: (8, 0), 2: (-5, 3), 3: (0, 0)}
+        start = {1: (200, 300), 2: (900, 200), 3: (600, 500)}
+        position = lambda track_id, t: self.person(*(np.add(start[track_id], np.multiply(velocities[track_id], t))))
+
+        kalman_filter.add([1, 2, 3], [position(track_id, 0) for track_id in (1, 2, 3)])
+        for t in range(1, 15):
+            kalman_filter.predict()
+            kalman_filter.update([1, 2, 3], [position(track_id, t) for track_id in (1, 2, 3)])
+
+        kalman_filter.remove([3])
+        self.assertEqual(kalman_filter.ids, [1, 2])
+        for t in range(15, 25):
+            kalman_filter.predict()
+
+        predicted = kalman_filter.landmarks([2, 1])
+        self.assertEqual(predicted.shape, (2, 33, 4))
+        for landmarks, track_id in zip(predicted, (2, 1)):
+            error = np.abs((landmarks[:, :2] - position(track_id, 24)[:, :2]) * (1280, 720)).max()
+            self.assertLess(error, 5.0, track_id)
+
+    def test_hidden_keypoints_keep_prediction(self):
+        """Landmarks below the visibility threshold do not move their point"""
+        kalman_filter = KeypointKalmanFilter()
+        kalman_filter.add([7], [self.person(300, 300)])
+        moved = self.person(310, 300)
+        moved[:, 3] = 0.0
+        kalman_filter.predict()
+        kalman_filter.update([7], [moved])
+        np.testing.assert_allclose(kalman_filter.landmarks()[0, :, :2], self.person(300, 300)[:, :2], atol=1e-6)
+
+    def test_ids_survive_crossing_occlusion(self):
+        """A person hidden while walking past another one comes back with their own id"""
+        def walk(predict_motion):
+            tracking_service = TrackingService(predict_motion=predict_motion)
+            ids = {"a": set(), "b": set()}
+            for t in range(70):
+                detections = [{'keypoints': self.person(1000 - 8 * t, 360), 'name': "b"}]
+                # a walks right and is hidden behind b for 20 frames as they pass
+                if not 35 <= t < 55:
+                    detections.append({'keypoints': self.person(300 + 8 * t, 380), 'name': "a"})
+                tracked = tracking_service.update(detections, self.frame)
+                for tracked_person in tracked:
+                    if tracked_person['disappeared_count'] == 0:
+                        ids[tracked_person['keypoints']['name']].add(tracked_person['id'])
+                    elif predict_motion and 45 <= t < 55:
+                        # The hidden person is reported where the prediction puts them
+                        self.assertTrue(tracked_person['keypoints']['predicted'])
+                        predicted_x = tracked_person['keypoints']['keypoints'][:, 0].mean() * 1280
+                        self.assertAlmostEqual(predicted_x, self.shape[:, 0].mean() + 300 + 8 * t, delta=10)
+            return ids
+
+        self.assertEqual(walk(predict_motion=True), {"a": {2}, "b": {1}})
+        self.assertNotEqual(walk(predict_motion=False)["a"], {2})
+
+
+if __name__ == '__main__':
+    unittest.main()
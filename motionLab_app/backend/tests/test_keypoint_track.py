@@ -0,0 +1,262 @@
+"""
+Test Scenario 1: Pose Estimation and 3D Conversion
+Test Case TC12: Verify clip keypoints are collected into preallocated arrays
+"""
+
+import unittest
+import os
+import sys
+import tempfile
+import cv2
+import numpy as np
+import mediapipe as mp
+
+# Add the parent directory to the path so we can import from utils
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.keypoint_track import KeypointTrack
+from utils.pose_utils import PoseUtils
+
+
+class KeypointTrackTest(unittest.TestCase):
+    """Test case for KeypointTrack and the array-based keypoint pipeline"""
+
+    def test_append_grows_and_keeps_frames(self):
+        """Appending past the capacity doubles the buffers without losing frames"""
+        rng = np.random.default_rng(0)
+        track = KeypointTrack(capacity=2)
+        frames = []
+        for i in range(5):
+            landmarks = None if i == 2 else rng.random((33, 4))
+            keypoints = rng.random((25, 3))
+            track.append(keypoints, keypoints, landmarks, frame_index=10 + i)
+            frames.append((keypoints, landmarks))
+
+        self.assertEqual(len(track), 5)
+        self.assertEqual(track.capacity, 8)
+        self.assertEqual(track.keypoints.shape, (5, 25, 3))
+        self.assertEqual(track.landmarks.dtype, np.float32)
+        np.testing.assert_array_equal(track.valid, [True, True, False, True, True])
+        np.testing.assert_array_equal(track.frame_indices, [10, 11, 12, 13, 14])
+        np.testing.assert_array_equal(track.landmarks[2], 0)
+        for i, (keypoints, landmarks) in enumerate(frames):
+            np.testing.assert_allclose(track.keypoints[i], keypoints, rtol=1e-6)
+            if landmarks is not None:
+                np.testing.assert_allclose(track.landmarks[i], landmarks, rtol=1e-6)
+
+    def test_root_keypoints_fill_missing_frames(self):
+        """Frames without a pose repeat the previous root, starting from the origin"""
+        landmarks = np.zeros((4, 33, 4), dtype=np.float32)
+        landmarks[1, [11, 12, 23, 24, 25, 26], :3] = np.arange(18).reshape(6, 3)
+        valid = np.array([False, True, False, True])
+
+        roots = PoseUtils.get_root_keypoints(landmarks, valid)
+        np.testing.assert_array_equal(roots, [[0.0, 0.0, 0.0], [7.5, 8.5, 9.5], [7.5, 8.5, 9.5], [0.0, 0.0, 0.0]])
+
+    def test_root_keypoints_match_per_frame_loop(self):
+        """The vectorized forward fill should give the per-frame loop's trajectory"""
+        rng = np.random.default_rng(1)
+        landmarks = rng.random((500, 33, 4)).astype(np.float32)
+        valid = rng.random(500) > 0.3
+        valid[:3] = False
+
+        expected, previous = [], np.zeros(3)
+        for frame_landmarks, frame_valid in zip(landmarks, valid):
+            if frame_valid:
+                previous = frame_landmarks[[11, 12, 23, 24, 25, 26], :3].astype(np.float64).mean(axis=0)
+            expected.append(previous)
+
+        np.testing.assert_array_equal(PoseUtils.get_root_keypoints(landmarks, valid), expected)
+        self.assertEqual(PoseUtils.get_root_keypoints(landmarks[:0], valid[:0]).shape, (0, 3))
+
+    def test_root_smoothing_reduces_jitter(self):
+        """Both smoothers should cut frame-to-frame jitter and keep the leading placeholder frames"""
+        rng = np.random.default_rng(2)
+        n_frames = 300
+        path = np.stack([np.linspace(0.2, 0.8, n_frames), np.full(n_frames, 0.5), np.zeros(n_frames)], axis=1)
+        landmarks = np.zeros((n_frames, 33, 4), dtype=np.float32)
+        landmarks[:, :, :3] = path[:, None] + rng.normal(scale=0.01, size=(n_frames, 33, 3))
+        valid = np.ones(n_frames, dtype=bool)
+        valid[:10] = False
+
+        raw = PoseUtils.get_root_keypoints(landmarks, valid)
+        for smoothing in ("savgol", "one_euro"):
+            smoothed = PoseUtils.get_root_keypoints(landmarks, valid, smoothing=smoothing, fps=30)
+            np.testing.assert_array_equal(smoothed[:10], 0)
+            raw_jitter = np.abs(np.diff(raw[10:, :2], n=2, axis=0)).mean()
+            smoothed_jitter = np.abs(np.diff(smoothed[10:, :2], n=2, axis=0)).mean()
+            self.assertLess(smoothed_jitter, 0.5 * raw_jitter, smoothing)
+            self.assertLess(np.abs(smoothed[10:, :2] - path[10:, :2]).mean(), 0.01, smoothing)
+
+        with self.assertRaises(ValueError):
+            PoseUtils.get_root_keypoints(landmarks, valid, smoothing="kalman")
+
+    def test_sample_frames_by_stride_and_motion(self):
+        """Sampling keeps the first and last frames, and motion only triggers detection on moving frames"""
+        def reused_buffer(values):
+            # Like a FrameReader, every frame is written into the same array
+            frame = np.zeros((36, 64, 3), dtype=np.uint8)
+            for value in values:
+                frame[:] = value
+                yield frame
+
+        picked = [(i, int(frame[0, 0, 0])) for i, frame in PoseUtils.sample_frames(reused_buffer(range(10)), stride=4)]
+        self.assertEqual(picked, [(0, 0), (4, 4), (8, 8), (9, 9)])
+        picked = [i for i, _ in PoseUtils.sample_frames(reused_buffer(range(9)), stride=4, start=20)]
+        self.assertEqual(picked, [20, 24, 28])
+        self.assertEqual(len(list(PoseUtils.sample_frames(reused_buffer(range(5))))), 5)
+
+        values = [0, 0, 0, 50, 50, 50, 50, 50, 50, 50, 50, 50]
+        picked = [i for i, _ in PoseUtils.sample_frames(reused_buffer(values), stride=4, motion_threshold=10)]
+        self.assertEqual(picked, [0, 3, 7, 11])
+
+    def test_interpolate_skipped_frames(self):
+        """Frames between detections are interpolated, frames next to a missed detection copy the nearer one"""
+        track = KeypointTrack(4)
+        for frame_index, value, detected in [(0, 0.0, True), (4, 4.0, True), (8, 0.0, False), (10, 10.0, True)]:
+            keypoints = np.full((25, 3), value if detected else 0.0)
+            track.append(keypoints, keypoints, np.full((33, 4), value) if detected else None, frame_index)
+
+        full = track.interpolate(np.arange(12))
+        np.testing.assert_array_equal(full.frame_indices, np.arange(12))
+        np.testing.assert_allclose(full.keypoints[:, 0, 0], [0, 1, 2, 3, 4, 4, 4, 0, 0, 0, 10, 10])
+        np.testing.assert_allclose(full.landmarks[:5, 0, 0], [0, 1, 2, 3, 4])
+        np.testing.assert_array_equal(full.valid, [True] * 7 + [False] * 3 + [True] * 2)
+        self.assertEqual(len(KeypointTrack().interpolate(np.arange(3))), 3)
+
+    def test_fill_keypoint_gaps(self):
+        """Missed frames and weak joints are filled from their neighbours instead of reaching the lifter as zeros"""
+        n_frames = 40
+        path = np.stack([np.linspace(100, 490, n_frames), 200 + 50 * np.sin(np.linspace(0, 3, n_frames))], axis=1)
+        keypoints = np.repeat(path[:, None], 25, axis=1)
+        keypoints = np.concatenate([keypoints, np.ones((n_frames, 25, 1))], axis=2)
+        confidence = np.full((n_frames, 25), 0.9)
+        missed = [0, 1, 10, 11, 12, 13, 30]
+        keypoints[missed] = 0
+        confidence[missed] = 0
+        confidence[20:23, 4] = 0.2
+
+        for method in ("linear", "spline"):
+            points, known, metrics = PoseUtils.fill_keypoint_gaps(keypoints, confidence, method=method)
+            self.assertFalse(known[missed].any())
+            self.assertFalse(known[20:23, 4].any())
+            np.testing.assert_array_equal(points[known], keypoints[known][:, :2])
+            np.testing.assert_allclose(points[2:, :], path[2:, None].repeat(25, axis=1), atol=1.0 if method == "spline" else 3.0)
+            np.testing.assert_array_equal(points[:2], points[[2, 2]])
+            self.assertEqual(metrics, {
+                "frames": n_frames, "filled_frames": 10, "missing_frames": 7, "filled_joints": 7 * 25 + 3, "longest_gap": 4
+            })
+
+        # A joint that is never confident is filled from the frames where it was detected at all
+        confidence[:, 7] = 0.3
+        points, known, _ = PoseUtils.fill_keypoint_gaps(keypoints, confidence)
+        np.testing.assert_array_equal(known[:, 7], confidence[:, 7] > 0)
+        with self.assertRaises(ValueError):
+            PoseUtils.fill_keypoint_gaps(keypoints, confidence, method="cubic")
+
+    def test_confidence_weighted_smoothing(self):
+        """Smoothing pulls an uncertain outlier back to its confident neighbours and keeps a confident one"""
+        points = np.zeros((30, 2, 2))
+        points[15] = 20.0
+        weights = np.ones((30, 2))
+        weights[15, 0] = 0.01
+        smoothed = PoseUtils.smooth_keypoints(points, weights, fps=30, sigma_seconds=0.05)
+        self.assertLess(smoothed[15, 0, 0], 1.0)
+        self.assertGreater(smoothed[15, 1, 0], 5.0)
+        np.testing.assert_array_equal(PoseUtils.smooth_keypoints(points, weights, fps=30, sigma_seconds=0), points)
+
+        landmarks = np.zeros((2, 33, 4))
+        landmarks[:, :, 3] = np.linspace(0, 1, 33)
+        confidence = PoseUtils.keypoint_confidence(landmarks, [True, False])
+        self.assertEqual(confidence.shape, (2, 25))
+        np.testing.assert_allclose(confidence[0, 1], (landmarks[0, 11, 3] + landmarks[0, 12, 3]) / 2)
+        np.testing.assert_array_equal(confidence[1], 0)
+
+    def test_keypoints_from_video(self):
+        """get_keypoints_list fills one entry per frame of a real video"""
+        image_path = os.path.join(os.path.dirname(__file__), 'visualizations', 'TC_06.jpg')
+        image = cv2.imread(image_path)
+        if image is None:
+            self.skipTest("Test image not available")
+        height, width = image.shape[:2]
+        blank = np.zeros_like(image)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            video_path = os.path.join(tmp_dir, 'clip.avi')
+            writer = cv2.VideoWriter(video_path, cv2.VideoWriter_fourcc(*'MJPG'), 10, (width, height))
+            for i in range(6):
+                writer.write(blank if i == 3 else image)
+            writer.release()
+
+            cap = cv2.VideoCapture(video_path)
+            with mp.solutions.pose.Pose(static_image_mode=True) as pose_model:
+                track = PoseUtils.get_keypoints_list(cap, pose_model, width, height)
+            cap.release()
+
+        self.assertEqual(len(track), 6)
+        self.assertEqual(track.capacity, 6)
+        self.assertTrue(track.valid.any())
+        self.assertFalse(track.valid[3])
+        self.assertTrue(np.all(track.keypoints[track.valid, :, 2] == 1.0))
+        np.testing.assert_array_equal(track.keypoints[~track.valid], 0)
+
+    def test_keypoints_in_source_pixels_after_downscaling(self):
+        """Downsampled frames and person crops both give keypoints in source pixel coordinates"""
+        image_path = os.path.join(os.path.dirname(__file__), 'visualizations', 'TC_06.jpg')
+        image = cv2.imread(image_path)
+        if image is None:
+            self.skipTest("Test image not available")
+        image = cv2.resize(image, (1280, 720))
+        large = cv2.resize(image, (3840, 2160))
+
+        with mp.solutions.pose.Pose(static_image_mode=True) as pose_model:
+            keypoints, _, landmarks = PoseUtils.process_frame(image, pose_model, 1280, 720)
+            large_keypoints, _, large_landmarks = PoseUtils.process_frame(large, pose_model, 3840, 2160)
+
+        self.assertIsNotNone(landmarks)
+        self.assertIsNotNone(large_landmarks)
+        self.assertLess(np.abs(large_keypoints[:, :2] / 3 - keypoints[:, :2]).mean(), 3.0)
+
+        # A crop around the person maps back to the same frame coordinates
+        x1, y1 = keypoints[:, :2].min(axis=0) - 20
+        x2, y2 = keypoints[:, :2].max(axis=0) + 20
+        with mp.solutions.pose.Pose(static_image_mode=True) as pose_model:
+            crop_keypoints, _, crop_landmarks = PoseUtils.process_frame(
+                image, pose_model, 1280, 720, box=(int(x1), int(y1), int(x2), int(y2))
+            )
+        self.assertIsNotNone(crop_landmarks)
+        self.assertLess(np.abs(crop_keypoints[:, :2] - keypoints[:, :2]).mean(), 10.0)
+        self.assertLess(np.abs(crop_landmarks[:, :2] - landmarks[:, :2]).mean(), 0.01)
+
+    def test_chunks_stitch_back_in_order(self):
+        """Chunks read with a warm-up overlap should concatenate into one track of the whole clip"""
+        self.assertEqual(PoseUtils.split_frame_range(10, 3), [(0, 3), (3, 7), (7, 10)])
+        self.assertEqual(PoseUtils.split_frame_range(2, 4), [(0, 1), (1, 2)])
+
+        image_path = os.path.join(os.path.dirname(__file__), 'visualizations', 'TC_06.jpg')
+        image = cv2.imread(image_path)
+        if image is None:
+            self.skipTest("Test image not available")
+        image = cv2.resize(image, (320, 180))
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            video_path = os.path.join(tmp_dir, 'clip.avi')
+            writer = cv2.VideoWriter(video_path, cv2.VideoWriter_fourcc(*'MJPG'), 10, (320, 180))
+            for _ in range(12):
+                writer.write(image)
+            writer.release()
+
+            chunks = [
+                PoseUtils.get_keypoint_chunk(video_path, start, end, 320, 180, warmup_frames=3)
+                for start, end in [(0, 5), (5, None)]
+            ]
+
+        track = KeypointTrack.concatenate(chunks)
+        self.assertEqual([len(chunk) for chunk in chunks], [5, 7])
+        np.testing.assert_array_equal(track.frame_indices, np.arange(12))
+        np.testing.assert_array_equal(track.keypoints[5:], chunks[1].keypoints)
+        np.testing.assert_array_equal(track.valid, np.concatenate([chunk.valid for chunk in chunks]))
+
+
+if __name__ == '__main__':
+    unittest.main()
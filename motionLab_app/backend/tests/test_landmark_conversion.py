@@ -0,0 +1,95 @@
+"""
+Test Scenario 1: Pose Estimation and 3D Conversion
+Test Case TC11: Verify the vectorized MediaPipe landmark conversion matches the per-landmark copy
+"""
+
+import unittest
+import os
+import sys
+import numpy as np
+from mediapipe.framework.formats import landmark_pb2
+
+# Add the parent directory to the path so we can import from utils
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.pose_utils import PoseUtils
+
+
+class LandmarkConversionTest(unittest.TestCase):
+    """Test case for PoseUtils.landmarks_to_array, landmarks_to_openpose and the COCO keypoint mapping"""
+
+    def setUp(self):
+        self.rng = np.random.default_rng(0)
+
+    def make_landmarks(self, presence=True):
+        landmark_list = landmark_pb2.NormalizedLandmarkList()
+        for x, y, z, visibility, landmark_presence in self.rng.normal(size=(33, 5)):
+            landmark = landmark_list.landmark.add(x=x, y=y, z=z, visibility=visibility)
+            if presence:
+                landmark.presence = landmark_presence
+        return landmark_list
+
+    def test_array_matches_landmark_attributes(self):
+        """Messages and their repeated landmark field should read the same values as the attributes"""
+        for landmark_list in (self.make_landmarks(), self.make_landmarks(presence=False)):
+            expected = np.array([[lm.x, lm.y, lm.z, lm.visibility] for lm in landmark_list.landmark])
+            np.testing.assert_array_equal(PoseUtils.landmarks_to_array(landmark_list), expected)
+            np.testing.assert_array_equal(PoseUtils.landmarks_to_array(landmark_list.landmark), expected)
+
+    def test_unset_fields_and_empty_lists(self):
+        """Landmarks with unset fields and empty messages should still convert correctly"""
+        landmark_list = self.make_landmarks()
+        landmark_list.landmark[5].ClearField('visibility')
+        landmark_list.landmark[7].ClearField('presence')
+
+        result = PoseUtils.landmarks_to_array(landmark_list)
+        self.assertEqual(result[5, 3], 0.0)
+        self.assertEqual(result[7, 0], landmark_list.landmark[7].x)
+        self.assertEqual(PoseUtils.landmarks_to_array(landmark_pb2.NormalizedLandmarkList()).shape, (0, 4))
+
+    def test_openpose_mapping(self):
+        """Every OpenPose joint comes from its MediaPipe landmark, the neck and mid-hip from midpoints"""
+        landmarks = self.make_landmarks()
+        landmark_array = PoseUtils.landmarks_to_array(landmarks)
+        openpose = PoseUtils.landmarks_to_openpose(landmark_array)
+
+        self.assertEqual(openpose.shape, (25, 4))
+        for mp_idx, openpose_idx in PoseUtils.mediapipe_to_openpose.items():
+            np.testing.assert_array_equal(openpose[openpose_idx], landmark_array[mp_idx])
+
+        neck = PoseUtils.interpolate_joint(landmarks.landmark[11], landmarks.landmark[12])
+        mid_hip = PoseUtils.interpolate_joint(landmarks.landmark[23], landmarks.landmark[24])
+        np.testing.assert_array_equal(openpose[1, :3], neck)
+        np.testing.assert_array_equal(openpose[8, :3], mid_hip)
+        np.testing.assert_array_equal(openpose[21], openpose[14])
+        np.testing.assert_array_equal(openpose[24], openpose[11])
+
+    def test_coco_mapping(self):
+        """YOLO pose keypoints land on the same OpenPose joints as the matching MediaPipe landmarks"""
+        coco = np.column_stack([self.rng.uniform(0, 1280, 17), self.rng.uniform(0, 720, 17), self.rng.random(17)])
+        openpose = PoseUtils.coco_to_openpose(coco)
+        landmarks = PoseUtils.coco_to_landmarks(coco, 1280, 720)
+
+        self.assertEqual(openpose.shape, (25, 3))
+        self.assertEqual(landmarks.shape, (33, 4))
+        np.testing.assert_allclose(openpose[1, :2], (coco[5, :2] + coco[6, :2]) / 2)
+        np.testing.assert_allclose(openpose[8, :2], (coco[11, :2] + coco[12, :2]) / 2)
+        self.assertEqual(openpose[1, 2], min(coco[5, 2], coco[6, 2]))
+        np.testing.assert_array_equal(openpose[19:22], openpose[[14, 14, 14]])
+        np.testing.assert_array_equal(openpose[22:25], openpose[[11, 11, 11]])
+
+        # Every landmark behind an OpenPose joint is filled, so its confidence is the COCO one
+        confidence = PoseUtils.keypoint_confidence(landmarks[None], [True])[0]
+        joints = [joint for joint in range(25) if joint not in (1, 8)]
+        np.testing.assert_allclose(confidence[joints], openpose[joints, 2])
+        np.testing.assert_allclose(PoseUtils.landmarks_to_openpose(landmarks)[joints, :2] * (1280, 720), openpose[joints, :2])
+
+        # Body and face joints agree with the MediaPipe path run on the filled landmarks,
+        # except the wrists, which that path takes from the pinky landmarks
+        from_landmarks = PoseUtils.landmarks_to_openpose(landmarks)[:, :2] * (1280, 720)
+        joints = [joint for joint in range(19) if joint not in (4, 7)]
+        np.testing.assert_allclose(from_landmarks[joints], openpose[joints, :2])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+"""
+Test Scenario 2: Video Processing
+Test Case TC20: Verify pipeline models stay warm across request threads
+"""
+
+import unittest
+import os
+import sys
+import threading
+from types import SimpleNamespace
+from unittest import mock
+
+# Add the parent directory to the path so we can import from utils
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.model_registry import ModelRegistry
+
+
+class ModelRegistryTest(unittest.TestCase):
+    """Test case for the YOLO and MediaPipe Pose pools of ModelRegistry"""
+
+    def in_thread(self, function):
+        """Runs a function on a new thread that exits afterwards, like a Flask request"""
+        result = []
+        thread = threading.Thread(target=lambda: result.append(function()))
+        thread.start()
+        thread.join()
+        return result[0]
+
+    def test_yolo_outlives_request_threads(self):
+        """A released YOLO model is reused by later threads and lent to one caller at a time"""
+        tracker = SimpleNamespace(reset=mock.Mock())
+        loads = []
+
+        def load(model_path):
+            loads.append(model_path)
+            return SimpleNamespace(predictor=SimpleNamespace(trackers=[tracker]))
+
+        def request():
+            model = ModelRegistry.acquire_yolo("registry-test.pt")
+            ModelRegistry.release_yolo(model)
+            return model
+
+        with mock.patch('ultralytics.YOLO', side_effect=load):
+            first = self.in_thread(request)
+            second = self.in_thread(request)
+            self.assertIs(first, second)
+            self.assertEqual(loads, ["registry-test.pt"])
+            tracker.reset.assert_called_once()
+
+            # Two videos tracked at the same time never share a model
+            busy = ModelRegistry.acquire_yolo("registry-test.pt")
+            other = self.in_thread(lambda: ModelRegistry.acquire_yolo("registry-test.pt"))
+            self.assertIsNot(busy, other)
+            ModelRegistry.release_yolo(busy)
+            ModelRegistry.release_yolo(other)
+            self.assertEqual(len(loads), 2)
+
+    def test_pose_graphs_outlive_request_threads(self):
+        """A released Pose graph is reset and reused by later threads"""
+        options = {"static_image_mode": True}
+        pose_model = self.in_thread(lambda: ModelRegistry.acquire_pose_model(**options))
+        self.in_thread(lambda: ModelRegistry.release_pose_model(pose_model))
+        self.assertIs(self.in_thread(lambda: ModelRegistry.acquire_pose_model(**options)), pose_model)
+        ModelRegistry.release_pose_model(pose_model)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+"""
+Test Scenario 2: Pose Estimation and 3D Conversion
+Test Case TC18: Verify batched occlusion analysis of whole sequences
+"""
+
+import unittest
+import os
+import sys
+import json
+from types import SimpleNamespace
+import numpy as np
+
+# Add the parent directory to the path so we can import from services
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.error_handling_service import ErrorHandlingService
+from utils.pose_utils import PoseUtils
+
+
+class OcclusionAnalysisTest(unittest.TestCase):
+    """Test case for ErrorHandlingService.analyze_sequence and its occlusion reports"""
+
+    def setUp(self):
+        self.error_service = ErrorHandlingService()
+        rng = np.random.default_rng(0)
+        # Visibility drawn around the threshold so every occlusion rule gets exercised
+        self.landmarks = rng.uniform(0, 1, (200, 33, 4)).astype(np.float32)
+        self.landmarks[..., 3] = rng.uniform(0.2, 1.0, (200, 33)) ** rng.uniform(0.3, 2.0, (200, 1))
+        self.valid = rng.random(200) > 0.1
+        self.confidence = rng.uniform(0.2, 1.0, 200)
+
+    def test_matches_per_frame_check(self):
+        """Every frame of the batched analysis gives the same result as check_occlusion"""
+        analysis = self.error_service.analyze_sequence(self.landmarks, self.valid, self.confidence)
+        self.assertEqual(analysis['visible'].shape, (200, 33))
+        self.assertEqual(set(analysis['reason']),
+                         {'', 'no_detection', 'partial_occlusion', 'essential_occluded', 'low_confidence'})
+
+        for frame in range(200):
+            keypoints_data = {
+                'has_pose': bool(self.valid[frame]),
+                'keypoints': self.landmarks[frame],
+                'confidence': self.confidence[frame],
+            }
+            expected = self.error_service.check_occlusion(keypoints_data)
+            self.assertEqual(self.error_service._frame_result(analysis, frame), expected)
+            self.assertEqual(analysis['severity'][frame], expected['severity'])
+            self.assertEqual(analysis['occluded'][frame], expected['occlusion_detected'])
+
+    def test_mediapipe_results(self):
+        """Raw MediaPipe results are checked by the same rules, without a confidence"""
+        landmarks = self.landmarks[0].copy()
+        landmarks[:, 3] = 0.9
+        landmarks[[11, 12, 13, 14], 3] = 0.1
+        results = SimpleNamespace(pose_landmarks=SimpleNamespace(landmark=[
+            SimpleNamespace(x=x, y=y, z=z, visibility=visibility) for x, y, z, visibility in landmarks
+        ]))
+
+        result = self.error_service.check_occlusion(results)
+        self.assertEqual(result['message'], "Essential body parts occluded (4 missing)")
+        self.assertEqual(result['details']['missing_essential'], [11, 12, 13, 14])
+        self.assertFalse(self.error_service.check_occlusion(SimpleNamespace(pose_landmarks=None))['occlusion_detected'])
+
+    def test_occlusion_intervals(self):
+        """Consecutive occluded frames are summarized as intervals in source frame indices"""
+        landmarks = np.zeros((30, 33, 4), dtype=np.float32)
+        landmarks[..., 3] = 0.9
+        landmarks[5:9, :20, 3] = 0.1  # partially occluded
+        landmarks[7, :, 3] = 0.0
+        landmarks[20:22, [0, 11, 12, 13], 3] = 0.0  # essential parts hidden
+        valid = np.ones(30, dtype=bool)
+        valid[29] = False
+
+        report = self.error_service.quality_report(landmarks, valid, frame_indices=np.arange(100, 130), fps=10)
+        self.assertEqual(report['frames'], 30)
+        self.assertEqual(report['occluded_frames'], 7)
+        self.assertEqual(report['occluded_percentage'], 23.3)
+        self.assertEqual(report['intervals'], [
+            {'start_frame': 105, 'end_frame': 108, 'start_time': 10.5, 'duration': 0.4, 'severity': 'medium',
+             'reasons': ['partial_occlusion'], 'min_visibility_percentage': 0.0},
+            {'start_frame': 120, 'end_frame': 121, 'start_time': 12.0, 'duration': 0.2, 'severity': 'medium',
+             'reasons': ['essential_occluded'], 'min_visibility_percentage': 87.9},
+            {'start_frame': 129, 'end_frame': 129, 'start_time': 12.9, 'duration': 0.1, 'severity': 'high',
+             'reasons': ['no_detection'], 'min_visibility_percentage': 0.0},
+        ])
+        # The report is stored as JSON on the processing job
+        self.assertEqual(json.loads(json.dumps(report)), report)
+
+        self.assertEqual(self.error_service.quality_report(np.zeros((0, 33, 4)))['intervals'], [])
+
+    def test_coco_track(self):
+        """A YOLO track is only checked on the landmarks its COCO keypoints fill"""
+        coco = np.zeros((40, 17, 3))
+        coco[..., :2] = self.landmarks[:40, :17, :2] * (1280, 720)
+        coco[..., 2] = 0.9
+        coco[:, [1, 3, 4], 2] = 0.3  # one eye and both ears are usually uncertain
+        coco[10:15, 5:14, 2] = 0.2  # the body is hidden for a few frames
+        coco[25:30, [9, 15, 16], 2] = 0.4  # a wrist and the feet are uncertain, but the body is seen
+        landmarks = np.stack([PoseUtils.coco_to_landmarks(points, 1280, 720) for points in coco])
+
+        # Counted against all 33 landmarks, the uncertain wrist and feet look like an occlusion
+        self.assertEqual(self.error_service.quality_report(landmarks)['occluded_frames'], 10)
+
+        report = self.error_service.quality_report(landmarks, landmark_indices=PoseUtils.coco_to_mediapipe)
+        self.assertEqual(report['occluded_frames'], 5)
+        self.assertEqual(report['mean_visibility_percentage'], 73.5)
+        self.assertEqual([(interval['start_frame'], interval['end_frame'], interval['reasons'])
+                          for interval in report['intervals']], [(10, 14, ['partial_occlusion'])])
+
+        result = self.error_service._frame_result(
+            self.error_service.analyze_sequence(landmarks, landmark_indices=PoseUtils.coco_to_mediapipe), 12
+        )
+        self.assertEqual(result['message'], "Person partially occluded (29.4% visible)")
+        self.assertEqual(result['details']['total_keypoints'], 17)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,173 @@
+"""
+Test Scenario 1: Pose Estimation and 3D Conversion
+Test Case TC10: Verify sequence inference of the 3D estimator matches windowed inference
+"""
+
+import unittest
+import copy
+import json
+import os
+import sys
+import tempfile
+import numpy as np
+import torch
+import yaml
+from easydict import EasyDict
+
+# Add the parent directory to the path so we can import from utils
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.pose_estimator_3d.estimator_3d import Estimator3D
+from utils.pose_estimator_3d.model.video_pose import VideoPose
+from utils.pose_estimator_3d.model.module import convs_to_linear
+from utils.pose_estimator_3d.exported_estimator_3d import ExportedEstimator3D
+from scripts.export_pose_model import export_model
+
+
+def create_test_estimator(hidden_size=64):
+    """
+    Builds an Estimator3D around a randomly initialised VideoPose model with the
+    production config, since the checkpoint is not part of the repository.
+    """
+    config_file = os.path.join(os.path.dirname(__file__), '..', 'utils', 'video_pose.yaml')
+    with open(config_file) as f:
+        cfg = EasyDict(yaml.load(f, Loader=yaml.Loader))
+
+    torch.manual_seed(0)
+    model = VideoPose(
+        in_joint=cfg.DATASET.IN_JOINT,
+        in_channel=cfg.DATASET.IN_CHANNEL,
+        out_joint=cfg.DATASET.OUT_JOINT,
+        out_channel=cfg.DATASET.OUT_CHANNEL,
+        filter_widths=cfg.MODEL.FILTER_WIDTHS,
+        hidden_size=hidden_size,
+        dropout=cfg.MODEL.DROPOUT,
+        dsc=cfg.MODEL.DSC
+    )
+    randomize_batch_norms(model)
+
+    return Estimator3D.from_model(cfg, model, test_flip=True, precision='float32')
+
+
+def randomize_batch_norms(model):
+    """Gives the batch norms non-trivial statistics so they take part in the comparisons"""
+    for module in model.modules():
+        if isinstance(module, torch.nn.BatchNorm1d):
+            module.running_mean.uniform_(-0.5, 0.5)
+            module.running_var.uniform_(0.5, 1.5)
+            module.weight.data.uniform_(0.5, 1.5)
+            module.bias.data.uniform_(-0.1, 0.1)
+
+
+class PoseEstimator3DTest(unittest.TestCase):
+    """Test case for the streaming VideoPose3D inference"""
+
+    def setUp(self):
+        self.estimator = create_test_estimator()
+        rng = np.random.default_rng(0)
+        self.image_width, self.image_height = 1280, 720
+
+        # Smooth random trajectories around a standing pose, in pixels
+        n_frames = 300
+        base = rng.uniform([400, 100], [880, 650], size=(25, 2))
+        drift = np.cumsum(rng.normal(scale=2.0, size=(n_frames, 25, 2)), axis=0)
+        self.poses_2d = base[None] + drift
+
+    def test_sequence_matches_windowed(self):
+        """Running the padded sequence through the model once should give the windowed result"""
+        expected = self.estimator.estimate_windowed(self.poses_2d, self.image_width, self.image_height)
+        result = self.estimator.estimate_sequence(self.poses_2d, self.image_width, self.image_height)
+
+        self.assertEqual(result.shape, expected.shape)
+        np.testing.assert_allclose(result, expected, atol=1e-2)
+
+    def test_chunked_sequence_matches_single_pass(self):
+        """Chunks must overlap by the receptive field so their seams are invisible"""
+        single = self.estimator.estimate_sequence(self.poses_2d, self.image_width, self.image_height)
+        chunked = self.estimator.estimate_sequence(
+            self.poses_2d, self.image_width, self.image_height, chunk_size=64
+        )
+        np.testing.assert_allclose(chunked, single, atol=1e-2)
+
+    def test_sequence_shorter_than_receptive_field(self):
+        """Clips shorter than one window are padded the same way as in the windowed path"""
+        short = self.poses_2d[:10]
+        expected = self.estimator.estimate_windowed(short, self.image_width, self.image_height)
+        result = self.estimator.estimate_sequence(short, self.image_width, self.image_height)
+        np.testing.assert_allclose(result, expected, atol=1e-2)
+
+    def test_convs_as_linear_match_convolutions(self):
+        """The Linear rewrite used for int8 quantization must compute the same convolutions"""
+        model = self.estimator.model
+        rewritten = convs_to_linear(copy.deepcopy(model)).eval()
+        x = torch.randn(1, 400, 25, 2)
+        with torch.no_grad():
+            np.testing.assert_allclose(
+                rewritten.forward_sequence(x).numpy(), model.forward_sequence(x).numpy(), atol=1e-4
+            )
+
+    def test_fused_batch_norm_matches_unfused_model(self):
+        """Folding the batch norms into the convolutions must not change the predictions"""
+        depthwise_model = VideoPose(
+            in_joint=25, in_channel=2, out_joint=17, out_channel=3,
+            filter_widths=[3, 3, 3], hidden_size=32, dropout=0.25, dsc=True
+        )
+        randomize_batch_norms(depthwise_model)
+
+        for model in (self.estimator.model, depthwise_model.eval()):
+            fused = copy.deepcopy(model).fuse_bn()
+            self.assertFalse(any(isinstance(m, torch.nn.BatchNorm1d) for m in fused.modules()))
+
+            x = torch.randn(2, 2 * model.eval_model.receptive_field(), 25, 2)
+            with torch.no_grad():
+                np.testing.assert_allclose(
+                    fused.forward_sequence(x).numpy(), model.forward_sequence(x).numpy(), atol=1e-4
+                )
+
+    def test_precision_and_flip_options(self):
+        """bfloat16/int8 and flip-off modes should stay close to the float32 + flip output"""
+        baseline = self.estimator.estimate_sequence(self.poses_2d, self.image_width, self.image_height)
+        for precision in ('bfloat16', 'int8'):
+            result = self.estimator.estimate_sequence(
+                self.poses_2d, self.image_width, self.image_height, precision=precision
+            )
+            drift = np.linalg.norm(result - baseline, axis=-1).mean()
+            self.assertLess(drift, 0.05 * np.linalg.norm(baseline, axis=-1).mean(), precision)
+
+        no_flip = self.estimator.estimate_sequence(
+            self.poses_2d, self.image_width, self.image_height, test_flip=False
+        )
+        self.assertEqual(no_flip.shape, baseline.shape)
+        self.assertFalse(np.allclose(no_flip, baseline))
+
+    def test_torchscript_export_matches_pytorch_model(self):
+        """The exported TorchScript artifact should reproduce the PyTorch estimator"""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            # Checkpoint and config for the randomly initialised test model
+            checkpoint_file = os.path.join(tmp_dir, 'model.pth')
+            torch.save({'model_state': self.estimator.model.state_dict()}, checkpoint_file)
+            cfg = json.loads(json.dumps(self.estimator.cfg))
+            cfg['MODEL']['HIDDEN_SIZE'] = 64
+            config_file = os.path.join(tmp_dir, 'video_pose.yaml')
+            with open(config_file, 'w') as f:
+                yaml.dump(cfg, f)
+
+            artifact_file = export_model(config_file, checkpoint_file, os.path.join(tmp_dir, 'model.pt'), 'torchscript')
+            exported = ExportedEstimator3D(artifact_file, test_flip=True)
+
+            expected = self.estimator.estimate_sequence(self.poses_2d, self.image_width, self.image_height)
+            result = exported.estimate_sequence(self.poses_2d, self.image_width, self.image_height)
+            np.testing.assert_allclose(result, expected, atol=1e-2)
+
+            short = self.poses_2d[:40]
+            np.testing.assert_allclose(
+                exported.estimate_windowed(short, self.image_width, self.image_height),
+                self.estimator.estimate_windowed(short, self.image_width, self.image_height),
+                atol=1e-2
+            )
+            with self.assertRaises(ValueError):
+                exported.get_model('int8')
+
+
+if __name__ == '__main__':
+    unittest.main()
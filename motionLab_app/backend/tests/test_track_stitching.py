@@ -0,0 +1,107 @@
+"""
+Test Scenario 3: Multi-Person Motion Capture
+Test Case TC17: Verify fragmented tracks of one person are stitched back together by appearance
+"""
+
+import unittest
+import os
+import sys
+import tempfile
+import cv2
+import numpy as np
+
+# Add the parent directory to the path so we can import from services
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.track_stitching_service import TrackStitchingService
+from utils.keypoint_track import KeypointTrack
+
+# BGR colours of the shirt and trousers of each person
+CLOTHES = {"a": ((40, 40, 200), (120, 60, 20)), "b": ((40, 180, 40), (40, 200, 220))}
+
+
+class TrackStitchingTest(unittest.TestCase):
+    """Test case for TrackStitchingService"""
+
+    def setUp(self):
+        # Person a is tracked as 1, lost for a second, then comes back as 3; b is 2 throughout
+        self.timeline = [
+            (frame_index, person_id, name, 100 + 3 * frame_index if name == "a" else 500)
+            for frame_index in range(100)
+            for person_id, name in [(1 if frame_index < 30 else 3, "a"), (2, "b")]
+            if not (name == "a" and 30 <= frame_index < 60)
+        ]
+
+    def draw(self, frame_index):
+        frame = np.full((360, 640, 3), 90, dtype=np.uint8)
+        boxes = {}
+        for index, person_id, name, x in self.timeline:
+            if index != frame_index:
+                continue
+            shirt, trousers = CLOTHES[name]
+            frame[100:200, x:x + 60] = shirt
+            frame[200:300, x:x + 60] = trousers
+            boxes[person_id] = (x - 10, 80, x + 70, 310)
+        return frame, boxes
+
+    def observe(self, stitcher):
+        for frame_index in range(100):
+            frame, boxes = self.draw(frame_index)
+            for person_id, box in boxes.items():
+                stitcher.observe(frame_index, person_id, frame, box)
+
+    def test_stitches_by_appearance_and_time(self):
+        """The two tracklets of a are merged and b stays on its own"""
+        stitcher = TrackStitchingService(fps=30)
+        self.observe(stitcher)
+        self.assertEqual(stitcher.stitch(), [[1, 3], [2]])
+        self.assertLessEqual(stitcher.tracklets[1]['samples'], 6)
+
+        # Too long a gap for the person to still be the same one
+        stitcher = TrackStitchingService(fps=30, max_gap_seconds=0.5)
+        self.observe(stitcher)
+        self.assertEqual(stitcher.stitch(), [[1], [2], [3]])
+
+    def test_merges_keypoint_tracks_over_full_timeline(self):
+        """The merged track covers the lost frames by interpolation"""
+        stitcher = TrackStitchingService(fps=30)
+        self.observe(stitcher)
+
+        people = {person_id: KeypointTrack() for person_id in (1, 2, 3)}
+        for frame_index, person_id, _, x in self.timeline:
+            people[person_id].append(np.full((25, 3), float(x)), None, np.ones((33, 4)), frame_index)
+
+        merged = stitcher.merge_keypoint_tracks(people)
+        self.assertEqual(sorted(merged), [1, 2])
+        np.testing.assert_array_equal(merged[1].frame_indices, np.arange(100))
+        np.testing.assert_allclose(merged[1].keypoints[:, 0, 0], 100 + 3 * np.arange(100), rtol=1e-6)
+        self.assertTrue(merged[1].valid.all())
+        self.assertEqual(len(merged[2]), 100)
+
+    def test_merges_segmented_videos(self):
+        """Fragment videos are joined with black frames for the lost time"""
+        stitcher = TrackStitchingService(fps=30)
+        self.observe(stitcher)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            video_paths = {}
+            for person_id in (1, 2, 3):
+                video_paths[person_id] = os.path.join(tmp_dir, f'person_{person_id}.avi')
+                writer = cv2.VideoWriter(video_paths[person_id], cv2.VideoWriter_fourcc(*'MJPG'), 30, (640, 360))
+                for frame_index, timeline_id, _, _ in self.timeline:
+                    if timeline_id == person_id:
+                        writer.write(self.draw(frame_index)[0])
+                writer.release()
+
+            merged_paths = stitcher.merge_videos(video_paths, tmp_dir, 30, (640, 360))
+            self.assertEqual(len(merged_paths), 2)
+            self.assertEqual(merged_paths[1], video_paths[2])
+            self.assertFalse(os.path.exists(video_paths[1]) or os.path.exists(video_paths[3]))
+
+            cap = cv2.VideoCapture(merged_paths[0])
+            self.assertEqual(int(cap.get(cv2.CAP_PROP_FRAME_COUNT)), 100)
+            cap.release()
+
+
+if __name__ == '__main__':
+    unittest.main()
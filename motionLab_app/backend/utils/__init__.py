@@ -1,5 +1,9 @@
-from utils.video_utils import VideoUtils
+from utils.video_utils import VideoUtils, FrameReader
 from utils.pose_utils import PoseUtils
+from utils.keypoint_track import KeypointTrack
 from utils.bvh_utils import BVHUtils
 from utils.drawing_utils import DrawingUtils
-from utils.object_detection_utils import ObjectDetectionUtils
\ No newline at end of file
+from utils.object_detection_utils import ObjectDetectionUtils
+from utils.model_registry import ModelRegistry
+from utils.association_utils import AssociationUtils, HungarianAssociation, GreedyCentroidAssociation
+from utils.kalman_filter import KeypointKalmanFilter
@@ -0,0 +1,226 @@
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+from utils.pose_utils import PoseUtils
+
+
+class AssociationUtils:
+    # Per-keypoint OKS falloff of the COCO keypoint benchmark, in COCO order
+    # (PoseUtils.coco_to_mediapipe gives the matching MediaPipe landmarks)
+    coco_sigmas = np.array([
+        .26, .25, .25, .35, .35, .79, .79, .72, .72, .62, .62, 1.07, 1.07, .87, .87, .89, .89
+    ]) / 10.0
+
+    # Cost given to infeasible pairs, so the solver never picks them
+    INFEASIBLE_COST = 1e6
+
+    @staticmethod
+    def solve_assignment(cost, feasible, unmatched_cost):
+        """
+        Optimal one-to-one matching of rows to columns where either may also stay unmatched,
+        so an infeasible row does not force the others onto worse partners.
+
+        :param cost: (N, M) matching costs
+        :param feasible: (N, M) mask of the pairs that may be matched
+        :param unmatched_cost: Cost of leaving a row or a column unmatched
+        :return: List of (row, column) pairs
+        """
+        n_rows, n_cols = cost.shape
+
+        # Square problem where every row and every column can instead pair with its own
+        # dummy at unmatched_cost; dummies pair with each other for free
+        padded = np.full((n_rows + n_cols, n_cols + n_rows), AssociationUtils.INFEASIBLE_COST)
+        padded[:n_rows, :n_cols] = np.where(feasible, cost, AssociationUtils.INFEASIBLE_COST)
+        padded[np.arange(n_rows), n_cols + np.arange(n_rows)] = unmatched_cost
+        padded[n_rows + np.arange(n_cols), np.arange(n_cols)] = unmatched_cost
+        padded[n_rows:, n_cols:] = 0.0
+
+        rows, cols = linear_sum_assignment(padded)
+        keep = (rows < n_rows) & (cols < n_cols)
+        rows, cols = rows[keep], cols[keep]
+        keep = feasible[rows, cols]
+        return list(zip(rows[keep].tolist(), cols[keep].tolist()))
+
+    @staticmethod
+    def keypoints_to_pixels(keypoints, frame_width, frame_height, visibility_threshold=0.5):
+        """
+        Converts stacked normalized MediaPipe landmarks to pixels.
+
+        :param keypoints: (N, 33, 4) array of normalized x, y, z and visibility
+        :return: Tuple (points, visible): (N, 33, 2) pixel coordinates and (N, 33) visibility mask
+        """
+        keypoints = np.asarray(keypoints, dtype=np.float64)
+        points = keypoints[:, :, :2] * (frame_width, frame_height)
+        return points, keypoints[:, :, 3] > visibility_threshold
+
+    @staticmethod
+    def boxes_from_points(points, visible):
+        """
+        Bounding box of the visible keypoints of every person, or of all of them when none is visible.
+
+        :param points: (N, K, 2) pixel coordinates
+        :param visible: (N, K) visibility mask
+        :return: (N, 4) boxes as x1, y1, x2, y2
+        """
+        visible = visible | ~visible.any(axis=1, keepdims=True)
+        mins = np.where(visible[:, :, None], points, np.inf).min(axis=1)
+        maxs = np.where(visible[:, :, None], points, -np.inf).max(axis=1)
+        return np.concatenate([mins, maxs], axis=1)
+
+    @staticmethod
+    def box_iou(boxes_a, boxes_b):
+        """
+        Pairwise intersection over union.
+
+        :param boxes_a: (N, 4) boxes as x1, y1, x2, y2
+        :param boxes_b: (M, 4) boxes as x1, y1, x2, y2
+        :return: (N, M) IoU matrix
+        """
+        top_left = np.maximum(boxes_a[:, None, :2], boxes_b[None, :, :2])
+        bottom_right = np.minimum(boxes_a[:, None, 2:], boxes_b[None, :, 2:])
+        intersection = np.clip(bottom_right - top_left, 0, None).prod(axis=2)
+        area_a = (boxes_a[:, 2:] - boxes_a[:, :2]).prod(axis=1)
+        area_b = (boxes_b[:, 2:] - boxes_b[:, :2]).prod(axis=1)
+        union = area_a[:, None] + area_b[None, :] - intersection
+        return np.divide(intersection, union, out=np.zeros_like(intersection), where=union > 0)
+
+    @staticmethod
+    def keypoint_oks(points_a, visible_a, points_b, visible_b, areas):
+        """
+        Object keypoint similarity of pairs of poses on the 17 COCO-equivalent MediaPipe
+        landmarks, over the keypoints visible in both. Leading dimensions broadcast, so
+        a[:, None] against b[None] gives the full pairwise matrix.
+
+        :param points_a: (..., 33, 2) pixel coordinates
+        :param visible_a: (..., 33) visibility mask
+        :param points_b: (..., 33, 2) pixel coordinates
+        :param visible_b: (..., 33) visibility mask
+        :param areas: (...) object scale of every pair, e.g. the box area of pose b
+        :return: (...) OKS; 0 where no keypoint is visible in both
+        """
+        indices = PoseUtils.coco_to_mediapipe
+        both = visible_a[..., indices] & visible_b[..., indices]
+        squared = ((points_a[..., indices, :] - points_b[..., indices, :]) ** 2).sum(axis=-1)
+        variances = (2 * AssociationUtils.coco_sigmas) ** 2
+        similarity = np.exp(-squared / (2 * np.maximum(areas, 1.0)[..., None] * variances))
+        counts = both.sum(axis=-1)
+        return np.divide((similarity * both).sum(axis=-1), counts, out=np.zeros(counts.shape), where=counts > 0)
+
+    @staticmethod
+    def centroids(points, visible):
+        """
+        Mid-hip of every person, or the mean of its visible keypoints when a hip is hidden.
+
+        :param points: (N, 33, 2) pixel coordinates
+        :param visible: (N, 33) visibility mask
+        :return: (N, 2) centroids
+        """
+        visible = visible | ~visible.any(axis=1, keepdims=True)
+        counts = visible.sum(axis=1, keepdims=True)
+        mean = (points * visible[:, :, None]).sum(axis=1) / counts
+        hips = points[:, [23, 24]].mean(axis=1)
+        return np.where(visible[:, [23, 24]].all(axis=1, keepdims=True), hips, mean)
+
+
+class HungarianAssociation:
+    """
+    Matches tracks to detections optimally with the Hungarian algorithm, on a cost that
+    combines box IoU, keypoint OKS and centroid distance. Every term lies in [0, 1]; a pair
+    that has no box overlap, no keypoint similarity and centroids further apart than the
+    gate is never matched. Tracks and detections may also stay unmatched, so a missed
+    detection does not force its track onto someone else's.
+    """
+
+    def __init__(self, iou_weight=1.0, oks_weight=1.0, centroid_weight=1.0, max_centroid_distance=0.1, min_oks=0.1,
+                 unmatched_cost=1.5):
+        """
+        :param max_centroid_distance: Centroid gate as a fraction of the frame diagonal
+        :param min_oks: Smallest keypoint similarity that makes a pair feasible on its own
+        :param unmatched_cost: Cost of leaving a track or a detection unmatched; a pair costing
+                               more than twice this is left unmatched instead
+        """
+        self.unmatched_cost = unmatched_cost
+        self.iou_weight = iou_weight
+        self.oks_weight = oks_weight
+        self.centroid_weight = centroid_weight
+        self.max_centroid_distance = max_centroid_distance
+        self.min_oks = min_oks
+
+    def cost_matrix(self, track_keypoints, detection_keypoints, frame_width, frame_height):
+        """
+        :param track_keypoints: (N, 33, 4) normalized landmarks of the tracked people
+        :param detection_keypoints: (M, 33, 4) normalized landmarks of the new detections
+        :return: Tuple (cost, feasible) of (N, M) arrays
+        """
+        track_points, track_visible = AssociationUtils.keypoints_to_pixels(track_keypoints, frame_width, frame_height)
+        points, visible = AssociationUtils.keypoints_to_pixels(detection_keypoints, frame_width, frame_height)
+
+        track_boxes = AssociationUtils.boxes_from_points(track_points, track_visible)
+        boxes = AssociationUtils.boxes_from_points(points, visible)
+        iou = AssociationUtils.box_iou(track_boxes, boxes)
+
+        gate = self.max_centroid_distance * np.hypot(frame_width, frame_height)
+        track_centroids = AssociationUtils.centroids(track_points, track_visible)
+        centroids = AssociationUtils.centroids(points, visible)
+        distance = np.linalg.norm(track_centroids[:, None] - centroids[None], axis=2) / gate
+
+        # OKS is negligible between poses that neither overlap nor lie within the gate, so in
+        # a crowd only those few candidate pairs are compared keypoint by keypoint
+        rows, cols = np.nonzero((iou > 0) | (distance < 1.0))
+        areas = (boxes[:, 2:] - boxes[:, :2]).prod(axis=1)
+        oks = np.zeros_like(iou)
+        oks[rows, cols] = AssociationUtils.keypoint_oks(
+            track_points[rows], track_visible[rows], points[cols], visible[cols], areas[cols]
+        )
+
+        cost = (self.iou_weight * (1 - iou) + self.oks_weight * (1 - oks)
+                + self.centroid_weight * np.minimum(distance, 1.0))
+        feasible = (iou > 0) | (oks >= self.min_oks) | (distance < 1.0)
+        return cost, feasible
+
+    def associate(self, track_keypoints, detection_keypoints, frame_width, frame_height):
+        """
+        :param track_keypoints: (N, 33, 4) normalized landmarks of the tracked people
+        :param detection_keypoints: (M, 33, 4) normalized landmarks of the new detections
+        :param frame_width: Width of the frame the detections come from
+        :param frame_height: Height of the frame the detections come from
+        :return: List of (track_index, detection_index) pairs
+        """
+        if len(track_keypoints) == 0 or len(detection_keypoints) == 0:
+            return []
+
+        cost, feasible = self.cost_matrix(track_keypoints, detection_keypoints, frame_width, frame_height)
+        return AssociationUtils.solve_assignment(cost, feasible, self.unmatched_cost)
+
+
+class GreedyCentroidAssociation:
+    """
+    The original matcher: every track in turn takes the nearest unused detection by mid-hip
+    distance, within a fixed pixel gate.
+    """
+
+    def __init__(self, max_distance=100):
+        """
+        :param max_distance: Largest centroid distance in pixels that still matches
+        """
+        self.max_distance = max_distance
+
+    def associate(self, track_keypoints, detection_keypoints, frame_width, frame_height):
+        """Same interface as HungarianAssociation.associate"""
+        if len(track_keypoints) == 0 or len(detection_keypoints) == 0:
+            return []
+
+        track_centroids = AssociationUtils.centroids(
+            *AssociationUtils.keypoints_to_pixels(track_keypoints, frame_width, frame_height)
+        )
+        centroids = AssociationUtils.centroids(
+            *AssociationUtils.keypoints_to_pixels(detection_keypoints, frame_width, frame_height)
+        )
+        distance = np.linalg.norm(track_centroids[:, None] - centroids[None], axis=2)
+
+        matches = []
+        for track_index in range(len(track_centroids)):
+            detection_index = int(np.argmin(distance[track_index]))
+            if distance[track_index, detection_index] < self.max_distance:
+                matches.append((track_index, detection_index))
+                distance[:, detection_index] = np.inf
+        return matches
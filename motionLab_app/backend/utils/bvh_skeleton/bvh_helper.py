@@ -1,6 +1,9 @@
+import gzip
 import os
 from pathlib import Path
 
+import numpy as np
+
 
 class BvhNode(object):
     def __init__(
@@ -62,18 +65,40 @@ def write_header(writer, node, level):
     indent = ' ' * 4 * level
     writer.write(f'{indent}{"}"}\n')
 
-def write_bvh(output_file, header, channels, frame_rate=30):
+def format_motion(channels, precision=6):
+    """Formats a (T, C) channel array as BVH motion lines in one formatting pass."""
+    channels = np.asarray(channels, dtype=float)
+    if channels.size == 0:
+        return ''
+    if channels.ndim == 1:
+        channels = channels[None]
+
+    line = ' '.join([f'%.{precision}f'] * channels.shape[1]) + '\n'
+    return (line * channels.shape[0]) % tuple(channels.ravel())
+
+
+def write_bvh(output_file, header, channels, frame_rate=30, precision=6):
+    """
+    Writes a BVH file. Motion values are written with a fixed number of decimals,
+    and the file is gzip-compressed when output_file ends with '.gz'.
+
+    :param channels: (T, C) array, or list of per-frame channel lists
+    :param precision: Number of decimals of the motion values
+    """
     output_file = Path(output_file)
     if not output_file.parent.exists():
         os.makedirs(output_file.parent)
-    
-    with output_file.open('w') as f:
+
+    if output_file.suffix == '.gz':
+        opener = gzip.open(output_file, 'wt', compresslevel=6)
+    else:
+        opener = output_file.open('w')
+
+    with opener as f:
         f.write('HIERARCHY\n')
         write_header(writer=f, node=header.root, level=0)
         
         f.write('MOTION\n')
         f.write(f'Frames: {len(channels)}\n')
         f.write(f'Frame Time: {1 / frame_rate}\n')
-
-        for channel in channels:
-            f.write(' '.join([f'{element}' for element in channel]) + '\n')
\ No newline at end of file
+        f.write(format_motion(channels, precision))
@@ -221,6 +221,85 @@ class CMUSkeleton(object):
         return header
 
 
+    def get_joint_axes(self, pose, joint, node):
+        """
+        Returns the (x_dir, y_dir, z_dir, order) that define a joint's local frame.
+        pose may be a single (J, 3) pose or a (T, J, 3) batch; order is None for joints
+        that inherit their parent's rotation.
+        """
+        index = self.keypoint2index
+        joint_idx = index[joint]
+        x_dir = y_dir = z_dir = None
+        order = None
+        if joint == 'Hips':
+            x_dir = pose[..., index['LeftUpLeg'], :] - pose[..., index['RightUpLeg'], :]
+            z_dir = pose[..., index['Spine'], :] - pose[..., joint_idx, :]
+            order = 'zyx'
+        elif joint in ['RightUpLeg', 'RightLeg']:
+            child_idx = index[node.children[0].name]
+            x_dir = pose[..., index['Hips'], :] - pose[..., index['RightUpLeg'], :]
+            z_dir = pose[..., joint_idx, :] - pose[..., child_idx, :]
+            order = 'zyx'
+        elif joint in ['LeftUpLeg', 'LeftLeg']:
+            child_idx = index[node.children[0].name]
+            x_dir = pose[..., index['LeftUpLeg'], :] - pose[..., index['Hips'], :]
+            z_dir = pose[..., joint_idx, :] - pose[..., child_idx, :]
+            order = 'zyx'
+        elif joint == 'Spine':
+            x_dir = pose[..., index['LeftUpLeg'], :] - pose[..., index['RightUpLeg'], :]
+            z_dir = pose[..., index['Spine1'], :] - pose[..., joint_idx, :]
+            order = 'zyx'
+        elif joint == 'Spine1':
+            x_dir = pose[..., index['LeftArm'], :] - pose[..., index['RightArm'], :]
+            z_dir = pose[..., joint_idx, :] - pose[..., index['Spine'], :]
+            order = 'zyx'
+        elif joint == 'Neck1':
+            y_dir = pose[..., index['Spine1'], :] - pose[..., joint_idx, :]
+            z_dir = pose[..., index['Head'], :] - pose[..., index['Spine1'], :]
+            order = 'zyx'
+        elif joint == 'LeftArm':
+            x_dir = pose[..., index['LeftForeArm'], :] - pose[..., joint_idx, :]
+            y_dir = pose[..., index['LeftForeArm'], :] - pose[..., index['LeftHand'], :]
+            order = 'zyx'
+        elif joint == 'LeftForeArm':
+            x_dir = pose[..., index['LeftHand'], :] - pose[..., joint_idx, :]
+            y_dir = pose[..., joint_idx, :] - pose[..., index['LeftArm'], :]
+            order = 'zyx'
+        elif joint == 'RightArm':
+            x_dir = pose[..., joint_idx, :] - pose[..., index['RightForeArm'], :]
+            y_dir = pose[..., index['RightForeArm'], :] - pose[..., index['RightHand'], :]
+            order = 'zyx'
+        elif joint == 'RightForeArm':
+            x_dir = pose[..., joint_idx, :] - pose[..., index['RightHand'], :]
+            y_dir = pose[..., joint_idx, :] - pose[..., index['RightArm'], :]
+            order = 'zyx'
+
+        if order:
+            if x_dir is None and y_dir is not None and z_dir is not None:
+                x_dir = np.cross(y_dir, z_dir)
+            elif y_dir is None and x_dir is not None and z_dir is not None:
+                y_dir = np.cross(z_dir, x_dir)
+            elif z_dir is None and x_dir is not None and y_dir is not None:
+                z_dir = np.cross(x_dir, y_dir)
+
+        return x_dir, y_dir, z_dir, order
+
+    def get_root_position(self, root_position):
+        """Maps a normalized [0, 1] root keypoint onto the BVH root translation."""
+        MAX_Y = 50 * self.y_sensitivity
+        MIN_Y = 0
+
+        MAX_X = 50 * self.x_sensitivity
+        MIN_X = -50 * self.x_sensitivity
+
+        OLD_MAX = 1
+        OLD_MIN = 0
+
+        x = ((root_position[..., 0] - OLD_MIN) / (OLD_MAX - OLD_MIN)) * (MAX_X - MIN_X) + MIN_X
+        y = ((root_position[..., 1] - OLD_MIN) / (OLD_MAX - OLD_MIN)) * (MAX_Y - MIN_Y) + MIN_Y
+
+        return np.stack([x, y, np.zeros_like(x)], axis=-1)
+
     def pose2euler(self, pose, header):
         channel = []
         quats = {}
@@ -229,92 +308,15 @@ class CMUSkeleton(object):
         while stack:
             node = stack.pop()
             joint = node.name
-            joint_idx = self.keypoint2index[joint]
             
             if node.is_root:
                 self.counter += 1
-                # MAX_X = 50
-                # MAX_Y = 50
-                MAX_Y = 50 * self.y_sensitivity
-                MIN_Y = 0
+                pos = self.get_root_position(np.asarray(self.root_positions[self.counter], dtype=float))
+                channel.extend(pos.tolist())
 
-                MAX_X = 50 * self.x_sensitivity
-                MIN_X = -50 * self.x_sensitivity
-                
-                OLD_MAX = 1
-                OLD_MIN = 0
-                                
-                x = ((self.root_positions[self.counter][0] - OLD_MIN) / (OLD_MAX - OLD_MIN)) * (MAX_X - MIN_X) + MIN_X
-                y = ((self.root_positions[self.counter][1] - OLD_MIN) / (OLD_MAX - OLD_MIN)) * (MAX_Y - MIN_Y) + MIN_Y
-                
-                # z = ((self.root_positions[self.counter][2] - OLD_MIN) / (OLD_MAX - OLD_MIN)) * (50 - 0) + 0
-                pos = [x, y, 0]
-
-                channel.extend(pos)
-
-            index = self.keypoint2index
-            order = None
-            if joint == 'Hips':
-                x_dir = pose[index['LeftUpLeg']] - pose[index['RightUpLeg']]
-                y_dir = None
-                z_dir = pose[index['Spine']] - pose[joint_idx]
-                order = 'zyx'
-            elif joint in ['RightUpLeg', 'RightLeg']:
-                child_idx = self.keypoint2index[node.children[0].name]
-                x_dir = pose[index['Hips']] - pose[index['RightUpLeg']]
-                y_dir = None
-                z_dir = pose[joint_idx] - pose[child_idx]
-                order = 'zyx'
-            elif joint in ['LeftUpLeg', 'LeftLeg']:
-                child_idx = self.keypoint2index[node.children[0].name]
-                x_dir = pose[index['LeftUpLeg']] - pose[index['Hips']]
-                y_dir = None
-                z_dir = pose[joint_idx] - pose[child_idx]
-                order = 'zyx'
-            elif joint == 'Spine':
-                x_dir = pose[index['LeftUpLeg']] - pose[index['RightUpLeg']]
-                y_dir = None
-                z_dir = pose[index['Spine1']] - pose[joint_idx]
-                order = 'zyx'
-            elif joint == 'Spine1':
-                x_dir = pose[index['LeftArm']] - pose[index['RightArm']]
-                y_dir = None
-                z_dir = pose[joint_idx] - pose[index['Spine']]
-                order = 'zyx'
-            elif joint == 'Neck1':
-                x_dir = None
-                y_dir = pose[index['Spine1']] - pose[joint_idx]
-                z_dir = pose[index['Head']] - pose[index['Spine1']]
-                order = 'zyx'
-            elif joint == 'LeftArm':
-                x_dir = pose[index['LeftForeArm']] - pose[joint_idx]
-                y_dir = pose[index['LeftForeArm']] - pose[index['LeftHand']]
-                z_dir = None
-                order = 'zyx'
-            elif joint == 'LeftForeArm':
-                x_dir = pose[index['LeftHand']] - pose[joint_idx]
-                y_dir = pose[joint_idx] - pose[index['LeftArm']]
-                z_dir = None
-                order = 'zyx'
-            elif joint == 'RightArm':
-                x_dir = pose[joint_idx] - pose[index['RightForeArm']]
-                y_dir = pose[index['RightForeArm']] - pose[index['RightHand']]
-                z_dir = None
-                order = 'zyx'
-            elif joint == 'RightForeArm':
-                x_dir = pose[joint_idx] - pose[index['RightHand']]
-                y_dir = pose[joint_idx] - pose[index['RightArm']]
-                z_dir = None
-                order = 'zyx'
+            x_dir, y_dir, z_dir, order = self.get_joint_axes(pose, joint, node)
             
             if order:
-                if x_dir is None and y_dir is not None and z_dir is not None:
-                    x_dir = np.cross(y_dir, z_dir)
-                elif y_dir is None and x_dir is not None and z_dir is not None:
-                    y_dir = np.cross(z_dir, x_dir)
-                elif z_dir is None and x_dir is not None and y_dir is not None:
-                    z_dir = np.cross(x_dir, y_dir)
-                
                 if x_dir is None:
                     x_dir = np.array([1, 0, 0])
                 if y_dir is None:
@@ -346,9 +348,61 @@ class CMUSkeleton(object):
 
         return channel
 
+    def poses2euler(self, poses_3d, header):
+        """
+        Batched pose2euler: walks the joint tree once and computes the local frames,
+        quaternions and Euler angles of every frame at once.
+
+        :param poses_3d: 3D poses with shape (n_frames, n_joints, 3)
+        :param header: BvhHeader of the skeleton
+        :return: Channels with shape (n_frames, n_channels), identical to stacking
+                 pose2euler over the frames
+        """
+        poses_3d = np.asarray(poses_3d, dtype=float)
+        n_frames = len(poses_3d)
+        channels = []
+        quats = {}
+        stack = [header.root]
+        while stack:
+            node = stack.pop()
+            joint = node.name
+
+            if node.is_root:
+                first = self.counter + 1
+                self.counter += n_frames
+                root_positions = np.asarray(self.root_positions[first:first + n_frames], dtype=float)
+                if len(root_positions) < n_frames:
+                    raise IndexError('Not enough root positions for the given poses')
+                channels.append(self.get_root_position(root_positions))
+
+            x_dir, y_dir, z_dir, order = self.get_joint_axes(poses_3d, joint, node)
 
-    def poses2bvh(self, poses_3d, header=None, output_file=None, fps=30, root_keypoints=None, x_sensitivity=0, y_sensitivity=0):
-        if root_keypoints:
+            if order:
+                dcm = math3d.dcm_from_axis_batch(x_dir, y_dir, z_dir, order)
+                quats[joint] = math3d.dcm2quat_batch(dcm)
+            else:
+                quats[joint] = quats[self.parent[joint]].copy()
+
+            local_quat = quats[joint].copy()
+            if node.parent:
+                local_quat = math3d.quat_divide(
+                    q=quats[joint], r=quats[node.parent.name]
+                )
+
+            euler = math3d.quat2euler(
+                q=local_quat, order=node.rotation_order
+            )
+            channels.append(np.rad2deg(euler))
+
+            for child in node.children[::-1]:
+                if not child.is_end_site:
+                    stack.append(child)
+
+        return np.concatenate(channels, axis=1)
+
+
+    def poses2bvh(self, poses_3d, header=None, output_file=None, fps=30, root_keypoints=None, x_sensitivity=0, y_sensitivity=0, precision=6):
+        if root_keypoints is not None and len(root_keypoints):
             self.root_positions = root_keypoints
             
         if x_sensitivity >= 0:
@@ -360,11 +414,9 @@ class CMUSkeleton(object):
         if not header:
             header = self.get_bvh_header(poses_3d)
 
-        channels = []
-        for frame, pose in enumerate(poses_3d):
-            channels.append(self.pose2euler(pose, header))
+        channels = self.poses2euler(poses_3d, header)
         
         if output_file:
-            bvh_helper.write_bvh(output_file, header, channels, fps)
+            bvh_helper.write_bvh(output_file, header, channels, fps, precision)
         
         return channels, header
\ No newline at end of file
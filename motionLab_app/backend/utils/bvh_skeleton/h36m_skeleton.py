@@ -157,6 +157,62 @@ class H36mSkeleton(object):
         return header
 
 
+    def get_joint_axes(self, pose, joint, node):
+        """
+        Returns the (x_dir, y_dir, z_dir, order) that define a joint's local frame.
+        pose may be a single (J, 3) pose or a (T, J, 3) batch; order is None for joints
+        that inherit their parent's rotation.
+        """
+        index = self.keypoint2index
+        joint_idx = index[joint]
+        x_dir = y_dir = z_dir = None
+        order = None
+        if joint == 'Hip':
+            x_dir = pose[..., index['LeftHip'], :] - pose[..., index['RightHip'], :]
+            z_dir = pose[..., index['Spine'], :] - pose[..., joint_idx, :]
+            order = 'zyx'
+        elif joint in ['RightHip', 'RightKnee']:
+            child_idx = index[node.children[0].name]
+            x_dir = pose[..., index['Hip'], :] - pose[..., index['RightHip'], :]
+            z_dir = pose[..., joint_idx, :] - pose[..., child_idx, :]
+            order = 'zyx'
+        elif joint in ['LeftHip', 'LeftKnee']:
+            child_idx = index[node.children[0].name]
+            x_dir = pose[..., index['LeftHip'], :] - pose[..., index['Hip'], :]
+            z_dir = pose[..., joint_idx, :] - pose[..., child_idx, :]
+            order = 'zyx'
+        elif joint == 'Spine':
+            x_dir = pose[..., index['LeftHip'], :] - pose[..., index['RightHip'], :]
+            z_dir = pose[..., index['Thorax'], :] - pose[..., joint_idx, :]
+            order = 'zyx'
+        elif joint == 'Thorax':
+            x_dir = pose[..., index['LeftShoulder'], :] - \
+                pose[..., index['RightShoulder'], :]
+            z_dir = pose[..., joint_idx, :] - pose[..., index['Spine'], :]
+            order = 'zyx'
+        elif joint == 'Neck':
+            y_dir = pose[..., index['Thorax'], :] - pose[..., joint_idx, :]
+            z_dir = pose[..., index['HeadEndSite'], :] - pose[..., index['Thorax'], :]
+            order = 'zxy'
+        elif joint == 'LeftShoulder':
+            x_dir = pose[..., index['LeftElbow'], :] - pose[..., joint_idx, :]
+            y_dir = pose[..., index['LeftElbow'], :] - pose[..., index['LeftWrist'], :]
+            order = 'xzy'
+        elif joint == 'LeftElbow':
+            x_dir = pose[..., index['LeftWrist'], :] - pose[..., joint_idx, :]
+            y_dir = pose[..., joint_idx, :] - pose[..., index['LeftShoulder'], :]
+            order = 'xzy'
+        elif joint == 'RightShoulder':
+            x_dir = pose[..., joint_idx, :] - pose[..., index['RightElbow'], :]
+            y_dir = pose[..., index['RightElbow'], :] - pose[..., index['RightWrist'], :]
+            order = 'xzy'
+        elif joint == 'RightElbow':
+            x_dir = pose[..., joint_idx, :] - pose[..., index['RightWrist'], :]
+            y_dir = pose[..., joint_idx, :] - pose[..., index['RightShoulder'], :]
+            order = 'xzy'
+
+        return x_dir, y_dir, z_dir, order
+
     def pose2euler(self, pose, header):
         channel = []
         quats = {}
@@ -170,61 +226,7 @@ class H36mSkeleton(object):
             if node.is_root:
                 channel.extend(pose[joint_idx])
 
-            index = self.keypoint2index
-            order = None
-            if joint == 'Hip':
-                x_dir = pose[index['LeftHip']] - pose[index['RightHip']]
-                y_dir = None
-                z_dir = pose[index['Spine']] - pose[joint_idx]
-                order = 'zyx'
-            elif joint in ['RightHip', 'RightKnee']:
-                child_idx = self.keypoint2index[node.children[0].name]
-                x_dir = pose[index['Hip']] - pose[index['RightHip']]
-                y_dir = None
-                z_dir = pose[joint_idx] - pose[child_idx]
-                order = 'zyx'
-            elif joint in ['LeftHip', 'LeftKnee']:
-                child_idx = self.keypoint2index[node.children[0].name]
-                x_dir = pose[index['LeftHip']] - pose[index['Hip']]
-                y_dir = None
-                z_dir = pose[joint_idx] - pose[child_idx]
-                order = 'zyx'
-            elif joint == 'Spine':
-                x_dir = pose[index['LeftHip']] - pose[index['RightHip']]
-                y_dir = None
-                z_dir = pose[index['Thorax']] - pose[joint_idx]
-                order = 'zyx'
-            elif joint == 'Thorax':
-                x_dir = pose[index['LeftShoulder']] - \
-                    pose[index['RightShoulder']]
-                y_dir = None
-                z_dir = pose[joint_idx] - pose[index['Spine']]
-                order = 'zyx'
-            elif joint == 'Neck':
-                x_dir = None
-                y_dir = pose[index['Thorax']] - pose[joint_idx]
-                z_dir = pose[index['HeadEndSite']] - pose[index['Thorax']]
-                order = 'zxy'
-            elif joint == 'LeftShoulder':
-                x_dir = pose[index['LeftElbow']] - pose[joint_idx]
-                y_dir = pose[index['LeftElbow']] - pose[index['LeftWrist']]
-                z_dir = None
-                order = 'xzy'
-            elif joint == 'LeftElbow':
-                x_dir = pose[index['LeftWrist']] - pose[joint_idx]
-                y_dir = pose[joint_idx] - pose[index['LeftShoulder']]
-                z_dir = None
-                order = 'xzy'
-            elif joint == 'RightShoulder':
-                x_dir = pose[joint_idx] - pose[index['RightElbow']]
-                y_dir = pose[index['RightElbow']] - pose[index['RightWrist']]
-                z_dir = None
-                order = 'xzy'
-            elif joint == 'RightElbow':
-                x_dir = pose[joint_idx] - pose[index['RightWrist']]
-                y_dir = pose[joint_idx] - pose[index['RightShoulder']]
-                z_dir = None
-                order = 'xzy'
+            x_dir, y_dir, z_dir, order = self.get_joint_axes(pose, joint, node)
             if order:
                 dcm = math3d.dcm_from_axis(x_dir, y_dir, z_dir, order)
                 quats[joint] = math3d.dcm2quat(dcm)
@@ -250,14 +252,52 @@ class H36mSkeleton(object):
 
         return channel
 
+    def poses2euler(self, poses_3d, header):
+        """
+        Batched pose2euler over a (n_frames, n_joints, 3) sequence.
+        Returns the channels as an (n_frames, n_channels) array.
+        """
+        poses_3d = np.asarray(poses_3d, dtype=float)
+        channels = []
+        quats = {}
+        stack = [header.root]
+        while stack:
+            node = stack.pop()
+            joint = node.name
+
+            if node.is_root:
+                channels.append(poses_3d[:, self.keypoint2index[joint]])
+
+            x_dir, y_dir, z_dir, order = self.get_joint_axes(poses_3d, joint, node)
+            if order:
+                dcm = math3d.dcm_from_axis_batch(x_dir, y_dir, z_dir, order)
+                quats[joint] = math3d.dcm2quat_batch(dcm)
+            else:
+                quats[joint] = quats[self.parent[joint]].copy()
+
+            local_quat = quats[joint].copy()
+            if node.parent:
+                local_quat = math3d.quat_divide(
+                    q=quats[joint], r=quats[node.parent.name]
+                )
+
+            euler = math3d.quat2euler(
+                q=local_quat, order=node.rotation_order
+            )
+            channels.append(np.rad2deg(euler))
+
+            for child in node.children[::-1]:
+                if not child.is_end_site:
+                    stack.append(child)
+
+        return np.concatenate(channels, axis=1)
+
 
     def poses2bvh(self, poses_3d, header=None, output_file=None):
         if not header:
             header = self.get_bvh_header(poses_3d)
 
-        channels = []
-        for frame, pose in enumerate(poses_3d):
-            channels.append(self.pose2euler(pose, header))
+        channels = self.poses2euler(poses_3d, header)
 
         if output_file:
             bvh_helper.write_bvh(output_file, header, channels)
@@ -42,6 +42,36 @@ def dcm_from_axis(x_dir, y_dir, z_dir, order):
 
     return dcm
 
+def normalize_batch(x):
+    return x / np.maximum(np.linalg.norm(x, axis=-1, keepdims=True), 1e-12)
+
+
+def dcm_from_axis_batch(x_dir, y_dir, z_dir, order):
+    """Batched dcm_from_axis: (..., 3) axis directions -> (..., 3, 3) matrices."""
+    assert order in ['yzx', 'yxz', 'xyz', 'xzy', 'zxy', 'zyx']
+
+    given = [np.asarray(d, dtype=float) for d in (x_dir, y_dir, z_dir) if d is not None]
+    shape = np.broadcast_shapes(*[d.shape for d in given]) if given else (3,)
+    defaults = np.eye(3)
+    axis = {
+        name: np.broadcast_to(defaults[i] if d is None else np.asarray(d, dtype=float), shape)
+        for i, (name, d) in enumerate(zip('xyz', (x_dir, y_dir, z_dir)))
+    }
+    name = ['x', 'y', 'z']
+    idx1 = name.index(order[1])
+    idx2 = name.index(order[2])
+
+    axis[order[0]] = normalize_batch(axis[order[0]])
+    axis[order[1]] = normalize_batch(np.cross(
+        axis[name[(idx1 + 1) % 3]], axis[name[(idx1 + 2) % 3]]
+    ))
+    axis[order[2]] = normalize_batch(np.cross(
+        axis[name[(idx2 + 1) % 3]], axis[name[(idx2 + 2) % 3]]
+    ))
+
+    return np.stack([axis['x'], axis['y'], axis['z']], axis=-2)
+
+
 def dcm2quat(dcm):
     q = np.zeros([4])
     tr = np.trace(dcm)
@@ -90,6 +120,61 @@ def dcm2quat(dcm):
     return q
 
 
+def dcm2quat_batch(dcm):
+    """
+    Branch-free batched dcm2quat: (..., 3, 3) matrices -> (..., 4) quaternions.
+    All four candidates are computed and each matrix picks the one dcm2quat would.
+    """
+    dcm = np.asarray(dcm, dtype=float)
+    m = [[dcm[..., i, j] for j in range(3)] for i in range(3)]
+    d0, d1, d2 = m[0][0], m[1][1], m[2][2]
+    tr = d0 + d1 + d2
+
+    def inverse(sqdip1):
+        return np.divide(0.5, sqdip1, out=np.zeros_like(sqdip1), where=sqdip1 != 0)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sqtrp1 = np.sqrt(np.maximum(tr + 1.0, 0.0))
+        q_tr = np.stack([
+            0.5 * sqtrp1,
+            (m[1][2] - m[2][1]) / (2.0 * sqtrp1),
+            (m[2][0] - m[0][2]) / (2.0 * sqtrp1),
+            (m[0][1] - m[1][0]) / (2.0 * sqtrp1),
+        ], axis=-1)
+
+    sq_y = np.sqrt(np.maximum(d1 - d0 - d2 + 1.0, 0.0))
+    inv_y = inverse(sq_y)
+    q_y = np.stack([
+        (m[2][0] - m[0][2]) * inv_y,
+        (m[0][1] + m[1][0]) * inv_y,
+        0.5 * sq_y,
+        (m[1][2] + m[2][1]) * inv_y,
+    ], axis=-1)
+
+    sq_z = np.sqrt(np.maximum(d2 - d0 - d1 + 1.0, 0.0))
+    inv_z = inverse(sq_z)
+    q_z = np.stack([
+        (m[0][1] - m[1][0]) * inv_z,
+        (m[2][0] + m[0][2]) * inv_z,
+        (m[1][2] + m[2][1]) * inv_z,
+        0.5 * sq_z,
+    ], axis=-1)
+
+    sq_x = np.sqrt(np.maximum(d0 - d1 - d2 + 1.0, 0.0))
+    inv_x = inverse(sq_x)
+    q_x = np.stack([
+        (m[1][2] - m[2][1]) * inv_x,
+        0.5 * sq_x,
+        (m[0][1] + m[1][0]) * inv_x,
+        (m[2][0] + m[0][2]) * inv_x,
+    ], axis=-1)
+
+    use_tr = (tr > 0)[..., None]
+    use_y = ((d1 > d0) & (d1 > d2))[..., None]
+    use_z = (d2 > d0)[..., None]
+    return np.where(use_tr, q_tr, np.where(use_y, q_y, np.where(use_z, q_z, q_x)))
+
+
 def quat_dot(q0, q1):
     original_shape = q0.shape
     q0 = np.reshape(q0, [-1, 4])
@@ -133,6 +218,18 @@ def quat_divide(q, r):
     return quat_mul(quat_inverse(r), q)
 
 
+def quat2dcm_batch(q):
+    """(..., 4) quaternions -> (..., 3, 3) rotation matrices, matching quat2euler's convention."""
+    q = np.asarray(q, dtype=float)
+    w, x, y, z = q[..., 0], q[..., 1], q[..., 2], q[..., 3]
+
+    return np.stack([
+        np.stack([1 - 2 * (y * y + z * z), 2 * (x * y - w * z), 2 * (x * z + w * y)], axis=-1),
+        np.stack([2 * (x * y + w * z), 1 - 2 * (x * x + z * z), 2 * (y * z - w * x)], axis=-1),
+        np.stack([2 * (x * z - w * y), 2 * (y * z + w * x), 1 - 2 * (x * x + y * y)], axis=-1),
+    ], axis=-2)
+
+
 def quat2euler(q, order='zyx', eps=1e-8):
     original_shape = list(q.shape)
     original_shape[-1] = 3
@@ -148,6 +245,17 @@ def quat2euler(q, order='zyx', eps=1e-8):
         y = np.arcsin(np.clip(2 * (q0 * q2 - q3 * q1), -1 + eps, 1 - eps))
         z = np.arctan2(2 * (q0 * q3 + q1 * q2), 1 - 2 * (q2 * q2 + q3 * q3))
         euler = np.stack([z, y, x], axis=1)
+    elif order in ['yzx', 'yxz', 'xyz', 'xzy', 'zxy']:
+        # Rotation matrix of the quaternion, decomposed as R = R_i(a) R_j(b) R_k(c)
+        # for order 'ijk'; sign is +1 for cyclic orders and -1 for the others
+        i, j, k = ['xyz'.index(axis) for axis in order]
+        sign = 1.0 if order in ['xyz', 'yzx', 'zxy'] else -1.0
+        matrix = quat2dcm_batch(q)
+
+        a = np.arctan2(-sign * matrix[:, j, k], matrix[:, k, k])
+        b = np.arcsin(np.clip(sign * matrix[:, i, k], -1 + eps, 1 - eps))
+        c = np.arctan2(-sign * matrix[:, i, j], matrix[:, i, i])
+        euler = np.stack([a, b, c], axis=1)
     else:
         raise ValueError('Not implemented')
 
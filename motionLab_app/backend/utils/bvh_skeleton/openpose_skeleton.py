@@ -250,13 +250,59 @@ class OpenPoseSkeleton(object):
 
         return channel
     
+    def poses2euler(self, poses_3d, header):
+        """
+        Batched pose2euler over a (n_frames, n_joints, 3) sequence.
+        Returns the channels as an (n_frames, n_channels) array.
+        """
+        poses_3d = np.asarray(poses_3d, dtype=float)
+        index = self.keypoint2index
+        channels = []
+        quats = {}
+        x_dir = None
+        stack = [header.root]
+        while stack:
+            node = stack.pop()
+            joint = node.name
+            joint_idx = index[joint]
+
+            if node.is_root:
+                channels.append(poses_3d[:, joint_idx])
+
+            if joint == 'MidHip':
+                x_dir = poses_3d[:, index['LHip']] - poses_3d[:, index['RHip']]
+                z_dir = poses_3d[:, index['Neck']] - poses_3d[:, joint_idx]
+            elif joint == 'RHip' or joint == 'LHip':
+                child_idx = index[node.children[0].name]
+                z_dir = poses_3d[:, joint_idx] - poses_3d[:, child_idx]
+            elif node.children:
+                z_dir = poses_3d[:, joint_idx] - poses_3d[:, index[node.children[0].name]]
+            else:
+                z_dir = poses_3d[:, joint_idx] - poses_3d[:, index[self.parent[joint]]]
+
+            # Like pose2euler, every joint keeps the x axis computed for MidHip
+            dcm = math3d.dcm_from_axis_batch(x_dir, None, z_dir, 'zyx')
+            quats[joint] = math3d.dcm2quat_batch(dcm)
+
+            if node.parent:
+                local_quat = math3d.quat_divide(quats[joint], quats[node.parent.name])
+            else:
+                local_quat = quats[joint]
+
+            euler = math3d.quat2euler(local_quat, order=node.rotation_order)
+            channels.append(np.rad2deg(euler))
+
+            for child in node.children[::-1]:
+                if not child.is_end_site:
+                    stack.append(child)
+
+        return np.concatenate(channels, axis=1)
+    
     def poses2bvh(self, poses_3d, header=None, output_file=None):
         if not header:
             header = self.get_bvh_header(poses_3d)
 
-        channels = []
-        for frame, pose in enumerate(poses_3d):
-            channels.append(self.pose2euler(pose, header))
+        channels = self.poses2euler(poses_3d, header)
 
         if output_file:
             bvh_helper.write_bvh(output_file, header, channels)
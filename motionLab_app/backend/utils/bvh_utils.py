@@ -1,3 +1,7 @@
+import gzip
+import os
+import shutil
+import tempfile
 from pathlib import Path
 from utils.bvh_skeleton import cmu_skeleton
 from datetime import datetime
@@ -11,18 +15,21 @@ class BVHUtils:
         :param pose_3d: 3D joint positions
         :param root_keypoints: Root joint positions
         :param fps: Frames per second
-        :return: BVH filename
+        :return: BVH filename; '.bvh.gz' when BVH_COMPRESSION=gzip
         """
         try:
             bvh_output_dir = Path('BVHs')
             bvh_output_dir.mkdir(parents=True, exist_ok=True)
 
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            bvh_file_name = f'bvh_{timestamp}.bvh'
+            # Microseconds keep the names of people converted in the same second apart
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+            extension = '.bvh.gz' if os.getenv('BVH_COMPRESSION', '').lower() == 'gzip' else '.bvh'
+            bvh_file_name = f'bvh_{timestamp}{extension}'
             bvh_file = bvh_output_dir / bvh_file_name
 
             cmu_skeleton.CMUSkeleton().poses2bvh(
-                pose_3d, output_file=bvh_file, fps=fps, root_keypoints=root_keypoints, x_sensitivity=x_sensitivity, y_sensitivity=y_sensitivity
+                pose_3d, output_file=bvh_file, fps=fps, root_keypoints=root_keypoints, x_sensitivity=x_sensitivity, y_sensitivity=y_sensitivity,
+                precision=int(os.getenv('BVH_PRECISION', 6))
             )
 
             print(f"BVH file saved: {bvh_file_name}")
@@ -30,3 +37,25 @@ class BVHUtils:
         except Exception as e:
             print(f"Error in convert_3d_to_bvh: {e}")
             raise RuntimeError(f"Error in convert_3d_to_bvh: {e}")
+
+    @staticmethod
+    def get_plain_bvh_path(bvh_path):
+        """
+        Returns a path to an uncompressed copy of a BVH file, for tools that cannot read
+        '.bvh.gz' (e.g. Blender). Plain files are returned as they are. Each call writes its
+        own temporary file, so concurrent readers of the same file do not share a copy.
+
+        :param bvh_path: Path to a '.bvh' or '.bvh.gz' file
+        :return: Tuple (plain_path, is_temporary); the caller deletes a temporary copy
+        """
+        if not str(bvh_path).endswith('.gz'):
+            return bvh_path, False
+
+        fd, plain_path = tempfile.mkstemp(suffix='.bvh')
+        try:
+            with gzip.open(bvh_path, 'rb') as source, os.fdopen(fd, 'wb') as target:
+                shutil.copyfileobj(source, target)
+        except Exception:
+            os.remove(plain_path)
+            raise
+        return plain_path, True
@@ -0,0 +1,154 @@
+import numpy as np
+
+
+class KeypointKalmanFilter:
+    """
+    Constant-velocity Kalman filters for every person of a tracker, run as one batch of
+    NumPy operations over all live tracks.
+
+    A track's state is its root (mid-hip) and the offsets of its 33 MediaPipe landmarks from
+    the root, each with a velocity, in normalized image coordinates. Each of these 34 points
+    is an independent position/velocity filter shared by the x and y axes, so a track's
+    covariance is a (34, 2, 2) array. The root keeps its velocity while a person is hidden;
+    offset velocities decay, so the pose holds still instead of drifting apart.
+    """
+
+    ROOT_LANDMARKS = [23, 24]
+
+    def __init__(self, root_noise=4e-6, offset_noise=2.5e-5, measurement_noise=1e-5,
+                 offset_damping=0.8, initial_velocity_variance=1e-4, visibility_threshold=0.5):
+        """
+        :param root_noise: Variance of the root's acceleration per frame
+        :param offset_noise: Variance of the landmark offsets' acceleration per frame
+        :param measurement_noise: Variance of a detected landmark position
+        :param offset_damping: Factor applied to the offset velocities every predicted frame
+        :param initial_velocity_variance: Velocity variance of a new track
+        :param visibility_threshold: Landmarks at or below this visibility are not measured
+        """
+        self.measurement_noise = measurement_noise
+        self.initial_velocity_variance = initial_velocity_variance
+        self.visibility_threshold = visibility_threshold
+
+        # Transition and discrete white-acceleration noise of every point, root first
+        damping = np.r_[1.0, np.full(33, offset_damping)]
+        self._transition = np.zeros((34, 2, 2))
+        self._transition[:, 0] = 1.0
+        self._transition[:, 1, 1] = damping
+        noise = np.r_[root_noise, np.full(33, offset_noise)]
+        self._process_noise = noise[:, None, None] * np.array([[0.25, 0.5], [0.5, 1.0]])
+
+        self.ids = []
+        self._rows = {}
+        self.positions = np.zeros((0, 34, 2))
+        self.velocities = np.zeros((0, 34, 2))
+        self.covariances = np.zeros((0, 34, 2, 2))
+        self._last_landmarks = np.zeros((0, 33, 4))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, track_id):
+        return track_id in self._rows
+
+    def _measure(self, landmarks):
+        """Root and offsets of stacked (N, 33, 4) landmarks, with the mask of measured points"""
+        visible = landmarks[:, :, 3] > self.visibility_threshold
+        root = landmarks[:, self.ROOT_LANDMARKS, :2].mean(axis=1)
+        root_visible = visible[:, self.ROOT_LANDMARKS].all(axis=1)
+        return root, root_visible, visible
+
+    def add(self, track_ids, landmarks):
+        """
+        Starts tracks at rest at the given landmarks.
+
+        :param track_ids: Ids of the new tracks
+        :param landmarks: (N, 33, 4) normalized landmarks
+        """
+        if len(track_ids) == 0:
+            return
+        landmarks = np.asarray(landmarks, dtype=np.float64)
+        root, _, _ = self._measure(landmarks)
+
+        positions = np.empty((len(track_ids), 34, 2))
+        positions[:, 0] = root
+        positions[:, 1:] = landmarks[:, :, :2] - root[:, None]
+        covariances = np.zeros((len(track_ids), 34, 2, 2))
+        covariances[:, :, 0, 0] = self.measurement_noise
+        covariances[:, :, 1, 1] = self.initial_velocity_variance
+
+        for track_id in track_ids:
+            self._rows[track_id] = len(self.ids)
+            self.ids.append(track_id)
+        self.positions = np.concatenate([self.positions, positions])
+        self.velocities = np.concatenate([self.velocities, np.zeros_like(positions)])
+        self.covariances = np.concatenate([self.covariances, covariances])
+        self._last_landmarks = np.concatenate([self._last_landmarks, landmarks])
+
+    def remove(self, track_ids):
+        """
+        Drops tracks.
+
+        :param track_ids: Ids of the tracks to drop
+        """
+        drop = [self._rows.pop(track_id) for track_id in track_ids if track_id in self._rows]
+        if not drop:
+            return
+        keep = np.setdiff1d(np.arange(len(self.ids)), drop)
+        self.ids = [self.ids[row] for row in keep]
+        self._rows = {track_id: row for row, track_id in enumerate(self.ids)}
+        self.positions = self.positions[keep]
+        self.velocities = self.velocities[keep]
+        self.covariances = self.covariances[keep]
+        self._last_landmarks = self._last_landmarks[keep]
+
+    def predict(self):
+        """Advances every track by one frame."""
+        self.positions += self.velocities
+        self.velocities *= self._transition[:, 1, 1][None, :, None]
+        self.covariances = (self._transition @ self.covariances @ self._transition.transpose(0, 2, 1)
+                            + self._process_noise)
+
+    def update(self, track_ids, landmarks):
+        """
+        Corrects tracks with their detections. Landmarks that are not visible leave their
+        point at the prediction; when a hip is hidden, the offsets are measured from the
+        predicted root.
+
+        :param track_ids: Ids of the detected tracks
+        :param landmarks: (N, 33, 4) normalized landmarks, one entry per id
+        """
+        if len(track_ids) == 0:
+            return
+        rows = np.array([self._rows[track_id] for track_id in track_ids])
+        landmarks = np.asarray(landmarks, dtype=np.float64)
+        root, root_visible, visible = self._measure(landmarks)
+        root = np.where(root_visible[:, None], root, self.positions[rows, 0])
+
+        measured = np.empty((len(rows), 34, 2))
+        measured[:, 0] = root
+        measured[:, 1:] = landmarks[:, :, :2] - root[:, None]
+        mask = np.concatenate([root_visible[:, None], visible], axis=1)
+
+        # Scalar-measurement Kalman update of every point, skipped where it was not measured
+        covariances = self.covariances[rows]
+        gains = covariances[:, :, :, 0] / (covariances[:, :, 0, 0] + self.measurement_noise)[:, :, None]
+        gains *= mask[:, :, None]
+        innovation = measured - self.positions[rows]
+        self.positions[rows] += gains[:, :, 0, None] * innovation
+        self.velocities[rows] += gains[:, :, 1, None] * innovation
+        self.covariances[rows] = covariances - gains[:, :, :, None] * covariances[:, :, None, 0, :]
+
+        # Depth and visibility are not filtered; the last measured values are kept
+        self._last_landmarks[rows] = landmarks
+
+    def landmarks(self, track_ids=None):
+        """
+        Current estimate of the landmarks of tracks.
+
+        :param track_ids: Ids to return, defaults to every track in order of self.ids
+        :return: (N, 33, 4) float32 landmarks; z and visibility are the last measured ones
+        """
+        rows = slice(None) if track_ids is None else np.array([self._rows[track_id] for track_id in track_ids], dtype=int)
+        landmarks = self._last_landmarks[rows].copy()
+        landmarks[:, :, :2] = self.positions[rows, :1] + self.positions[rows, 1:]
+        return landmarks.astype(np.float32)
@@ -0,0 +1,143 @@
+import numpy as np
+
+
+class KeypointTrack:
+    """
+    Keypoints of one person over a clip, stored in preallocated float32 arrays instead of
+    per-frame lists. The buffers start at the expected clip length and double when full;
+    the public arrays are views of the filled part.
+
+    - keypoints: (T, 25, 3) OpenPose keypoints in pixels, with a confidence column
+    - world_keypoints: (T, 25, 3) OpenPose keypoints in MediaPipe world coordinates
+    - landmarks: (T, 33, 4) normalized MediaPipe landmarks (x, y, z, visibility)
+    - valid: (T,) True where a pose was detected; other frames are all zeros
+    - frame_indices: (T,) index of each entry in the source video
+    """
+
+    def __init__(self, capacity=0):
+        """
+        :param capacity: Expected number of frames, e.g. CAP_PROP_FRAME_COUNT
+        """
+        capacity = max(int(capacity), 1)
+        self._keypoints = np.zeros((capacity, 25, 3), dtype=np.float32)
+        self._world_keypoints = np.zeros((capacity, 25, 3), dtype=np.float32)
+        self._landmarks = np.zeros((capacity, 33, 4), dtype=np.float32)
+        self._valid = np.zeros(capacity, dtype=bool)
+        self._frame_indices = np.zeros(capacity, dtype=np.int64)
+        self._length = 0
+
+    def __len__(self):
+        return self._length
+
+    @property
+    def capacity(self):
+        return len(self._valid)
+
+    @property
+    def keypoints(self):
+        return self._keypoints[:self._length]
+
+    @property
+    def world_keypoints(self):
+        return self._world_keypoints[:self._length]
+
+    @property
+    def landmarks(self):
+        return self._landmarks[:self._length]
+
+    @property
+    def valid(self):
+        return self._valid[:self._length]
+
+    @property
+    def frame_indices(self):
+        return self._frame_indices[:self._length]
+
+    @property
+    def nbytes(self):
+        """Memory held by the buffers, including unused capacity"""
+        return sum(buffer.nbytes for buffer in (
+            self._keypoints, self._world_keypoints, self._landmarks, self._valid, self._frame_indices
+        ))
+
+    @classmethod
+    def concatenate(cls, tracks):
+        """
+        Joins tracks end to end, e.g. the chunks of a clip processed in parallel.
+
+        :param tracks: KeypointTrack instances in frame order
+        :return: New KeypointTrack holding every frame of the inputs
+        """
+        length = sum(len(part) for part in tracks)
+        track = cls(length)
+        start = 0
+        for part in tracks:
+            end = start + len(part)
+            for name in ('keypoints', 'world_keypoints', 'landmarks', 'valid', 'frame_indices'):
+                getattr(track, '_' + name)[start:end] = getattr(part, name)
+            start = end
+        track._length = length
+        return track
+
+    def interpolate(self, frame_indices):
+        """
+        Resamples the track at other video frames, e.g. at every frame when pose detection
+        only ran on some of them. A frame between two detected entries is interpolated
+        linearly; otherwise it copies the nearer entry, including whether it was detected.
+        Frames before the first or after the last entry repeat that entry.
+
+        :param frame_indices: Increasing video frame indices, e.g. np.arange(frame_count)
+        :return: New KeypointTrack with one entry per frame index
+        """
+        frame_indices = np.asarray(frame_indices, dtype=np.int64)
+        track = KeypointTrack(len(frame_indices))
+        track._frame_indices[:len(frame_indices)] = frame_indices
+        track._length = len(frame_indices)
+        if len(self) == 0:
+            return track
+
+        known = self.frame_indices
+        right = np.clip(np.searchsorted(known, frame_indices), 0, len(self) - 1)
+        left = np.where(known[right] > frame_indices, np.maximum(right - 1, 0), right)
+        span = known[right] - known[left]
+        weight = np.divide(frame_indices - known[left], span, out=np.zeros(len(frame_indices)), where=span > 0)
+        weight = np.clip(weight, 0.0, 1.0).astype(np.float32)
+
+        nearest = np.where(weight <= 0.5, left, right)
+        blend = self.valid[left] & self.valid[right]
+        w = weight[blend, None, None]
+        for name in ('keypoints', 'world_keypoints', 'landmarks'):
+            values = getattr(self, name)
+            resampled = values[nearest]
+            resampled[blend] = (1 - w) * values[left[blend]] + w * values[right[blend]]
+            getattr(track, '_' + name)[:len(frame_indices)] = resampled
+        track._valid[:len(frame_indices)] = self.valid[nearest]
+        return track
+
+    def _grow(self):
+        capacity = 2 * self.capacity
+        for name in ('_keypoints', '_world_keypoints', '_landmarks', '_valid', '_frame_indices'):
+            buffer = getattr(self, name)
+            grown = np.zeros((capacity,) + buffer.shape[1:], dtype=buffer.dtype)
+            grown[:self._length] = buffer[:self._length]
+            setattr(self, name, grown)
+
+    def append(self, keypoints, world_keypoints=None, landmarks=None, frame_index=None):
+        """
+        Adds one frame.
+
+        :param keypoints: (25, 3) OpenPose keypoints
+        :param world_keypoints: (25, 3) OpenPose world keypoints, or None
+        :param landmarks: (33, 4) MediaPipe landmark array, or None when no pose was detected
+        :param frame_index: Index of the frame in the video; defaults to the entry's position
+        """
+        if self._length == self.capacity:
+            self._grow()
+
+        i = self._length
+        self._keypoints[i] = keypoints
+        self._world_keypoints[i] = 0 if world_keypoints is None else world_keypoints
+        self._landmarks[i] = 0 if landmarks is None else landmarks
+        self._valid[i] = landmarks is not None
+        self._frame_indices[i] = i if frame_index is None else frame_index
+        self._length += 1
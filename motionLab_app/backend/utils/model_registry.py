@@ -0,0 +1,196 @@
+import os
+import threading
+import time
+
+import mediapipe as mp
+
+
+class ModelRegistry:
+    """
+    Process-wide cache of the pipeline models.
+
+    Every model is loaded lazily on first use and kept warm for the lifetime of the
+    process. The VideoPose checkpoint is stateless at inference time and is shared by
+    all threads. YOLO keeps its tracker on the predictor, and MediaPipe Pose keeps its
+    landmark smoothing inside the graph, so those are lent out to one caller at a time
+    from process-wide pools and returned when the caller is done. Instances outlive the
+    threads that used them, e.g. the request threads of the Flask server.
+    """
+
+    _lock = threading.Lock()
+    _shared_models = {}
+    _pools = {}  # Idle YOLO and Pose instances by (kind, options)
+    _lent = {}  # Pool key of every instance that is in use, by id
+    _metrics = {}
+
+    @classmethod
+    def _record(cls, name, load_seconds=None):
+        """Counts a lookup of a model and, if it had to be loaded, how long that took."""
+        with cls._lock:
+            entry = cls._metrics.setdefault(name, {
+                "loads": 0,
+                "hits": 0,
+                "total_load_seconds": 0.0,
+                "last_load_seconds": None,
+                "last_loaded_at": None,
+            })
+            if load_seconds is None:
+                entry["hits"] += 1
+                return
+            entry["loads"] += 1
+            entry["total_load_seconds"] += load_seconds
+            entry["last_load_seconds"] = load_seconds
+            entry["last_loaded_at"] = time.time()
+
+    @classmethod
+    def _acquire(cls, key, load, reset):
+        """
+        Takes an idle instance from the pool of key and resets it, or loads a new one.
+
+        :param key: Pool key, starting with the metrics name of the model
+        :param load: Callable building a new instance
+        :param reset: Callable clearing the state an idle instance kept from its last use
+        :return: Model instance, lent until it is given back with _release
+        """
+        with cls._lock:
+            pool = cls._pools.get(key)
+            model = pool.pop() if pool else None
+
+        if model is None:
+            # Loaded outside the lock so other models can be handed out meanwhile
+            start = time.perf_counter()
+            model = load()
+            cls._record(key[0], time.perf_counter() - start)
+        else:
+            reset(model)
+            cls._record(key[0])
+
+        with cls._lock:
+            cls._lent[id(model)] = key
+        return model
+
+    @classmethod
+    def _release(cls, model):
+        """
+        Returns an instance from _acquire to its pool.
+
+        :return: False if the instance did not come from the registry
+        """
+        with cls._lock:
+            key = cls._lent.pop(id(model), None)
+            if key is None:
+                return False
+            cls._pools.setdefault(key, []).append(model)
+        return True
+
+    @classmethod
+    def get_estimator_3d(cls, config_file, checkpoint_file):
+        """
+        Returns the shared 3D pose estimator for a config/checkpoint pair, loading it once.
+
+        :param config_file: Path to the VideoPose config
+        :param checkpoint_file: Path to the model checkpoint
+        :return: Estimator3D instance
+        """
+        key = ("estimator_3d", os.path.abspath(config_file), os.path.abspath(checkpoint_file))
+        with cls._lock:
+            estimator = cls._shared_models.get(key)
+            if estimator is None:
+                # Imported here so the registry can be used without pulling in torch
+                from utils.pose_utils import PoseUtils
+
+                start = time.perf_counter()
+                estimator = PoseUtils.initialize_3D_pose_estimator(config_file, checkpoint_file)
+                cls._shared_models[key] = estimator
+                load_seconds = time.perf_counter() - start
+            else:
+                load_seconds = None
+
+        cls._record("estimator_3d", load_seconds)
+        return estimator
+
+    @classmethod
+    def get_exported_estimator_3d(cls, artifact_file, backend=None):
+        """
+        Returns the shared 3D pose estimator for an exported TorchScript/ONNX artifact.
+
+        :param artifact_file: Path to the exported model
+        :param backend: 'torchscript' or 'onnx'; inferred from the extension by default
+        :return: ExportedEstimator3D instance
+        """
+        key = ("exported_estimator_3d", os.path.abspath(artifact_file), backend)
+        with cls._lock:
+            estimator = cls._shared_models.get(key)
+            if estimator is None:
+                from utils.pose_utils import PoseUtils
+
+                start = time.perf_counter()
+                estimator = PoseUtils.initialize_exported_3D_pose_estimator(artifact_file, backend)
+                cls._shared_models[key] = estimator
+                load_seconds = time.perf_counter() - start
+            else:
+                load_seconds = None
+
+        cls._record("estimator_3d", load_seconds)
+        return estimator
+
+    @classmethod
+    def acquire_yolo(cls, model_path):
+        """
+        Takes an idle YOLO model for the given weights from the pool, or loads one.
+        Its tracker state is cleared so track ids start fresh for the next video.
+        Hand it back with release_yolo when done.
+
+        :param model_path: Path or name of the YOLO weights
+        :return: ultralytics YOLO instance
+        """
+        def load():
+            from ultralytics import YOLO
+            return YOLO(model_path)
+
+        return cls._acquire(("yolo", model_path), load, cls.reset_yolo_tracker)
+
+    @classmethod
+    def release_yolo(cls, model):
+        """Returns a YOLO model obtained from acquire_yolo to the pool."""
+        cls._release(model)
+
+    @staticmethod
+    def reset_yolo_tracker(model):
+        """Clears the trackers that track(persist=True) keeps on the model's predictor."""
+        predictor = getattr(model, "predictor", None)
+        for tracker in getattr(predictor, "trackers", None) or []:
+            tracker.reset()
+
+    @classmethod
+    def acquire_pose_model(cls, **options):
+        """
+        Takes an idle MediaPipe Pose graph from the pool, or builds one.
+        The graph is reset so no smoothing state leaks in from a previous video.
+        Hand it back with release_pose_model when done.
+
+        :param options: Keyword arguments for mp.solutions.pose.Pose
+        :return: MediaPipe Pose instance
+        """
+        key = ("mediapipe_pose",) + tuple(sorted(options.items()))
+        return cls._acquire(key, lambda: mp.solutions.pose.Pose(**options), lambda pose_model: pose_model.reset())
+
+    @classmethod
+    def release_pose_model(cls, pose_model):
+        """Returns a Pose graph obtained from acquire_pose_model to the pool."""
+        if not cls._release(pose_model):
+            pose_model.close()
+
+    @classmethod
+    def get_metrics(cls):
+        """
+        Load-time metrics of every model this process has requested.
+
+        :return: Dictionary with the process id and, per model, the number of loads,
+                 cache hits and load durations in seconds
+        """
+        with cls._lock:
+            return {
+                "pid": os.getpid(),
+                "models": {name: dict(entry) for name, entry in cls._metrics.items()},
+            }
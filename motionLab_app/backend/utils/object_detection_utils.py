@@ -1,14 +1,76 @@
 import numpy as np
+from utils.video_utils import VideoUtils
 
 class ObjectDetectionUtils:
     @staticmethod
-    def detect_and_crop_people(yolo_model, frame, tracker_path, img_width, img_height):
+    def detect_people(yolo_model, frame, tracker_path, img_width, img_height, scale=1.0, with_keypoints=False):
         """
-        Runs YOLO tracking, filters detections, and crops detected people.
-        Returns a list of (person_id, cropped_frame) tuples.
+        Runs YOLO tracking and filters detections.
+        Returns a list of (person_id, (x1, y1, x2, y2)) tuples in source pixel coordinates.
+
+        :param frame: Frame to run YOLO on, e.g. from VideoUtils.resize_for_inference
+        :param img_width: Source frame width
+        :param img_height: Source frame height
+        :param scale: Scale of the frame relative to the source, used to map the boxes back
+        :param with_keypoints: Return (person_id, box, keypoints) tuples instead, with the (17, 3)
+                               COCO keypoints (x, y, confidence) of a YOLO pose model in source
+                               pixels, or None for a detection-only model
         """
         results = yolo_model.track(frame, persist=True, tracker=tracker_path)
-        cropped_people = []
+        return ObjectDetectionUtils.filter_people(results, img_width, img_height, scale, with_keypoints)
+
+    @staticmethod
+    def create_tracker(tracker_path):
+        """
+        Builds a standalone ByteTrack tracker from a tracker config, for detect_people_batch.
+
+        :param tracker_path: Path to a tracker YAML such as utils/bytetrack.yaml
+        :return: ultralytics BYTETracker with fresh state
+        """
+        from ultralytics.trackers.byte_tracker import BYTETracker
+        from ultralytics.utils import IterableSimpleNamespace
+        try:
+            from ultralytics.utils import yaml_load
+        except ImportError:  # ultralytics >= 8.3.100 replaced yaml_load with the YAML class
+            from ultralytics.utils import YAML
+            yaml_load = YAML.load
+
+        return BYTETracker(args=IterableSimpleNamespace(**yaml_load(tracker_path)))
+
+    @staticmethod
+    def detect_people_batch(yolo_model, frames, tracker, img_width, img_height, scale=1.0, with_keypoints=False):
+        """
+        Runs YOLO on a batch of consecutive frames in one call, then feeds each frame's
+        detections to the tracker in order, as track(persist=True) does frame by frame.
+        The tracker update follows the on_predict_postprocess_end callback of the pinned
+        ultralytics release: a frame without detections does not update the tracker, and a
+        frame whose detections give no confirmed track keeps its untracked detections.
+
+        :param frames: Consecutive frames to run YOLO on, e.g. from VideoUtils.resize_for_inference
+        :param tracker: Tracker from create_tracker, kept for the whole video
+        :return: One list per frame, in the format of detect_people
+        """
+        import torch
+
+        people = []
+        # conf=0.1 as track() uses, so the tracker also gets the low-score detections it matches second
+        for result in yolo_model.predict(frames, conf=0.1, verbose=False):
+            det = result.boxes.cpu().numpy()
+            tracks = tracker.update(det, result.orig_img) if len(det) else []
+            if len(tracks):
+                # Keep the tracked detections, with their boxes replaced by the tracks' [x1, y1, x2, y2, id, conf, cls]
+                result = result[tracks[:, -1].astype(int)]
+                result.update(boxes=torch.as_tensor(tracks[:, :-1], device=result.boxes.data.device))
+            people.append(ObjectDetectionUtils.filter_people([result], img_width, img_height, scale, with_keypoints))
+        return people
+
+    @staticmethod
+    def filter_people(results, img_width, img_height, scale=1.0, with_keypoints=False):
+        """
+        Keeps the confident, large enough person detections of YOLO results.
+        See detect_people for the arguments and the returned list.
+        """
+        people = []
 
         for result in results:
             boxes = result.boxes.xyxy
@@ -19,22 +81,84 @@ class ObjectDetectionUtils:
             if len(boxes) == 0:
                 continue
 
+            keypoints = None
+            if with_keypoints and getattr(result, 'keypoints', None) is not None:
+                keypoints = result.keypoints.data.cpu().numpy() / np.array([scale, scale, 1.0])
+
             for i, box in enumerate(boxes):
-                x1, y1, x2, y2 = box
+                x1, y1, x2, y2 = box / scale if scale != 1.0 else box
                 confidence = confidences[i]
 
-                bbox_area = abs(x2 - x1) * abs(y2 - y1)  
+                bbox_area = abs(x2 - x1) * abs(y2 - y1)
                 image_area = img_width * img_height
 
                 if bbox_area < 0.05 * image_area:  # Ignore small detections
                     continue
 
                 if labels[i] == 0 and confidence > 0.7:
-                    black_background = np.zeros_like(frame)
-                    person_frame = frame[int(y1):int(y2), int(x1):int(x2)]
-                    black_background[int(y1):int(y2), int(x1):int(x2)] = person_frame  
+                    person_id = int(ids[i]) if ids is not None and ids[i] is not None else None
+                    box = (int(x1), int(y1), int(x2), int(y2))
+                    if with_keypoints:
+                        people.append((person_id, box, None if keypoints is None else keypoints[i]))
+                    else:
+                        people.append((person_id, box))
 
-                    person_id = int(ids[i]) if ids[i] is not None else None
-                    cropped_people.append((person_id, black_background))
+        return people
 
-        return cropped_people
+    @staticmethod
+    def crop_person(frame, box, padding=0.15):
+        """
+        Cuts a tight crop around a person, padded by a fraction of the box size on every side
+        and clipped to the frame. The crop is a view of the frame, not a copy.
+
+        :param frame: Source frame
+        :param box: Tuple (x1, y1, x2, y2) in the frame's pixel coordinates
+        :param padding: Margin added on each side, as a fraction of the box width and height
+        :return: Tuple (crop, (x1, y1)) with the crop's top-left corner in the frame
+        """
+        height, width = frame.shape[:2]
+        x1, y1, x2, y2 = box
+        pad_x, pad_y = int(padding * (x2 - x1)), int(padding * (y2 - y1))
+        x1, y1 = max(0, int(x1) - pad_x), max(0, int(y1) - pad_y)
+        x2, y2 = min(width, int(x2) + pad_x), min(height, int(y2) + pad_y)
+        return frame[y1:max(y2, y1 + 1), x1:max(x2, x1 + 1)], (x1, y1)
+
+    @staticmethod
+    def mask_person(frame, box):
+        """
+        Pastes the box region of the frame onto a black background of the same size.
+
+        :param frame: Source frame
+        :param box: Tuple (x1, y1, x2, y2) in pixel coordinates
+        :return: Full-size frame with everything outside the box blacked out
+        """
+        x1, y1, x2, y2 = box
+        black_background = np.zeros_like(frame)
+        black_background[y1:y2, x1:x2] = frame[y1:y2, x1:x2]
+        return black_background
+
+    @staticmethod
+    def scale_box(box, scale):
+        """
+        Maps a box from source pixel coordinates to a frame resized by scale.
+
+        :param box: Tuple (x1, y1, x2, y2) in source pixel coordinates
+        :param scale: Scale from VideoUtils.resize_for_inference
+        :return: Tuple (x1, y1, x2, y2) of ints in the resized frame
+        """
+        if scale == 1.0:
+            return box
+        return tuple(int(round(value * scale)) for value in box)
+
+    @staticmethod
+    def detect_and_crop_people(yolo_model, frame, tracker_path, img_width, img_height):
+        """
+        Runs YOLO tracking on a downsampled copy of the frame, filters detections, and crops
+        detected people from the full-resolution frame.
+        Returns a list of (person_id, cropped_frame) tuples.
+        """
+        inference_frame, scale = VideoUtils.resize_for_inference(frame)
+        people = ObjectDetectionUtils.detect_people(
+            yolo_model, inference_frame, tracker_path, img_width, img_height, scale
+        )
+        return [(person_id, ObjectDetectionUtils.mask_person(frame, box)) for person_id, box in people]
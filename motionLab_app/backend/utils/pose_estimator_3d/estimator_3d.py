@@ -1,6 +1,4 @@
-from .model.factory import create_model
-from .dataset.wild_pose_dataset import WildPoseDataset
-import mediapipe as mp
+from .dataset.wild_pose_dataset import WildPoseDataset, normalize_screen_coordiantes
 import numpy as np
 import pprint
 import torch
@@ -8,13 +6,27 @@ import torch.utils.data
 import yaml
 from easydict import EasyDict
 from pathlib import Path
+import copy
 import cv2
 import os
+import threading
 
 class Estimator3D(object):
     """Base class of 3D human pose estimator."""
 
-    def __init__(self, config_file, checkpoint_file):
+    PRECISIONS = ('float32', 'bfloat16', 'int8')
+
+    def __init__(self, config_file, checkpoint_file, test_flip=None, precision=None, num_threads=None):
+        """
+        Args:
+            config_file: Path to the VideoPose config
+            checkpoint_file: Path to the model checkpoint
+            test_flip: Average with the left/right flipped input; defaults to POSE_3D_TEST_FLIP,
+                then to cfg.DATASET.TEST_FLIP
+            precision: 'float32', 'bfloat16' or 'int8' (dynamic quantization, CPU only);
+                defaults to POSE_3D_PRECISION, then to 'float32'
+            num_threads: Torch intra-op threads for this process; defaults to POSE_3D_THREADS
+        """
         try:
             # Ensure files exist
             if not os.path.exists(config_file):
@@ -72,6 +84,9 @@ class Estimator3D(object):
             
             # Convert checkpoint file to string path and load model
             checkpoint_file = str(Path(checkpoint_file).resolve())
+            # Imported here so exported backends never load the training model code
+            from .model.factory import create_model
+
             self.model = create_model(self.cfg, checkpoint_file)
             
             self.device = torch.device(
@@ -80,17 +95,136 @@ class Estimator3D(object):
             print(f'=> Use device {self.device}.')
             self.model.to(self.device)
 
-            # Initialize MediaPipe Hands
-            self.mp_hands = mp.solutions.hands.Hands(
-                static_image_mode=False,
-                max_num_hands=2,
-                min_detection_confidence=0.5,
-                min_tracking_confidence=0.5
-            )
+            self._setup_inference(test_flip, precision, num_threads)
         except Exception as e:
             raise RuntimeError(f"Error initializing 3D estimator: {e}")
 
-    def estimate(self, poses_2d, image_width, image_height):
+    @classmethod
+    def from_model(cls, cfg, model, device=None, test_flip=None, precision=None, num_threads=None):
+        """Wraps an already built model, e.g. one that was not loaded from a checkpoint file."""
+        estimator = cls.__new__(cls)
+        estimator.cfg = cfg
+        estimator.device = device or torch.device('cpu')
+        estimator.model = model.eval().to(estimator.device)
+        estimator._setup_inference(test_flip, precision, num_threads)
+        return estimator
+
+    def _setup_inference(self, test_flip, precision, num_threads):
+        if test_flip is None and os.getenv('POSE_3D_TEST_FLIP'):
+            test_flip = os.getenv('POSE_3D_TEST_FLIP').lower() in ('1', 'true', 'yes')
+        self.test_flip = bool(self.cfg.DATASET.TEST_FLIP) if test_flip is None else test_flip
+
+        self.precision = precision or os.getenv('POSE_3D_PRECISION', 'float32')
+        if self.precision not in self.PRECISIONS:
+            raise ValueError(f'Precision "{self.precision}" is invalid.')
+
+        num_threads = num_threads or os.getenv('POSE_3D_THREADS')
+        if num_threads:
+            torch.set_num_threads(int(num_threads))
+
+        self._models = {'float32': self.model}
+        self._models_lock = threading.Lock()
+
+        # MediaPipe Hands is only needed by process_hands, so it is built on first use
+        self.mp_hands = None
+
+    def get_model(self, precision=None):
+        """Returns the model for a precision, building the bfloat16/int8 copy on first use."""
+        precision = precision or self.precision
+        if precision not in self.PRECISIONS:
+            raise ValueError(f'Precision "{precision}" is invalid.')
+
+        with self._models_lock:
+            model = self._models.get(precision)
+            if model is None:
+                if precision == 'bfloat16':
+                    model = copy.deepcopy(self.model).to(torch.bfloat16)
+                else:
+                    if self.device.type != 'cpu':
+                        raise ValueError('int8 dynamic quantization is only supported on CPU.')
+                    from .model.module import convs_to_linear
+
+                    # quantize_dynamic only covers nn.Linear, so the convolutions are rewritten first
+                    model = torch.ao.quantization.quantize_dynamic(
+                        convs_to_linear(copy.deepcopy(self.model)), {torch.nn.Linear}, dtype=torch.qint8
+                    )
+                self._models[precision] = model.eval()
+            return model
+
+    # Output frames per forward pass of estimate_sequence; bounds activation memory on long videos
+    SEQUENCE_CHUNK_SIZE = 4096
+
+    def estimate(self, poses_2d, image_width, image_height, test_flip=None, precision=None):
+        """
+        Lifts a (n_frames, IN_JOINT, 2) sequence of 2D poses to 3D (in mm, root-centered).
+        Runs the whole sequence through the temporal model unless POSE_3D_INFERENCE=windowed.
+        test_flip and precision override the estimator defaults for this call.
+        """
+        if os.getenv('POSE_3D_INFERENCE', 'sequence') == 'windowed':
+            return self.estimate_windowed(poses_2d, image_width, image_height, test_flip, precision)
+        return self.estimate_sequence(poses_2d, image_width, image_height, test_flip=test_flip, precision=precision)
+
+    def _get_forward(self, precision, sequence):
+        """Model forward for a precision, taking and returning float32 tensors."""
+        model = self.get_model(precision)
+        forward = model.forward_sequence if sequence else model
+        if (precision or self.precision) != 'bfloat16':
+            return forward
+        return lambda input_pose: forward(input_pose.to(torch.bfloat16)).float()
+
+    def _predict(self, input_pose, forward, test_flip=None):
+        """Runs forward on the input, averaged with the flipped input when test flip is on."""
+        output = forward(input_pose)
+        if self.test_flip if test_flip is None else test_flip:
+            input_lefts = self.cfg.DATASET.INPUT_LEFT_JOINTS
+            input_rights = self.cfg.DATASET.INPUT_RIGHT_JOINTS
+            output_lefts = self.cfg.DATASET.OUTPUT_LEFT_JOINTS
+            output_rights = self.cfg.DATASET.OUTPUT_RIGHT_JOINTS
+
+            flip_input_pose = input_pose.clone()
+            flip_input_pose[..., :, 0] *= -1
+            flip_input_pose[..., input_lefts + input_rights, :] = flip_input_pose[..., input_rights + input_lefts, :]
+
+            flip_output = forward(flip_input_pose)
+            flip_output[..., :, 0] *= -1
+            flip_output[..., output_lefts + output_rights, :] = flip_output[..., output_rights + output_lefts, :]
+
+            output = (output + flip_output) / 2
+        output[:, 0] = 0 # center the root joint
+        output *= 1000 # m -> mm
+        return output
+
+    def estimate_sequence(self, poses_2d, image_width, image_height, chunk_size=None, test_flip=None, precision=None):
+        """
+        Edge-pads the sequence by half a window on each side, the way WildPoseDataset pads
+        every window, and runs the fully convolutional model over it in chunks of
+        chunk_size output frames. Each chunk carries receptive_field - 1 frames of overlap,
+        so the result matches estimate_windowed at O(n_frames) cost.
+        """
+        chunk_size = chunk_size or self.SEQUENCE_CHUNK_SIZE
+        n_frames = poses_2d.shape[0]
+        pad = self.cfg.DATASET.SEQ_LEN // 2
+
+        input_poses = normalize_screen_coordiantes(poses_2d, image_width, image_height)
+        input_poses = np.pad(input_poses, ((pad, pad), (0, 0), (0, 0)), 'edge')
+        input_poses = torch.from_numpy(input_poses).float().to(self.device)
+
+        forward = self._get_forward(precision, sequence=True)
+        poses_3d = np.zeros((n_frames, self.cfg.DATASET.OUT_JOINT, 3))
+        print('=> Begin to estimate 3D poses.')
+        with torch.no_grad():
+            for start in range(0, n_frames, chunk_size):
+                end = min(start + chunk_size, n_frames)
+                input_pose = input_poses[start:end + 2 * pad].unsqueeze(0)
+
+                output = self._predict(input_pose, forward, test_flip)
+                poses_3d[start:end] = output.cpu().numpy()
+                print(f'{end} / {n_frames}')
+
+        return poses_3d
+
+    def estimate_windowed(self, poses_2d, image_width, image_height, test_flip=None, precision=None):
+        """Original inference: one padded receptive-field window per frame through a DataLoader."""
         # pylint: disable=no-member
         dataset = WildPoseDataset(
             input_poses=poses_2d,
@@ -102,6 +236,7 @@ class Estimator3D(object):
             dataset=dataset,
             batch_size=self.cfg.TRAIN.BATCH_SIZE
         )
+        forward = self._get_forward(precision, sequence=False)
         poses_3d = np.zeros((poses_2d.shape[0], self.cfg.DATASET.OUT_JOINT, 3))
         frame = 0
         print('=> Begin to estimate 3D poses.')
@@ -109,24 +244,7 @@ class Estimator3D(object):
             for batch in loader:
                 input_pose = batch['input_pose'].float().to(self.device)
 
-                output = self.model(input_pose)
-                if self.cfg.DATASET.TEST_FLIP:
-                    input_lefts = self.cfg.DATASET.INPUT_LEFT_JOINTS
-                    input_rights = self.cfg.DATASET.INPUT_RIGHT_JOINTS
-                    output_lefts = self.cfg.DATASET.OUTPUT_LEFT_JOINTS
-                    output_rights = self.cfg.DATASET.OUTPUT_RIGHT_JOINTS
-
-                    flip_input_pose = input_pose.clone()
-                    flip_input_pose[..., :, 0] *= -1
-                    flip_input_pose[..., input_lefts + input_rights, :] = flip_input_pose[..., input_rights + input_lefts, :]
-
-                    flip_output = self.model(flip_input_pose)
-                    flip_output[..., :, 0] *= -1
-                    flip_output[..., output_lefts + output_rights, :] = flip_output[..., output_rights + output_lefts, :]
-
-                    output = (output + flip_output) / 2
-                output[:, 0] = 0 # center the root joint
-                output *= 1000 # m -> mm
+                output = self._predict(input_pose, forward, test_flip)
 
                 batch_size = output.shape[0]
                 poses_3d[frame:frame+batch_size] = output.cpu().numpy()
@@ -137,6 +255,16 @@ class Estimator3D(object):
 
     def process_hands(self, frame):
         """Process hand landmarks using MediaPipe"""
+        if self.mp_hands is None:
+            import mediapipe as mp
+
+            self.mp_hands = mp.solutions.hands.Hands(
+                static_image_mode=False,
+                max_num_hands=2,
+                min_detection_confidence=0.5,
+                min_tracking_confidence=0.5
+            )
+
         frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
         results = self.mp_hands.process(frame_rgb)
         
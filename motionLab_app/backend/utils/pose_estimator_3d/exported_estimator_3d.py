@@ -0,0 +1,76 @@
+from .estimator_3d import Estimator3D
+import json
+import os
+import numpy as np
+import torch
+from easydict import EasyDict
+
+
+class ExportedEstimator3D(Estimator3D):
+    """
+    3D human pose estimator backed by an artifact written by scripts/export_pose_model.py:
+    a frozen TorchScript module (.pt) or an ONNX graph (.onnx), each with a .json sidecar
+    holding the config values inference needs. The VideoPose model code is never imported.
+    """
+
+    BACKENDS = ('torchscript', 'onnx')
+
+    def __init__(self, artifact_file, backend=None, test_flip=None, num_threads=None):
+        """
+        Args:
+            artifact_file: Path to the exported .pt or .onnx file
+            backend: 'torchscript' or 'onnx'; inferred from the file extension by default
+            test_flip: Average with the left/right flipped input; defaults to the exported config
+            num_threads: Torch / ONNX Runtime intra-op threads for this process
+        """
+        try:
+            if not os.path.exists(artifact_file):
+                raise FileNotFoundError(f"Exported model not found: {artifact_file}")
+            metadata_file = os.path.splitext(artifact_file)[0] + '.json'
+            if not os.path.exists(metadata_file):
+                raise FileNotFoundError(f"Exported model metadata not found: {metadata_file}")
+
+            self.backend = backend or ('onnx' if artifact_file.endswith('.onnx') else 'torchscript')
+            if self.backend not in self.BACKENDS:
+                raise ValueError(f'Backend "{self.backend}" is invalid.')
+
+            with open(metadata_file) as f:
+                self.cfg = EasyDict(json.load(f))
+
+            self.device = torch.device('cpu')
+            num_threads = num_threads or os.getenv('POSE_3D_THREADS')
+
+            print(f'=> Load exported 3D estimator ({self.backend}) from {artifact_file}')
+            if self.backend == 'torchscript':
+                self.model = torch.jit.load(artifact_file, map_location=self.device).eval()
+                self._forward = self.model
+            else:
+                import onnxruntime
+
+                options = onnxruntime.SessionOptions()
+                if num_threads:
+                    options.intra_op_num_threads = int(num_threads)
+                self.model = onnxruntime.InferenceSession(
+                    artifact_file, options, providers=['CPUExecutionProvider']
+                )
+                self._forward = self._run_onnx
+
+            self._setup_inference(test_flip, 'float32', num_threads)
+        except Exception as e:
+            raise RuntimeError(f"Error initializing exported 3D estimator: {e}")
+
+    def _run_onnx(self, input_pose):
+        (output,) = self.model.run(None, {'input_pose': input_pose.cpu().numpy().astype(np.float32)})
+        return torch.from_numpy(output)
+
+    def get_model(self, precision=None):
+        """Exported artifacts are fixed at float32; the conv+BN pairs are already fused."""
+        if (precision or self.precision) != 'float32':
+            raise ValueError('Exported 3D estimators only support float32 inference.')
+        return self.model
+
+    def _get_forward(self, precision, sequence):
+        self.get_model(precision)
+        # The artifact maps (batch, seq_len, joint, channel) to one pose per output frame,
+        # which is what both the windowed and the sequence paths expect
+        return self._forward
@@ -43,5 +43,8 @@ def create_model(cfg, checkpoint_file):
     model.load_state_dict(model_dict)
 
     model = model.eval()
+    if cfg.MODEL.NAME == 'video_pose':
+        # Inference only from here on, so the batch norms can be folded into the convolutions
+        model.fuse_bn()
 
     return model
\ No newline at end of file
@@ -52,4 +52,74 @@ class DepthwiseSeparableConv1d(nn.Module):
     def forward(self, x):
         x = self.depthwise_conv(x)
         x = self.pointwise_conv(x)
-        return x
\ No newline at end of file
+        return x
+
+def fuse_conv_bn(conv, bn):
+    """
+    Folds an eval-mode BatchNorm1d into the convolution that feeds it and returns the fused
+    convolution. For a DepthwiseSeparableConv1d the batch norm goes into the pointwise conv.
+    """
+    if isinstance(conv, DepthwiseSeparableConv1d):
+        conv.pointwise_conv = fuse_conv_bn(conv.pointwise_conv, bn)
+        return conv
+
+    fused = nn.Conv1d(
+        conv.in_channels, conv.out_channels, conv.kernel_size, stride=conv.stride,
+        padding=conv.padding, dilation=conv.dilation, groups=conv.groups, bias=True
+    ).to(conv.weight.device)
+    with torch.no_grad():
+        # bn(y) = (y - mean) * gamma / sqrt(var + eps) + beta, applied per output channel
+        scale = torch.rsqrt(bn.running_var + bn.eps)
+        if bn.affine:
+            scale = scale * bn.weight
+        bias = conv.bias if conv.bias is not None else torch.zeros_like(bn.running_mean)
+        shift = (bias - bn.running_mean) * scale
+        if bn.affine:
+            shift = shift + bn.bias
+
+        fused.weight.copy_(conv.weight * scale[:, None, None])
+        fused.bias.copy_(shift)
+    return fused
+
+
+class ConvAsLinear(nn.Module):
+    """
+    Evaluates a Conv1d (groups=1, stride=1, no padding) as an nn.Linear over its stacked
+    dilated taps. The result is the same convolution, but it can be dynamically quantized
+    like any other nn.Linear.
+    """
+
+    def __init__(self, conv):
+        super(ConvAsLinear, self).__init__()
+        assert conv.groups == 1 and conv.stride == (1,) and conv.padding == (0,)
+
+        out_channels, in_channels, kernel_size = conv.weight.shape
+        self.kernel_size = kernel_size
+        self.dilation = conv.dilation[0]
+        self.linear = nn.Linear(in_channels * kernel_size, out_channels, bias=conv.bias is not None)
+        with torch.no_grad():
+            # Tap k of input channel c lands at column k * in_channels + c
+            self.linear.weight.copy_(conv.weight.permute(0, 2, 1).reshape(out_channels, -1))
+            if conv.bias is not None:
+                self.linear.bias.copy_(conv.bias)
+
+
+    def forward(self, x):
+        length = x.shape[2] - (self.kernel_size - 1) * self.dilation
+        taps = [
+            x[:, :, k * self.dilation : k * self.dilation + length]
+            for k in range(self.kernel_size)
+        ]
+        x = torch.cat(taps, dim=1) if len(taps) > 1 else x
+        return self.linear(x.transpose(1, 2)).transpose(1, 2)
+
+
+def convs_to_linear(module):
+    """Replaces, in place, every plain Conv1d under module with an equivalent ConvAsLinear."""
+    for name, child in module.named_children():
+        if isinstance(child, nn.Conv1d) and child.groups == 1 \
+                and child.stride == (1,) and child.padding == (0,):
+            setattr(module, name, ConvAsLinear(child))
+        else:
+            convs_to_linear(child)
+    return module
@@ -1,4 +1,4 @@
-from .module import DepthwiseSeparableConv1d
+from .module import DepthwiseSeparableConv1d, fuse_conv_bn
 
 import torch
 import torch.nn as nn
@@ -18,6 +18,13 @@ class VideoPose(nn.Module):
     def forward(self, x):
         return self.current_model(x)
 
+    def forward_sequence(self, x):
+        return self.eval_model.forward_sequence(x)
+
+    def fuse_bn(self):
+        self.eval_model.fuse_bn()
+        return self
+
 
 class TemporalModelBase(nn.Module):
     """
@@ -48,6 +55,20 @@ class TemporalModelBase(nn.Module):
         self.expand_bn.momentum = momentum
         for bn in self.layers_bn:
             bn.momentum = momentum
+
+    def fuse_bn(self):
+        """
+        Folds every BatchNorm1d into the convolution before it, for inference only.
+        The batch norms are replaced by identities, so the model cannot be trained afterwards.
+        """
+        assert not self.training, 'Batch norms can only be fused in eval mode'
+
+        self.expand_conv = fuse_conv_bn(self.expand_conv, self.expand_bn)
+        self.expand_bn = nn.Identity()
+        for i, bn in enumerate(self.layers_bn):
+            self.layers_conv[i] = fuse_conv_bn(self.layers_conv[i], bn)
+            self.layers_bn[i] = nn.Identity()
+        return self
         
 
     def forward(self, x):
@@ -95,6 +116,33 @@ class TemporalModel(TemporalModelBase):
             
         self.layers_conv = nn.ModuleList(layers_conv)
         self.layers_bn = nn.ModuleList(layers_bn)
+
+    def receptive_field(self):
+        """Number of input frames that produce one output frame."""
+        return 1 + 2 * sum(self.pad)
+
+    def forward_sequence(self, x):
+        """
+        Runs a whole sequence through the convolutions at once, instead of one
+        receptive-field window per output frame.
+
+        Args:
+            x: (batch, seq_len, joint, channel) with seq_len >= receptive field
+        Returns:
+            (batch * (seq_len - receptive_field + 1), out_joint, out_channel), where
+            output frame t is the prediction for input window [t, t + receptive_field)
+        """
+        assert len(x.shape) == 4
+        assert x.shape[-2] == self.in_joint
+
+        batch_size, seq_len, joint, channel = x.shape
+        x = x.view(batch_size, seq_len, -1)
+        x = x.permute(0, 2, 1) # channel first
+
+        x = self._forward_blocks(x)
+
+        x = x.permute(0, 2, 1) # channel last
+        return x.reshape(-1, self.out_joint, self.out_channel)
         
     def _forward_blocks(self, x):
         x = self.drop(self.relu(self.expand_bn(self.expand_conv(x))))
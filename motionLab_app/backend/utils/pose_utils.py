@@ -1,7 +1,13 @@
+import os
+import itertools
+import math
+import operator
 import numpy as np
-import importlib
 import pathlib
 from utils.pose_estimator_3d import estimator_3d
+from utils.keypoint_track import KeypointTrack
+from utils.video_utils import VideoUtils
+from utils.object_detection_utils import ObjectDetectionUtils
 import cv2
 
 class PoseUtils:
@@ -13,6 +19,34 @@ class PoseUtils:
             28: 11, 31: 20, 32: 23, 29: 19, 30: 22, 
             2: 16, 5: 15, 7: 18, 8: 17,
     }
+
+    # The two MediaPipe landmarks averaged into each OpenPose joint: mediapipe_to_openpose
+    # inverted (a landmark averaged with itself), the neck and mid-hip as the midpoints of
+    # the shoulders and hips, and the ankles repeated for the small toes (21, 24)
+    openpose_joint_pairs = np.array([
+        [0, 11, 12, 14, 18, 11, 13, 17, 23, 24, 26, 28, 23, 25, 27, 5, 2, 8, 7, 29, 31, 27, 30, 32, 28],
+        [0, 12, 12, 14, 18, 11, 13, 17, 24, 24, 26, 28, 23, 25, 27, 5, 2, 8, 7, 29, 31, 27, 30, 32, 28],
+    ])
+
+    # The same gather for the 17 COCO keypoints of a YOLO pose model: the neck and mid-hip are
+    # the midpoints of the shoulders and hips, and the ankles are repeated for the feet (19-24)
+    openpose_coco_pairs = np.array([
+        [0, 5, 6, 8, 10, 5, 7, 9, 11, 12, 14, 16, 11, 13, 15, 2, 1, 4, 3, 15, 15, 15, 16, 16, 16],
+        [0, 6, 6, 8, 10, 5, 7, 9, 12, 12, 14, 16, 11, 13, 15, 2, 1, 4, 3, 15, 15, 15, 16, 16, 16],
+    ])
+
+    # MediaPipe landmark of each COCO keypoint, in COCO order
+    coco_to_mediapipe = np.array([0, 2, 5, 7, 8, 11, 12, 13, 14, 15, 16, 23, 24, 25, 26, 27, 28])
+
+    # MediaPipe hand and foot landmarks that openpose_joint_pairs reads but COCO has no keypoint
+    # for, and the COCO wrist or ankle that stands in for each, as in openpose_coco_pairs
+    coco_substitutes = np.array([
+        [17, 18, 29, 30, 31, 32],
+        [9, 10, 15, 16, 15, 16],
+    ])
+
+    # Reads the x, y, z and visibility of a landmark in one call
+    landmark_fields = operator.attrgetter('x', 'y', 'z', 'visibility')
      
     @staticmethod
     def interpolate_joint(lm1, lm2):
@@ -25,6 +59,64 @@ class PoseUtils:
         """
         return [(lm1.x + lm2.x) / 2, (lm1.y + lm2.y) / 2, (lm1.z + lm2.z) / 2]
     
+    @staticmethod
+    def landmarks_to_array(landmarks):
+        """
+        Copies MediaPipe landmarks into one array in a single pass over the landmarks.
+
+        :param landmarks: Landmark list message, e.g. results.pose_landmarks, or its
+                          repeated landmark field
+        :return: Array of shape (n_landmarks, 4) holding x, y, z, visibility
+        """
+        landmark_field = getattr(landmarks, 'landmark', landmarks)
+        values = itertools.chain.from_iterable(map(PoseUtils.landmark_fields, landmark_field))
+        return np.fromiter(values, dtype=np.float64, count=4 * len(landmark_field)).reshape(-1, 4)
+
+    @staticmethod
+    def landmarks_to_openpose(landmark_array):
+        """
+        Maps a MediaPipe landmark array to the OpenPose BODY_25 layout with one gather.
+        The neck and mid-hip are the midpoints of the shoulders and hips.
+
+        :param landmark_array: Array of shape (33, C) from landmarks_to_array
+        :return: Array of shape (25, C)
+        """
+        first, second = landmark_array[PoseUtils.openpose_joint_pairs]
+        return (first + second) / 2
+
+    @staticmethod
+    def coco_to_openpose(coco_keypoints):
+        """
+        Maps the COCO keypoints of a YOLO pose model to the OpenPose BODY_25 layout.
+
+        :param coco_keypoints: (17, 3) array of x, y in pixels and confidence
+        :return: (25, 3) OpenPose keypoints; a midpoint joint takes the lower confidence of its pair
+        """
+        first, second = coco_keypoints[PoseUtils.openpose_coco_pairs]
+        keypoints = np.empty((25, 3))
+        keypoints[:, :2] = (first[:, :2] + second[:, :2]) / 2
+        keypoints[:, 2] = np.minimum(first[:, 2], second[:, 2])
+        return keypoints
+
+    @staticmethod
+    def coco_to_landmarks(coco_keypoints, img_width, img_height):
+        """
+        Fills a MediaPipe-style landmark array from COCO keypoints, so the root trajectory and the
+        keypoint confidence can be computed the same way for both 2D backends. Every landmark the
+        OpenPose gather reads is set, the hand and foot ones from the wrists and ankles; the
+        other landmarks COCO has no equivalent for and every z stay 0.
+
+        :param coco_keypoints: (17, 3) array of x, y in pixels and confidence
+        :return: (33, 4) array of normalized x, y, z and the confidence as visibility
+        """
+        landmarks = np.zeros((33, 4))
+        landmarks[PoseUtils.coco_to_mediapipe, 0] = coco_keypoints[:, 0] / img_width
+        landmarks[PoseUtils.coco_to_mediapipe, 1] = coco_keypoints[:, 1] / img_height
+        landmarks[PoseUtils.coco_to_mediapipe, 3] = coco_keypoints[:, 2]
+        mediapipe_indices, coco_indices = PoseUtils.coco_substitutes
+        landmarks[mediapipe_indices] = landmarks[PoseUtils.coco_to_mediapipe[coco_indices]]
+        return landmarks
+
     @staticmethod
     def align_and_scale_3d_pose(pose_3d):
         """
@@ -46,139 +138,434 @@ class PoseUtils:
         return pose_3d
     
     @staticmethod
-    def get_keypoints_list(cap, pose_model, img_width, img_height):
-        keypoints_list = []
-        pose_world_keypoints_list = []
-        landmarks_list = []
-                
+    def get_keypoints_list(cap, pose_model, img_width, img_height, stride=1, motion_threshold=None):
+        """
+        Runs MediaPipe Pose over a video, on every frame or on the frames picked by sample_frames.
+
+        :param stride: Longest gap between processed frames; 1 processes every frame
+        :param motion_threshold: Only process frames that moved by more than this; see sample_frames
+        :return: KeypointTrack with one entry per processed frame, preallocated from the frame count;
+                 its frame_indices give the video frame of every entry
+        """
         if img_width == 0 or img_height == 0:
                 raise ValueError("Invalid frame dimensions: height or width is 0.")
             
         cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+        track = KeypointTrack(PoseUtils.sampled_capacity(int(cap.get(cv2.CAP_PROP_FRAME_COUNT)), stride))
         
-        while cap.isOpened():
-            ret, frame = cap.read()
-            if not ret:
-                break
+        # Frames are decoded on a background thread while MediaPipe runs on the previous ones
+        with VideoUtils.open_frame_reader(cap) as frames:
+            for frame_index, frame in PoseUtils.sample_frames(frames, stride, motion_threshold):
+                keypoints, pose_world_keypoints, landmarks = PoseUtils.process_frame(frame, pose_model, img_width, img_height)
+                track.append(keypoints, pose_world_keypoints, landmarks, frame_index)
 
-            keypoints, pose_world_keypoints, landmarks = PoseUtils.process_frame(frame, pose_model, img_width, img_height)
-            keypoints_list.append(keypoints)
-            pose_world_keypoints_list.append(pose_world_keypoints)
-            landmarks_list.append(landmarks)
+        return track
 
+    @staticmethod
+    def sample_frames(frames, stride=1, motion_threshold=None, start=0):
+        """
+        Picks the frames pose detection runs on: every stride-th frame or, with a motion
+        threshold, only the frames that changed by more than the threshold since the last
+        picked one, with stride as the longest gap. The first and last frames are always
+        picked so the skipped ones can be interpolated.
 
-        return keypoints_list, pose_world_keypoints_list, landmarks_list
+        :param frames: Iterable of frames, e.g. a FrameReader
+        :param stride: Longest gap between picked frames; 1 picks every frame
+        :param motion_threshold: Mean absolute grey-level difference (0-255) between
+                                 motion_thumbnail images, or None to pick on the stride alone
+        :param start: Video frame index of the first frame
+        :return: Generator of (frame_index, frame) pairs
+        """
+        stride = max(1, int(stride))
+        last_picked = None
+        reference = None
+        # Frames may be reused buffers, so the latest skipped frame is copied in case it is the last one
+        skipped, skipped_index = None, None
+
+        for frame_index, frame in enumerate(frames, start=start):
+            pick = last_picked is None or frame_index - last_picked >= stride
+            thumbnail = None
+            if motion_threshold is not None:
+                thumbnail = PoseUtils.motion_thumbnail(frame)
+                pick = pick or cv2.absdiff(thumbnail, reference).mean() > motion_threshold
+
+            if pick:
+                reference = thumbnail
+                last_picked, skipped_index = frame_index, None
+                yield frame_index, frame
+            else:
+                if skipped is None:
+                    skipped = np.empty_like(frame)
+                np.copyto(skipped, frame)
+                skipped_index = frame_index
+
+        if skipped_index is not None:
+            yield skipped_index, skipped
+
+    @staticmethod
+    def sampled_capacity(frame_count, stride):
+        """Entries sample_frames picks from frame_count frames on the stride alone, plus the last frame."""
+        stride = max(1, int(stride))
+        return frame_count if stride == 1 else frame_count // stride + 2
+
+    @staticmethod
+    def motion_thumbnail(frame, width=64):
+        """
+        Small greyscale copy of a frame for cheap motion checks.
+
+        :param width: Thumbnail width in pixels; the height keeps the aspect ratio
+        """
+        height = max(1, round(width * frame.shape[0] / frame.shape[1]))
+        small = cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
     
     @staticmethod
-    def process_frame(frame, pose_model, img_width, img_height):
+    def split_frame_range(frame_count, n_chunks):
+        """
+        Splits [0, frame_count) into up to n_chunks contiguous, near-equal ranges.
+
+        :return: List of (start, end) tuples in frame order
+        """
+        bounds = np.linspace(0, frame_count, max(1, n_chunks) + 1).round().astype(int)
+        return [(int(start), int(end)) for start, end in zip(bounds[:-1], bounds[1:]) if end > start]
+
+    @staticmethod
+    def get_keypoint_chunk(video_path, start, end, img_width, img_height, warmup_frames=0,
+                           stride=1, motion_threshold=None):
+        """
+        Runs MediaPipe Pose over frames [start, end) of a video with a fresh capture and
+        Pose graph, so chunks of one clip can be processed in separate worker processes.
+        The graph first runs over up to warmup_frames frames before start, whose results
+        are dropped, so its tracking and landmark smoothing have converged at start.
+
+        :param end: End frame (exclusive), or None to read to the end of the video
+        :param stride: See sample_frames
+        :param motion_threshold: See sample_frames
+        :return: KeypointTrack of the chunk, with frame_indices in video frame numbers
+        """
+        # Imported here: the registry imports PoseUtils itself
+        from utils.model_registry import ModelRegistry
+
+        if img_width == 0 or img_height == 0:
+            raise ValueError("Invalid frame dimensions: height or width is 0.")
+
+        first = max(0, start - warmup_frames)
+        cap = cv2.VideoCapture(video_path)
+        pose_model = ModelRegistry.acquire_pose_model()
         try:
+            if not cap.isOpened():
+                raise ValueError(f"Unable to open video file: {video_path}")
+            if first:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, first)
+
+            expected = (end if end is not None else int(cap.get(cv2.CAP_PROP_FRAME_COUNT))) - start
+            track = KeypointTrack(PoseUtils.sampled_capacity(expected, stride))
+            with VideoUtils.open_frame_reader(cap) as frames:
+                chunk_frames = frames if end is None else itertools.islice(frames, end - first)
+                for frame_index, frame in PoseUtils.sample_frames(chunk_frames, stride, motion_threshold, start=first):
+                    keypoints, pose_world_keypoints, landmarks = PoseUtils.process_frame(frame, pose_model, img_width, img_height)
+                    if frame_index >= start:
+                        track.append(keypoints, pose_world_keypoints, landmarks, frame_index)
+
+            return track
+        finally:
+            cap.release()
+            ModelRegistry.release_pose_model(pose_model)
+
+    @staticmethod
+    def process_frame(frame, pose_model, img_width, img_height, box=None):
+        """
+        Runs MediaPipe Pose on one frame, or on a padded crop around one person in it.
+        Frames above the inference resolution are downsampled first and crops are resized
+        to POSE_CROP_SIZE; the landmarks are normalized to the whole frame either way, so
+        the keypoints still come out in source pixels.
+
+        :param frame: BGR frame at the source or a downsampled resolution
+        :param img_width: Source frame width
+        :param img_height: Source frame height
+        :param box: Optional (x1, y1, x2, y2) of the person in the frame's own pixels
+        :return: Tuple (keypoints, pose_world_keypoints, landmarks): (25, 3) OpenPose keypoints in
+                 pixels and in world coordinates, and the (33, 4) MediaPipe landmark array, which
+                 is None when no pose was detected
+        """
+        try:
+            if box is not None:
+                frame_height, frame_width = frame.shape[:2]
+                crop, (x_offset, y_offset) = ObjectDetectionUtils.crop_person(frame, box)
+                crop_height, crop_width = crop.shape[:2]
+                frame, _ = VideoUtils.resize_for_inference(crop, PoseUtils.get_crop_size())
+            else:
+                frame, _ = VideoUtils.resize_for_inference(frame)
             rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
             detection_result = pose_model.process(rgb_frame)
 
             keypoints = np.zeros((25, 3))
             pose_world_keypoints = np.zeros((25, 3))
-            landmarks_list = []
+            landmarks = None
             
             if detection_result.pose_landmarks:
-                landmarks = detection_result.pose_landmarks.landmark
-                landmarks_list.append(landmarks)
-                # landmarks = detection_result.pose_world_landmarks.landmark
-
-                pose_world_landmarks = detection_result.pose_world_landmarks.landmark
-
-                for mp_idx, openpose_idx in PoseUtils.mediapipe_to_openpose.items():
-                    if mp_idx < len(landmarks):
-                        landmark = landmarks[mp_idx]
-                        world_landmark = pose_world_landmarks[mp_idx]
-                        
-                        keypoints[openpose_idx] = [landmark.x * img_width, landmark.y * img_height, 1.0]
-                        pose_world_keypoints[openpose_idx] = [world_landmark.x, world_landmark.y, world_landmark.z]
-                        
-
-                neck = PoseUtils.interpolate_joint(landmarks[11], landmarks[12])
-                keypoints[1] = [neck[0] * img_width, neck[1] * img_height, 1.0]
-                
-                neck_world = PoseUtils.interpolate_joint(pose_world_landmarks[11], pose_world_landmarks[12])
-                pose_world_keypoints[1] = [neck_world[0], neck_world[1], neck_world[2]]
-                
-                mid_hip = PoseUtils.interpolate_joint(landmarks[23], landmarks[24])
-                keypoints[8] = [mid_hip[0] * img_width, mid_hip[1] * img_height, 1.0]
-                
-                mid_hip_world = PoseUtils.interpolate_joint(pose_world_landmarks[23], pose_world_landmarks[24])
-                pose_world_keypoints[8] = [mid_hip_world[0], mid_hip_world[1], mid_hip_world[2]]
-                
-                keypoints[21] = keypoints[14]
-                keypoints[24] = keypoints[11]
-                
-                pose_world_keypoints[21] = pose_world_keypoints[14]
-                pose_world_keypoints[24] = pose_world_keypoints[11]
+                landmarks = PoseUtils.landmarks_to_array(detection_result.pose_landmarks)
+                if box is not None:
+                    # From the crop's normalized coordinates to the frame's; z shares the x scale
+                    landmarks[:, 0] = (x_offset + landmarks[:, 0] * crop_width) / frame_width
+                    landmarks[:, 1] = (y_offset + landmarks[:, 1] * crop_height) / frame_height
+                    landmarks[:, 2] *= crop_width / frame_width
+
+                openpose = PoseUtils.landmarks_to_openpose(landmarks)
+                keypoints[:, :2] = openpose[:, :2] * (img_width, img_height)
+                keypoints[:, 2] = 1.0
+
+                openpose_world = PoseUtils.landmarks_to_openpose(
+                    PoseUtils.landmarks_to_array(detection_result.pose_world_landmarks)
+                )
+                pose_world_keypoints[:] = openpose_world[:, :3]
                        
-            return keypoints, pose_world_keypoints, landmarks_list
+            return keypoints, pose_world_keypoints, landmarks
         except Exception as e:
             print(f"Error processing a frame: {e}")
             raise RuntimeError(f"Error processing a frame: {e}")
     
     @staticmethod
-    def get_root_keypoints(landmarks_list):
-        root_keypoints = []
+    def get_crop_size():
+        """Longest side person crops are resized to before MediaPipe Pose, from POSE_CROP_SIZE (default 256)."""
+        try:
+            return max(1, int(os.getenv("POSE_CROP_SIZE", 256)))
+        except ValueError:
+            return 256
+
+    @staticmethod
+    def get_root_keypoints(landmarks, valid, smoothing=None, fps=30):
+        """
+        Root trajectory as the mean of the shoulders, hips and knees. Frames without a pose
+        repeat the previous root, which starts at the origin.
 
+        :param landmarks: (T, 33, C) MediaPipe landmark array with C >= 3, e.g. KeypointTrack.landmarks
+        :param valid: (T,) mask of the frames where a pose was detected
+        :param smoothing: None, "savgol" or "one_euro" to reduce root jitter
+        :param fps: Frame rate of the clip, used to size the smoothing filters
+        :return: (T, 3) array of root positions
+        """
         # Relevant keypoints for stable root motion
-        relevant_indices = [11, 12, 23, 24, 25, 26]  # Hips, knees, ankles
-        num_keypoints = len(relevant_indices)  # Expected number of keypoints per frame
-        default_value = [0.0, 0.0, 0.0]  # Default value if no previous frame exists
-
-        # Store the last valid frame to fill missing values
-        previous_frame = [default_value] * num_keypoints  # Initialize with default
-
-        for frame in landmarks_list:
-            frame_keypoints = []  # Store only relevant keypoints
-
-            if frame:  # Ensure the frame is not empty
-                for landmarks in frame:
-                    if landmarks:
-                        for i in relevant_indices:
-                            if i < len(landmarks):  # Ensure index is within bounds
-                                landmark = landmarks[i]
-                                frame_keypoints.append([landmark.x, landmark.y, landmark.z])  # Collect selected keypoints
-                            else:
-                                frame_keypoints.append(previous_frame[i])  # Use previous frame value if missing
-                    else:
-                        frame_keypoints = previous_frame.copy()  # Use entire previous frame if landmarks are empty
+        relevant_indices = [11, 12, 23, 24, 25, 26]  # Shoulders, hips, knees
+
+        valid = np.asarray(valid, dtype=bool)
+        roots = np.asarray(landmarks)[:, relevant_indices, :3].astype(np.float64).mean(axis=1)
+
+        # Index of the last valid frame at or before every frame, -1 before the first one
+        last_valid = np.maximum.accumulate(np.where(valid, np.arange(len(valid)), -1)) if len(valid) else valid
+        roots = np.where((last_valid >= 0)[:, None], roots[np.maximum(last_valid, 0)], 0.0)
+
+        if smoothing and valid.any():
+            # The origin before the first detection is a placeholder, so it is left out
+            first = int(np.argmax(valid))
+            if smoothing == "savgol":
+                roots[first:] = PoseUtils.smooth_savgol(roots[first:], fps)
+            elif smoothing == "one_euro":
+                roots[first:] = PoseUtils.smooth_one_euro(roots[first:], fps)
             else:
-                frame_keypoints = previous_frame.copy()  # Use previous frame if entire frame is missing
+                raise ValueError(f'Root smoothing "{smoothing}" is invalid.')
+
+        return roots
+
+    @staticmethod
+    def smooth_savgol(trajectory, fps, window_seconds=0.3, polyorder=2):
+        """
+        Savitzky-Golay filter along the time axis.
 
-            # Ensure the frame has the correct number of keypoints
-            while len(frame_keypoints) < num_keypoints:
-                frame_keypoints.append(previous_frame[len(frame_keypoints)])  # Fill with previous values
+        :param trajectory: (T, D) array
+        :param fps: Frame rate of the trajectory
+        :param window_seconds: Length of the fitting window
+        :param polyorder: Order of the fitted polynomial
+        :return: Smoothed (T, D) array; trajectories shorter than the window are returned as is
+        """
+        from scipy.signal import savgol_filter
 
-            # Store this frame for future reference
-            previous_frame = frame_keypoints.copy()
+        window_length = max(int(round(window_seconds * fps)) | 1, polyorder + 2 | 1)
+        if len(trajectory) < window_length:
+            return trajectory
+        return savgol_filter(trajectory, window_length, polyorder, axis=0, mode='interp')
 
-            # Compute the average of selected keypoints
-            avg_root = np.mean(frame_keypoints, axis=0)  # Mean of relevant keypoints
-            root_keypoints.append(avg_root.tolist())  # Store as list
-            
-        return root_keypoints
+    @staticmethod
+    def smooth_one_euro(trajectory, fps, min_cutoff=1.0, beta=2.0, d_cutoff=1.0):
+        """
+        One-Euro filter along the time axis: a low-pass filter whose cutoff rises with speed,
+        so slow drift is smoothed while fast moves keep little lag.
+
+        :param trajectory: (T, D) array
+        :param fps: Frame rate of the trajectory
+        :param min_cutoff: Cutoff frequency in Hz when still
+        :param beta: Cutoff increase per unit of speed; positions are image fractions, so the
+                     speed is in image widths/heights per second
+        :param d_cutoff: Cutoff frequency in Hz of the speed estimate
+        :return: Smoothed (T, D) array
+        """
+        def alpha(cutoff):
+            return 1.0 / (1.0 + fps / (2 * math.pi * cutoff))
+
+        trajectory = np.asarray(trajectory, dtype=np.float64)
+        smoothed = np.empty_like(trajectory)
+        a_d = alpha(d_cutoff)
+
+        # Each dimension is filtered on plain floats, which is much faster than
+        # per-frame numpy operations on 3-vectors
+        for d, values in enumerate(trajectory.T.tolist()):
+            if not values:
+                break
+            previous, speed = values[0], 0.0
+            filtered = [previous]
+            for value in values[1:]:
+                speed += a_d * ((value - previous) * fps - speed)
+                previous += alpha(min_cutoff + beta * abs(speed)) * (value - previous)
+                filtered.append(previous)
+            smoothed[:, d] = filtered
+        return smoothed
+
+    @staticmethod
+    def keypoint_confidence(landmarks, valid):
+        """
+        Per-joint confidence of a clip's OpenPose keypoints, from the visibility of the
+        MediaPipe landmarks they are built from.
+
+        :param landmarks: (T, 33, 4) landmark array, e.g. KeypointTrack.landmarks
+        :param valid: (T,) mask of the frames where a pose was detected
+        :return: (T, 25) confidences, 0 in frames without a pose
+        """
+        landmarks = np.asarray(landmarks)
+        visibility = landmarks[:, PoseUtils.openpose_joint_pairs, 3].mean(axis=1)
+        return np.where(np.asarray(valid, dtype=bool)[:, None], visibility, 0.0)
+
+    @staticmethod
+    def fill_keypoint_gaps(keypoints, confidence, min_confidence=0.5, method="linear"):
+        """
+        Replaces the joints of a clip that were not detected, or fell below min_confidence, with
+        values from the same joint in the surrounding frames, so missed frames do not reach the
+        3D model as points at the origin. Gaps are filled linearly or with a shape-preserving
+        cubic spline (PCHIP) through the known frames; joints before their first or after their
+        last known frame hold that frame's value. A joint that never reaches min_confidence is
+        filled from every frame where it was detected at all.
+
+        :param keypoints: (T, J, C) keypoints with x and y first
+        :param confidence: (T, J) per-joint confidence, 0 where nothing was detected
+        :param method: "linear" or "spline"
+        :return: Tuple (points, known, metrics): (T, J, 2) filled x and y, the (T, J) mask of
+                 joints that were kept, and a dict with the number of frames, of frames with
+                 any filled joint, of frames without any known joint, of filled joints and
+                 the longest gap in frames
+        """
+        if method not in ("linear", "spline"):
+            raise ValueError(f'Gap filling method "{method}" is invalid.')
+
+        points = np.asarray(keypoints, dtype=np.float64)[:, :, :2]
+        confidence = np.asarray(confidence)
+        known = confidence >= min_confidence
+        weak = ~known.any(axis=0)
+        known[:, weak] = confidence[:, weak] > 0
+        n_frames, n_joints = known.shape
+
+        # Nearest known frame at or before and at or after every entry, per joint
+        frames = np.arange(n_frames)[:, None]
+        previous = np.maximum.accumulate(np.where(known, frames, -1), axis=0)
+        following = np.minimum.accumulate(np.where(known, frames, n_frames)[::-1], axis=0)[::-1]
+        has_previous, has_following = previous >= 0, following < n_frames
+        joints = np.arange(n_joints)[None]
+        before = points[np.clip(previous, 0, n_frames - 1), joints]
+        after = points[np.clip(following, 0, n_frames - 1), joints]
+
+        span = np.maximum(following - previous, 1)
+        weight = np.where(has_previous & has_following, (frames - previous) / span, np.where(has_previous, 0.0, 1.0))
+        filled = before + weight[..., None] * (after - before)
+
+        if method == "spline":
+            from scipy.interpolate import PchipInterpolator
+
+            interior = ~known & has_previous & has_following
+            for joint in np.flatnonzero(interior.any(axis=0) & (known.sum(axis=0) >= 3)):
+                known_frames = np.flatnonzero(known[:, joint])
+                gap_frames = np.flatnonzero(interior[:, joint])
+                spline = PchipInterpolator(known_frames, points[known_frames, joint], axis=0)
+                filled[gap_frames, joint] = spline(gap_frames)
+
+        # Joints never detected keep their values
+        fillable = known.any(axis=0)
+        filled[:, ~fillable] = points[:, ~fillable]
+        filled_joints = ~known & fillable[None]
+
+        gap_lengths = np.minimum(following, n_frames) - np.maximum(previous, -1) - 1
+        metrics = {
+            "frames": n_frames,
+            "filled_frames": int(filled_joints.any(axis=1).sum()),
+            "missing_frames": int((~known.any(axis=1)).sum()),
+            "filled_joints": int(filled_joints.sum()),
+            "longest_gap": int(gap_lengths[filled_joints].max()) if filled_joints.any() else 0,
+        }
+        return filled, known, metrics
+
+    @staticmethod
+    def smooth_keypoints(points, weights, fps, sigma_seconds=0.04):
+        """
+        Confidence-weighted Gaussian smoothing along the time axis: every joint becomes the
+        average of its neighbouring frames weighted by both the Gaussian and their confidence,
+        so confident detections pull uncertain ones into place rather than the other way round.
+
+        :param points: (T, J, D) array
+        :param weights: (T, J) non-negative weights, e.g. per-joint confidence
+        :param fps: Frame rate of the clip
+        :param sigma_seconds: Standard deviation of the Gaussian; 0 returns the points as is
+        :return: Smoothed (T, J, D) array
+        """
+        from scipy.ndimage import gaussian_filter1d
+
+        sigma = sigma_seconds * fps
+        if sigma <= 0 or len(points) < 2:
+            return points
+
+        points = np.asarray(points, dtype=np.float64)
+        weights = np.asarray(weights, dtype=np.float64)[..., None]
+        numerator = gaussian_filter1d(points * weights, sigma, axis=0, mode='nearest')
+        denominator = gaussian_filter1d(np.broadcast_to(weights, points.shape), sigma, axis=0, mode='nearest')
+        return np.divide(numerator, denominator, out=points.copy(), where=denominator > 1e-6)
     
     @staticmethod
     def initialize_3D_pose_estimator(config_file, checkpoint_file):
+        """
+        Loads the 3D pose estimator. Prefer ModelRegistry.get_estimator_3d, which keeps
+        the loaded estimator warm instead of reading the checkpoint on every call.
+        """
+        temp = pathlib.PosixPath
         try:
-            temp = pathlib.PosixPath
-            pathlib.PosixPath = pathlib.WindowsPath
-
-            importlib.reload(estimator_3d)
+            # The checkpoint pickles PosixPath objects, which cannot be instantiated on Windows
+            if os.name == "nt":
+                pathlib.PosixPath = pathlib.WindowsPath
 
-            e3d = estimator_3d.Estimator3D(config_file=config_file, checkpoint_file=checkpoint_file)
-
-            pathlib.PosixPath = temp
-            return e3d
+            return estimator_3d.Estimator3D(config_file=config_file, checkpoint_file=checkpoint_file)
         except Exception as e:
             raise RuntimeError(f"Error initializing Estimator3D: {e}")
+        finally:
+            pathlib.PosixPath = temp
         
     @staticmethod
-    def estimate_3d_from_2d(keypoints_list, estimator_3d, img_width, img_height):
+    def initialize_exported_3D_pose_estimator(artifact_file, backend=None):
+        """
+        Loads a 3D pose estimator from an artifact written by scripts/export_pose_model.py,
+        without importing the VideoPose model code.
+        """
+        try:
+            from utils.pose_estimator_3d.exported_estimator_3d import ExportedEstimator3D
+
+            return ExportedEstimator3D(artifact_file, backend=backend)
+        except Exception as e:
+            raise RuntimeError(f"Error initializing ExportedEstimator3D: {e}")
+
+    @staticmethod
+    def estimate_3d_from_2d(keypoints, estimator_3d, img_width, img_height):
+        """
+        Lifts a clip of 2D keypoints to 3D.
+
+        :param keypoints: (T, 25, 3) OpenPose keypoints, e.g. KeypointTrack.keypoints
+        :return: (T, 17, 3) 3D poses
+        """
         try:
-            pose2d = np.stack(keypoints_list)[:, :, :2]
+            pose2d = np.asarray(keypoints)[:, :, :2]
             return estimator_3d.estimate(pose2d, image_width=img_width, image_height=img_height)
         except Exception as e:
             raise RuntimeError(f"Error in estimate_3d_from_2d: {e}")
\ No newline at end of file
@@ -1,9 +1,160 @@
 import os
+import queue
+import threading
+import time
 import cv2
+import numpy as np
 from datetime import datetime
 
+
+class FrameReader:
+    """
+    Decodes a cv2.VideoCapture on a background thread into a bounded ring of reusable frame
+    buffers, so decoding the next frames overlaps with inference on the current one.
+
+    Iterating yields the frames in order. A yielded frame is only valid until the next one
+    is requested, because its buffer is then handed back to the decoder; copy it to keep it.
+    """
+
+    _totals_lock = threading.Lock()
+    _totals = {"readers": 0, "frames": 0, "decode_seconds": 0.0, "stall_seconds": 0.0, "inference_seconds": 0.0}
+
+    def __init__(self, cap, buffer_size=None):
+        """
+        :param cap: Opened OpenCV VideoCapture, positioned at the first frame to read
+        :param buffer_size: Number of frames decoded ahead; defaults to VIDEO_PREFETCH_FRAMES (8)
+        """
+        self.cap = cap
+        buffer_size = max(2, int(buffer_size or os.getenv("VIDEO_PREFETCH_FRAMES", 8)))
+
+        # Buffers are allocated by the first decode into each slot, then reused in place
+        self._buffers = [None] * buffer_size
+        self._free = queue.Queue()
+        for slot in range(buffer_size):
+            self._free.put(slot)
+        self._filled = queue.Queue()
+        self._current = None
+        self._stopped = threading.Event()
+        self._error = None
+        self._last_return = None
+
+        self.frames = 0
+        self.decode_seconds = 0.0
+        self.stall_seconds = 0.0
+        self.inference_seconds = 0.0
+
+        self._thread = threading.Thread(target=self._decode, name="frame-reader", daemon=True)
+        self._thread.start()
+
+    def _decode(self):
+        try:
+            while not self._stopped.is_set():
+                slot = self._free.get()
+                if slot is None:
+                    break
+
+                start = time.perf_counter()
+                ret, frame = self.cap.read(self._buffers[slot])
+                self.decode_seconds += time.perf_counter() - start
+                if not ret:
+                    break
+
+                self._buffers[slot] = frame
+                self._filled.put(slot)
+        except Exception as e:
+            self._error = e
+        finally:
+            self._filled.put(None)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        now = time.perf_counter()
+        if self._last_return is not None:
+            self.inference_seconds += now - self._last_return
+
+        # The consumer is done with the previous frame, so its buffer can be decoded into again
+        if self._current is not None:
+            self._free.put(self._current)
+            self._current = None
+
+        slot = self._filled.get()
+        self.stall_seconds += time.perf_counter() - now
+        if slot is None:
+            self._filled.put(None)  # Later calls end as well
+            self.close()
+            if self._error is not None:
+                raise self._error
+            raise StopIteration
+
+        self._current = slot
+        self.frames += 1
+        self._last_return = time.perf_counter()
+        return self._buffers[slot]
+
+    def read(self):
+        """Drop-in for VideoCapture.read: returns (ret, frame)."""
+        try:
+            return True, next(self)
+        except StopIteration:
+            return False, None
+
+    def close(self):
+        """Stops the decoder thread and adds this reader's timings to the process totals."""
+        if self._stopped.is_set():
+            return
+        self._stopped.set()
+        self._free.put(None)
+        self._thread.join()
+        self._last_return = None
+
+        with FrameReader._totals_lock:
+            totals = FrameReader._totals
+            totals["readers"] += 1
+            totals["frames"] += self.frames
+            totals["decode_seconds"] += self.decode_seconds
+            totals["stall_seconds"] += self.stall_seconds
+            totals["inference_seconds"] += self.inference_seconds
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def get_metrics(self):
+        """
+        Timings of this reader in seconds. stall_seconds is time the consumer spent waiting
+        for a decoded frame; inference_seconds is time it spent between frames.
+        """
+        return {
+            "frames": self.frames,
+            "decode_seconds": self.decode_seconds,
+            "stall_seconds": self.stall_seconds,
+            "inference_seconds": self.inference_seconds,
+        }
+
+    @classmethod
+    def get_totals(cls):
+        """Timings summed over every closed reader of this process."""
+        with cls._totals_lock:
+            return dict(cls._totals)
+
+
 class VideoUtils:
     
+    @staticmethod
+    def open_frame_reader(cap, buffer_size=None):
+        """
+        Starts decoding an opened video on a background thread.
+
+        :param cap: OpenCV VideoCapture object
+        :param buffer_size: Number of frames decoded ahead
+        :return: FrameReader yielding the frames in order
+        """
+        return FrameReader(cap, buffer_size)
+
     @staticmethod
     def open_video(file_path):
         """
@@ -55,6 +206,16 @@ class VideoUtils:
         video.release()
         return frame_count
     
+    @staticmethod
+    def get_capture_frame_count(video):
+        """
+        Returns the frame count reported by an already opened video.
+
+        :param video: OpenCV VideoCapture object
+        :return: Total number of frames in the video (may be an estimate for some containers)
+        """
+        return int(video.get(cv2.CAP_PROP_FRAME_COUNT))
+
     @staticmethod
     def get_video_fps(video):
         """
@@ -65,6 +226,41 @@ class VideoUtils:
         """
         return video.get(cv2.CAP_PROP_FPS)
 
+    @staticmethod
+    def get_inference_max_side():
+        """
+        Returns the longest frame side the detector and pose model run at.
+
+        :return: INFERENCE_MAX_SIDE (default 1280), or 0 to keep the source resolution
+        """
+        try:
+            return max(0, int(os.getenv("INFERENCE_MAX_SIDE", 1280)))
+        except ValueError:
+            return 1280
+
+    @staticmethod
+    def resize_for_inference(frame, max_side=None):
+        """
+        Downsamples a frame so its longest side is at most max_side, keeping the aspect ratio.
+        YOLO and MediaPipe resize to their own input size internally, so running them on this
+        copy gives the same results for a fraction of the colour conversion and copying cost.
+
+        :param frame: Source frame
+        :param max_side: Longest side in pixels; defaults to get_inference_max_side()
+        :return: Tuple (frame, scale), where scale maps source pixel coordinates to the returned
+                 frame. A frame that is small enough is returned as is with a scale of 1.0.
+        """
+        if max_side is None:
+            max_side = VideoUtils.get_inference_max_side()
+        height, width = frame.shape[:2]
+        if not max_side or max(height, width) <= max_side:
+            return frame, 1.0
+
+        scale = max_side / max(height, width)
+        size = (max(1, round(width * scale)), max(1, round(height * scale)))
+        # Bilinear rather than INTER_AREA, which costs about as much as the inference it saves on a 4K frame
+        return cv2.resize(frame, size, interpolation=cv2.INTER_LINEAR), scale
+
     @staticmethod
     def initialize_video_writer(person_id, output_folder, fps, frame_size):
         """
@@ -97,4 +293,38 @@ class VideoUtils:
                 )
                 output_video_paths.append(output_video_path)
 
-            writers[person_id].write(cropped_frame)
\ No newline at end of file
+            writers[person_id].write(cropped_frame)
+
+    @staticmethod
+    def concatenate_videos(video_paths, output_path, fps, frame_size, gaps=None):
+        """
+        Joins videos end to end into a new file, with optional black frames between them.
+
+        :param video_paths: Paths of the videos in order; every frame must be frame_size
+        :param output_path: Path of the joined video
+        :param fps: Frames per second of the joined video
+        :param frame_size: Tuple (width, height) of the video frame
+        :param gaps: Number of black frames to write before each video; defaults to none
+        :return: Number of frames written
+        """
+        writer = cv2.VideoWriter(output_path, cv2.VideoWriter_fourcc(*'mp4v'), fps, frame_size)
+        blank = np.zeros((frame_size[1], frame_size[0], 3), dtype=np.uint8)
+        written = 0
+        try:
+            for i, video_path in enumerate(video_paths):
+                for _ in range(gaps[i] if gaps else 0):
+                    writer.write(blank)
+                    written += 1
+
+                cap = cv2.VideoCapture(video_path)
+                frame = None
+                while True:
+                    ret, frame = cap.read(frame)
+                    if not ret:
+                        break
+                    writer.write(frame)
+                    written += 1
+                cap.release()
+        finally:
+            writer.release()
+        return written
@@ -58,9 +58,48 @@ export const uploadVideo = async (
             }
         );
 
+        // The backend queues the video and answers with a job id; wait for the job to finish
+        if (response.data.success && response.data.data?.jobId) {
+            return await waitForProcessingJob(response.data.data.jobId);
+        }
+
         return response.data;
     } catch (error: any) {
         console.error("Error uploading video:", error);
         return error.response.data;
     }
 };
+
+/**
+ * Polls a processing job until it completes or fails.
+ *
+ * @param jobId - The ID of the processing job returned by the upload.
+ * @param intervalMs - Delay between two status requests.
+ * @returns A promise that resolves to the same response shape as a synchronous upload.
+ */
+export const waitForProcessingJob = async (
+    jobId: number,
+    intervalMs: number = 2000
+): Promise<ApiResponse<UploadResponse>> => {
+    while (true) {
+        const response = await axiosInstance.get<ApiResponse<UploadResponse>>(`/pose/jobs/${jobId}`);
+        const job = response.data.data;
+
+        if (!response.data.success || !job) {
+            return response.data;
+        }
+
+        if (job.status === "completed") {
+            return {
+                ...response.data,
+                data: { bvh_filenames: job.bvh_filenames, projectId: job.projectId },
+            };
+        }
+
+        if (job.status === "failed") {
+            return { ...response.data, success: false, message: job.message || "Error processing video" };
+        }
+
+        await new Promise((resolve) => setTimeout(resolve, intervalMs));
+    }
+};